@@ -1,22 +1,88 @@
 # sentiric-stt-service/app/api/v1/endpoints.py
 import asyncio
+import functools
 import structlog
 from fastapi import (
     APIRouter, UploadFile, File, HTTPException, Form, 
-    WebSocket, WebSocketDisconnect, Request, status
+    WebSocket, WebSocketDisconnect, Request, Response, status
 )
 from pydantic import BaseModel
-from typing import Optional
-from app.utils.audio import resample_audio
-from app.services.stt_service import get_adapter
-from app.services.streaming_service import AudioProcessor
+from typing import List, Optional
+from app.core.config import settings
+from app.core.metrics import TRANSCRIPTION_CACHE_REQUESTS
+from app.utils.audio import FfmpegTimeoutError, load_audio_file, CODEC_PCM_S16LE
+from app.utils.audio_buffers import AudioTooLongError
+from app.utils.result_protocol import ENCODING_BINARY, ENCODING_JSON, SUPPORTED_ENCODINGS, encode_result, is_binary_result
+from app.services.stt_service import (
+    get_adapter, get_inference_executor, InferenceQueueFullError, InferenceTimeoutError
+)
+from app.services.batching_service import get_batch_scheduler
+from app.services.model_registry import UnknownModelError, get_model_registry
+from app.services.cache_service import get_transcription_cache, pcm_cache_key, upload_cache_key
+from app.services.file_transcription_service import (
+    BatchBudget, BatchTooLargeError, read_audio_archive, transcribe_files_batch, transcribe_pcm
+)
+from app.services.job_service import JOB_COMPLETED, JobQueueFullError, get_job_manager, job_to_dict
+from app.services.multiplex_service import MultiplexedSession
+from app.services.session_service import SessionLimitError, get_session_manager
+from app.services.streaming_service import AudioIngestQueue, AudioProcessor
 from uvicorn.protocols.utils import ClientDisconnected
 
 router = APIRouter()
 log = structlog.get_logger(__name__)
 
+class TranscriptionSegmentResponse(BaseModel):
+    start: float
+    end: float
+    text: str
+
 class TranscriptionResponse(BaseModel):
     text: str
+    segments: List[TranscriptionSegmentResponse] = []
+
+class BatchTranscriptionItem(BaseModel):
+    filename: str
+    text: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchTranscriptionResponse(BaseModel):
+    results: List[BatchTranscriptionItem]
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str
+    progress: float
+    filename: Optional[str] = None
+    error: Optional[str] = None
+    created_at: float
+    updated_at: float
+
+ARCHIVE_CONTENT_TYPES = ("application/zip", "application/x-zip-compressed")
+
+# Bu header'a "1"/"true" verilirse önbellek okunmaz, sonuç yeniden hesaplanıp önbelleğe yazılır
+CACHE_BYPASS_HEADER = "X-Cache-Bypass"
+CACHE_STATUS_HEADER = "X-Cache"
+
+async def _resolve_model_adapter(connection, model: Optional[str], route_default: str):
+    """
+    İstenen model varyantının adaptörünü (gerekirse yükleyerek) ve sonucu
+    etkileyen model kimliğini döndürür. `model` verilmezse, bağlantı tipinin
+    (akış/dosya) varsayılan varyantı kullanılır.
+    """
+    registry = get_model_registry(connection)
+    if registry is None:
+        return get_adapter(connection), f"{settings.STT_SERVICE_MODEL_SIZE}:{settings.STT_SERVICE_COMPUTE_TYPE}"
+    variant = registry.resolve(model or route_default or None)
+    return await registry.get(variant.name), variant.identity
+
+def _to_transcription_response(result) -> dict:
+    return {
+        "text": result.text,
+        "segments": [
+            {"start": round(segment.start, 3), "end": round(segment.end, 3), "text": segment.text}
+            for segment in result.segments
+        ]
+    }
 
 @router.post(
     "/transcribe", 
@@ -26,20 +92,27 @@ class TranscriptionResponse(BaseModel):
 )
 async def create_transcription(
     request: Request,
+    response: Response,
     language: Optional[str] = Form(None), 
     audio_file: UploadFile = File(...),
     logprob_threshold: Optional[float] = Form(None),
-    no_speech_threshold: Optional[float] = Form(None)
+    no_speech_threshold: Optional[float] = Form(None),
+    model: Optional[str] = Form(None)
 ):
     """
     Bir ses dosyasını yükleyerek metne çevirir. Farklı ses formatlarını destekler.
+    Dosya belleğe bütünüyle alınmadan, diskteki geçici kopyası üzerinden çözülür.
+    Aynı ses aynı parametrelerle tekrar gönderilirse sonuç önbellekten döner.
+    `model` ile yapılandırılmış model varyantlarından biri seçilebilir.
     """
+    # İstek boyutu (STT_SERVICE_MAX_UPLOAD_MB) form ayrıştırılmadan önce UploadSizeLimitMiddleware'de denetlenir
     if not (audio_file.content_type and audio_file.content_type.startswith("audio/")):
         log.warn("Geçersiz dosya tipi yüklendi.", content_type=audio_file.content_type, filename=audio_file.filename)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid file type: {audio_file.content_type}. Please upload an audio file.")
     
     adapter = get_adapter(request)
-    if not adapter:
+    executor = get_inference_executor(request)
+    if not adapter or not executor:
         log.error("Transkripsiyon isteği alındı ancak model hazır değil.")
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Model is not ready, please try again later.")
         
@@ -49,94 +122,484 @@ async def create_transcription(
         "Dosya transkripsiyon isteği alındı.", 
         filename=audio_file.filename, 
         language=normalized_language or "auto", 
-        content_type=audio_file.content_type
+        content_type=audio_file.content_type,
+        model=model or settings.STT_SERVICE_FILE_MODEL or settings.STT_SERVICE_DEFAULT_MODEL
     )
+
+    try:
+        adapter, model_identity = await _resolve_model_adapter(request, model, settings.STT_SERVICE_FILE_MODEL)
+    except UnknownModelError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        log.error("İstenen model yüklenemedi.", model=model, error=str(e), exc_info=True)
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Requested model could not be loaded.")
             
+    cache = get_transcription_cache(request)
+    bypass_cache = request.headers.get(CACHE_BYPASS_HEADER, "").lower() in ("1", "true", "yes")
+    cache_options = dict(
+        model=model_identity,
+        language=normalized_language,
+        logprob_threshold=logprob_threshold,
+        no_speech_threshold=no_speech_threshold
+    )
+    loop = asyncio.get_running_loop()
+
     try:
-        audio_bytes = await audio_file.read()
-        log.debug("Ses dosyası başarıyla okundu.", original_size_kb=round(len(audio_bytes) / 1024, 2))
+        cache_keys = []
+        if cache is not None:
+            # Önce ham dosya byte'larına bakılır; aynı dosya kod çözmeye gerek kalmadan döner
+            upload_key = await loop.run_in_executor(None, functools.partial(upload_cache_key, audio_file.file, **cache_options))
+            cache_keys.append(upload_key)
+            cached = None if bypass_cache else await cache.get(upload_key)
+            if cached:
+                return _cached_transcription_response(response, cached)
 
-        resampled_audio_bytes = resample_audio(audio_bytes)
-        
-        result_text = adapter.transcribe(
-            resampled_audio_bytes, 
+        # Kod çözme event loop dışında, yüklenen dosyanın kendisi üzerinden yapılır;
+        # uzun kayıtlarda çözülen PCM diske taşar ve memory-mapped olarak döner
+        pcm = await load_audio_file(audio_file.file)
+        log.debug("Ses dosyası başarıyla çözüldü.", duration_seconds=round(len(pcm) / settings.STT_SERVICE_TARGET_SAMPLE_RATE, 2))
+
+        if cache is not None:
+            # Farklı konteyner/kodlamayla gönderilmiş aynı ses, çözülmüş PCM'in özetiyle yakalanır
+            pcm_key = await loop.run_in_executor(None, functools.partial(pcm_cache_key, pcm, **cache_options))
+            cache_keys.append(pcm_key)
+            cached = None if bypass_cache else await cache.get(pcm_key)
+            if cached:
+                await cache.put(upload_key, cached)
+                return _cached_transcription_response(response, cached)
+
+        result = await transcribe_pcm(
+            adapter,
+            executor,
+            pcm,
             normalized_language,
             logprob_threshold=logprob_threshold,
             no_speech_threshold=no_speech_threshold
         )
+
+        if cache is not None:
+            cache_status = "BYPASS" if bypass_cache else "MISS"
+            TRANSCRIPTION_CACHE_REQUESTS.labels(result=cache_status.lower()).inc()
+            response.headers[CACHE_STATUS_HEADER] = cache_status
+            for key in cache_keys:
+                await cache.put(key, result)
         
-        log.info("Dosya transkripsiyonu başarıyla tamamlandı.", text_length=len(result_text))
-        log.debug("Transkripsiyon sonucu", transcribed_text=result_text)
-        return {"text": result_text}
+        log.info("Dosya transkripsiyonu başarıyla tamamlandı.", text_length=len(result.text), segments=len(result.segments))
+        log.debug("Transkripsiyon sonucu", transcribed_text=result.text)
+        return _to_transcription_response(result)
 
+    except AudioTooLongError:
+        log.warn("Ses dosyası izin verilen süreyi aşıyor.", filename=audio_file.filename)
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Audio is longer than the maximum allowed duration.")
+    except ValueError as e:
+        log.warn("Ses dosyası çözülemedi.", filename=audio_file.filename, error=str(e))
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Audio file could not be decoded.")
+    except InferenceQueueFullError:
+        log.warn("Transkripsiyon isteği reddedildi: çıkarım kuyruğu dolu.")
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Server is busy, please try again later.")
+    except InferenceTimeoutError:
+        log.error("Transkripsiyon zaman aşımına uğradı.")
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Transcription timed out.")
+    except FfmpegTimeoutError:
+        log.error("Ses dosyasının çözülmesi zaman aşımına uğradı.", filename=audio_file.filename)
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Audio decoding timed out.")
     except Exception as e:
         log.error("Transkripsiyon sırasında beklenmedik bir hata oluştu.", error=str(e), exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An error occurred while processing the audio file.")
 
+def _cached_transcription_response(response: Response, result) -> dict:
+    TRANSCRIPTION_CACHE_REQUESTS.labels(result="hit").inc()
+    response.headers[CACHE_STATUS_HEADER] = "HIT"
+    log.info("Dosya transkripsiyonu önbellekten döndü.", text_length=len(result.text))
+    return _to_transcription_response(result)
+
+@router.post(
+    "/transcribe-batch",
+    response_model=BatchTranscriptionResponse,
+    tags=["Speech-to-Text (Dosya)"],
+    summary="Çok sayıda kısa ses dosyasını tek istekte metne çevirir."
+)
+async def create_batch_transcription(
+    request: Request,
+    language: Optional[str] = Form(None),
+    audio_files: List[UploadFile] = File(...),
+    logprob_threshold: Optional[float] = Form(None),
+    no_speech_threshold: Optional[float] = Form(None),
+    model: Optional[str] = Form(None)
+):
+    """
+    Birden fazla ses dosyasını (veya bunları içeren zip arşivlerini) tek
+    istekte metne çevirir. Dosyalar eşzamanlı çözülür ve modele gruplar halinde
+    verilir. Sonuçlar gönderilen sırayla döner; bir dosyadaki hata sadece o
+    öğenin `error` alanında raporlanır.
+    """
+    adapter = get_adapter(request)
+    executor = get_inference_executor(request)
+    if not adapter or not executor:
+        log.error("Toplu transkripsiyon isteği alındı ancak model hazır değil.")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Model is not ready, please try again later.")
+
+    try:
+        adapter, _ = await _resolve_model_adapter(request, model, settings.STT_SERVICE_FILE_MODEL)
+    except UnknownModelError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        log.error("İstenen model yüklenemedi.", model=model, error=str(e), exc_info=True)
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Requested model could not be loaded.")
+
+    loop = asyncio.get_running_loop()
+    # Dosya sayısı ve arşivlerin açılmış boyutu tek tek değil, isteğin tamamı için sınırlanır
+    budget = BatchBudget(settings.STT_SERVICE_BATCH_MAX_FILES, settings.STT_SERVICE_MAX_UPLOAD_MB * 1024 * 1024)
+    files = []
+    for upload in audio_files:
+        is_archive = upload.content_type in ARCHIVE_CONTENT_TYPES or (upload.filename or "").lower().endswith(".zip")
+        try:
+            if is_archive:
+                files.extend(await loop.run_in_executor(None, read_audio_archive, upload.file, budget))
+            elif upload.content_type and upload.content_type.startswith("audio/"):
+                budget.reserve(1, upload.size or 0)
+                files.append((upload.filename, upload.file))
+            else:
+                log.warn("Geçersiz dosya tipi yüklendi.", content_type=upload.content_type, filename=upload.filename)
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid file type: {upload.content_type}. Please upload audio files or a zip archive.")
+        except BatchTooLargeError as e:
+            log.warn("Toplu transkripsiyon isteği sınırları aşıyor.", filename=upload.filename, error=str(e))
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+        except ValueError as e:
+            log.warn("Arşiv okunamadı.", filename=upload.filename, error=str(e))
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Archive could not be read: {upload.filename}")
+
+    normalized_language = language.lower() if language and language.strip() else None
+    log.info("Toplu transkripsiyon isteği alındı.", file_count=len(files), language=normalized_language or "auto")
+
+    results = await transcribe_files_batch(
+        adapter,
+        executor,
+        files,
+        normalized_language,
+        logprob_threshold=logprob_threshold,
+        no_speech_threshold=no_speech_threshold
+    )
+
+    failed = sum(1 for result in results if result.error)
+    log.info("Toplu transkripsiyon tamamlandı.", file_count=len(results), failed_count=failed)
+    return {"results": [result.to_dict() for result in results]}
+
+@router.post(
+    "/jobs",
+    response_model=JobStatusResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    tags=["Speech-to-Text (İş Kuyruğu)"],
+    summary="Bir ses dosyasını arka planda metne çevrilmek üzere kuyruğa alır."
+)
+async def create_transcription_job(
+    request: Request,
+    language: Optional[str] = Form(None),
+    audio_file: UploadFile = File(...),
+    logprob_threshold: Optional[float] = Form(None),
+    no_speech_threshold: Optional[float] = Form(None),
+    model: Optional[str] = Form(None)
+):
+    """
+    Uzun kayıtlar için bağlantıyı transkripsiyon boyunca açık tutmadan çalışır:
+    dosya kaydedilir ve iş kuyruğa alınır. Durum `GET /jobs/{job_id}` ile
+    sorgulanır, sonuç iş tamamlandığında `GET /jobs/{job_id}/result` ile alınır.
+    Model henüz yüklenmemişse iş, model hazır olana kadar kuyrukta bekler.
+    """
+    job_manager = get_job_manager(request)
+    if job_manager is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Async job API is disabled.")
+
+    if not (audio_file.content_type and audio_file.content_type.startswith("audio/")):
+        log.warn("Geçersiz dosya tipi yüklendi.", content_type=audio_file.content_type, filename=audio_file.filename)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid file type: {audio_file.content_type}. Please upload an audio file.")
+
+    # Model listesi ancak model yüklendikten sonra bilinir; daha önce gönderilen işlerde model iş sırasında doğrulanır
+    registry = get_model_registry(request)
+    if registry is not None:
+        try:
+            registry.resolve(model or settings.STT_SERVICE_FILE_MODEL or None)
+        except UnknownModelError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    options = {
+        "language": language.lower() if language and language.strip() else None,
+        "logprob_threshold": logprob_threshold,
+        "no_speech_threshold": no_speech_threshold,
+        "model": model,
+    }
+    try:
+        job = await job_manager.submit(audio_file.file, audio_file.filename, options)
+    except JobQueueFullError:
+        log.warn("Transkripsiyon işi reddedildi: iş kuyruğu dolu.")
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Job queue is full, please try again later.")
+
+    log.info("Transkripsiyon işi kuyruğa alındı.", job_id=job.id, filename=audio_file.filename)
+    return job_to_dict(job)
+
+async def _get_job_or_404(request: Request, job_id: str):
+    job_manager = get_job_manager(request)
+    if job_manager is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Async job API is disabled.")
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found.")
+    return job
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=JobStatusResponse,
+    tags=["Speech-to-Text (İş Kuyruğu)"],
+    summary="Bir transkripsiyon işinin durumunu ve ilerlemesini döndürür."
+)
+async def get_transcription_job(request: Request, job_id: str):
+    return job_to_dict(await _get_job_or_404(request, job_id))
+
+@router.get(
+    "/jobs/{job_id}/result",
+    response_model=TranscriptionResponse,
+    tags=["Speech-to-Text (İş Kuyruğu)"],
+    summary="Tamamlanmış bir transkripsiyon işinin sonucunu döndürür."
+)
+async def get_transcription_job_result(request: Request, job_id: str):
+    job = await _get_job_or_404(request, job_id)
+    if job.status != JOB_COMPLETED:
+        detail = f"Job failed: {job.error}" if job.error else f"Job is not completed yet (status: {job.status})."
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detail)
+    return _to_transcription_response(job.result)
+
+def _websocket_sender(websocket: WebSocket, client_info: str, encoding: str = ENCODING_JSON):
+    """
+    Farklı görevlerden (sonuçlar, aşırı yük bildirimleri, çoklu akışlar) aynı
+    sokete sırayla mesaj gönderen fonksiyonu döner. Gönderim başarısızsa False döner.
+    `encoding` binary ise final/partial sonuçlar kompakt binary mesaj olarak,
+    diğer tüm mesajlar JSON olarak gönderilir.
+    """
+    send_lock = asyncio.Lock()
+
+    async def send_message(message: dict) -> bool:
+        async with send_lock:
+            try:
+                if encoding == ENCODING_BINARY and is_binary_result(message):
+                    await websocket.send_bytes(encode_result(message))
+                else:
+                    await websocket.send_json(message)
+                return True
+            except (WebSocketDisconnect, ClientDisconnected, RuntimeError):
+                log.warn("Could not send to a closed WebSocket. Client likely disconnected.", client=client_info)
+                return False
+
+    return send_message
+
 # --- DEĞİŞİKLİK BURADA ---
 @router.websocket("/transcribe-stream")
 async def websocket_transcription(
     websocket: WebSocket, 
     language: Optional[str] = None,
     logprob_threshold: Optional[float] = None,
-    no_speech_threshold: Optional[float] = None
+    no_speech_threshold: Optional[float] = None,
+    partial_results: Optional[bool] = None,
+    codec: str = CODEC_PCM_S16LE,
+    sample_rate: int = 16000,
+    model: Optional[str] = None,
+    encoding: str = ENCODING_JSON,
+    word_timestamps: bool = False
 ):
     """
     Gerçek zamanlı ses akışını WebSocket üzerinden metne çevirir.
+    `codec` (pcm_s16le, pcm_mulaw, pcm_alaw) ve `sample_rate` ile ham telefon
+    sesi (ör. 8kHz G.711) doğrudan gönderilebilir; dönüşüm sunucuda yapılır.
+    `model` verilmezse düşük gecikmeli akış varyantı (STT_SERVICE_STREAMING_MODEL) kullanılır.
+    `encoding=binary` sonuçları kompakt binary mesajlar olarak (bkz. app/utils/result_protocol.py)
+    gönderir; `word_timestamps=true` nihai sonuçlara kelime zamanlarını ve güven skorunu ekler.
     """
     await websocket.accept()
     client_info = f"{websocket.client.host}:{websocket.client.port}"
     normalized_language = language.lower() if language and language.strip() else None
     
-    log.info("WebSocket connection established.", client=client_info, language=normalized_language or "auto")
-    
-    adapter = get_adapter(websocket)
-    if not adapter:
-        log.warn("WebSocket connection rejected: model not ready.", client=client_info)
-        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Model is not ready, please try again in a moment.")
-        return
-        
-    # AudioProcessor'ı çağırırken artık URL'den gelen parametreleri vermiyoruz.
-    # Bu ayarlar artık config'den okunuyor.
-    audio_processor = AudioProcessor(
-        adapter=adapter, 
-        language=normalized_language,
-        logprob_threshold=logprob_threshold,
-        no_speech_threshold=no_speech_threshold
+    log.info(
+        "WebSocket connection established.",
+        client=client_info, language=normalized_language or "auto", codec=codec, sample_rate=sample_rate
     )
-
-    async def audio_chunk_generator():
-        try:
-            while True:
-                data = await websocket.receive_bytes()
-                yield data
-        except WebSocketDisconnect:
-            log.info("WebSocket client disconnected.", client=client_info)
     
+    # Oturum sınırı, model çözümleme ve işlemci kurulumu gibi ağır işlerden önce ayrılır
+    session_manager = get_session_manager(websocket)
+    session = None
+    if session_manager is not None:
+        try:
+            session = session_manager.reserve(client_info)
+        except SessionLimitError as e:
+            log.warn("WebSocket connection rejected: session limit reached.", client=client_info, active_sessions=len(session_manager))
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason=str(e)[:120])
+            return
+
+    receive_task = None
     transcribe_task = None
     try:
+        encoding = encoding.lower()
+        if encoding not in SUPPORTED_ENCODINGS:
+            log.warn("WebSocket connection rejected: unsupported result encoding.", client=client_info, encoding=encoding)
+            await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA, reason=f"Unsupported encoding: {encoding}"[:120])
+            return
+
+        adapter = get_adapter(websocket)
+        executor = get_inference_executor(websocket)
+        if not adapter or not executor:
+            log.warn("WebSocket connection rejected: model not ready.", client=client_info)
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Model is not ready, please try again in a moment.")
+            return
+
+        try:
+            adapter, _ = await _resolve_model_adapter(websocket, model, settings.STT_SERVICE_STREAMING_MODEL)
+        except UnknownModelError as e:
+            log.warn("WebSocket connection rejected: unknown model.", client=client_info, model=model)
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e)[:120])
+            return
+        except Exception as e:
+            log.error("WebSocket connection rejected: model could not be loaded.", client=client_info, model=model, error=str(e))
+            await websocket.close(code=status.WS_1011_INTERNAL_ERROR, reason="Requested model could not be loaded.")
+            return
+        
+        # VAD ayarları config'den okunur; URL parametreleri sadece oturuma özel tercihleri taşır.
+        try:
+            audio_processor = AudioProcessor(
+                adapter=adapter, 
+                executor=executor,
+                language=normalized_language,
+                logprob_threshold=logprob_threshold,
+                no_speech_threshold=no_speech_threshold,
+                scheduler=get_batch_scheduler(websocket),
+                partial_results=partial_results,
+                codec=codec.lower(),
+                sample_rate=sample_rate,
+                # Binary başlık cümle zamanlarını taşıdığı için bu kodlamada zaman damgaları her zaman açıktır
+                timestamps=encoding == ENCODING_BINARY,
+                word_timestamps=word_timestamps
+            )
+        except ValueError as e:
+            log.warn("WebSocket connection rejected: unsupported audio format.", client=client_info, error=str(e))
+            await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA, reason=str(e)[:120])
+            return
+
+        send_message = _websocket_sender(websocket, client_info, encoding)
+
+        # Alma ve işleme ayrı görevlerdir: bir cümle çözülürken de soketten okunmaya devam edilir
+        ingest_queue = AudioIngestQueue(
+            audio_processor.input_bytes_per_second,
+            settings.STT_SERVICE_STREAM_MAX_BUFFER_SECONDS,
+            policy=settings.STT_SERVICE_STREAM_OVERLOAD_POLICY,
+            on_overload=send_message,
+            frame_bytes=audio_processor.input_frame_bytes
+        )
+
+        if session is not None:
+            session_manager.attach(session, audio_processor, ingest_queue)
+
+        async def receive_loop():
+            try:
+                while True:
+                    await ingest_queue.put(await websocket.receive_bytes())
+            except WebSocketDisconnect:
+                log.info("WebSocket client disconnected.", client=client_info)
+            except Exception as e:
+                log.error("Error while receiving audio from WebSocket.", client=client_info, error=str(e))
+            finally:
+                ingest_queue.close()
+
         async def transcribe_loop():
-            async for result in audio_processor.transcribe_stream(audio_chunk_generator()):
-                try:
-                    await websocket.send_json(result)
-                except (WebSocketDisconnect, ClientDisconnected, RuntimeError):
-                    log.warn("Could not send to a closed WebSocket. Client likely disconnected.", client=client_info)
-                    break 
+            async for result in audio_processor.transcribe_stream(ingest_queue.chunks()):
+                if not await send_message(result):
+                    break
 
+        receive_task = asyncio.create_task(receive_loop())
         transcribe_task = asyncio.create_task(transcribe_loop())
         await transcribe_task
 
     except asyncio.CancelledError:
         log.info("Transcription task was cancelled.", client=client_info)
+    except InferenceQueueFullError:
+        log.warn("Closing WebSocket: inference queue is full.", client=client_info)
+        try:
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Server is busy, please try again later.")
+        except (WebSocketDisconnect, ClientDisconnected, RuntimeError):
+            pass
     except Exception as e:
         log.error("Unexpected error in WebSocket handler.", client=client_info, error=str(e), exc_info=True)
     finally:
-        if transcribe_task and not transcribe_task.done():
-            transcribe_task.cancel()
+        if session is not None:
+            session_manager.unregister(session)
+        for task in (receive_task, transcribe_task):
+            if task and not task.done():
+                task.cancel()
         
+        if websocket.client_state.name == "CONNECTED":
+            # Boşta kaldığı için kapatılan oturumda istemciye nedeni bildirilir
+            reason = f"Session closed: {session.reclaimed}." if session is not None and session.reclaimed else None
+            try:
+                await websocket.close(code=status.WS_1000_NORMAL_CLOSURE, reason=reason)
+            except (WebSocketDisconnect, ClientDisconnected, RuntimeError):
+                pass
+        log.info("WebSocket connection resources cleaned up.", client=client_info)
+
+
+@router.websocket("/transcribe-stream-mux")
+async def websocket_multiplexed_transcription(websocket: WebSocket):
+    """
+    Birden çok ses akışını (ör. çağrı bacaklarını) tek bir WebSocket bağlantısı
+    üzerinden metne çevirir. Binary mesajlar 4 byte'lık (big-endian) akış
+    kimliğiyle başlar; akışlar JSON `open`/`close` kontrol mesajlarıyla açılıp
+    kapatılır. Her akış `/transcribe-stream` ile aynı seçenekleri (`open`
+    mesajının alanları olarak) kabul eder ve sonuçlar `stream_id` ile etiketlenir.
+    """
+    await websocket.accept()
+    client_info = f"{websocket.client.host}:{websocket.client.port}"
+    log.info("Multiplexed WebSocket connection established.", client=client_info)
+
+    executor = get_inference_executor(websocket)
+    if not get_adapter(websocket) or not executor:
+        log.warn("WebSocket connection rejected: model not ready.", client=client_info)
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Model is not ready, please try again in a moment.")
+        return
+
+    async def create_processor(options: dict) -> AudioProcessor:
+        adapter, _ = await _resolve_model_adapter(websocket, options.get("model"), settings.STT_SERVICE_STREAMING_MODEL)
+        language = options.get("language")
+        return AudioProcessor(
+            adapter=adapter,
+            executor=executor,
+            language=language.lower() if language and language.strip() else None,
+            logprob_threshold=options.get("logprob_threshold"),
+            no_speech_threshold=options.get("no_speech_threshold"),
+            scheduler=get_batch_scheduler(websocket),
+            partial_results=options.get("partial_results"),
+            codec=str(options.get("codec") or CODEC_PCM_S16LE).lower(),
+            sample_rate=int(options.get("sample_rate") or 16000)
+        )
+
+    session = MultiplexedSession(
+        _websocket_sender(websocket, client_info), create_processor, settings.STT_SERVICE_MUX_MAX_STREAMS,
+        session_manager=get_session_manager(websocket), client=client_info
+    )
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                log.info("WebSocket client disconnected.", client=client_info)
+                break
+            if message.get("bytes") is not None:
+                await session.feed(message["bytes"])
+            elif message.get("text") is not None:
+                await session.handle_control(message["text"])
+    except WebSocketDisconnect:
+        log.info("WebSocket client disconnected.", client=client_info)
+    except Exception as e:
+        log.error("Unexpected error in multiplexed WebSocket handler.", client=client_info, error=str(e), exc_info=True)
+    finally:
+        # Açık akışların kalan konuşmaları işlenir; istemci gittiyse gönderimler sessizce başarısız olur
+        await session.close()
         if websocket.client_state.name == "CONNECTED":
             try:
                 await websocket.close(code=status.WS_1000_NORMAL_CLOSURE)
             except (WebSocketDisconnect, ClientDisconnected, RuntimeError):
                 pass
-        log.info("WebSocket connection resources cleaned up.", client=client_info)
\ No newline at end of file
+        log.info("Multiplexed WebSocket connection resources cleaned up.", client=client_info)
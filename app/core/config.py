@@ -1,6 +1,6 @@
 # sentiric-stt-service/app/core/config.py
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from pydantic import Field
+from pydantic import Field, model_validator
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Sentiric STT Service"
@@ -18,20 +18,189 @@ class Settings(BaseSettings):
     STT_SERVICE_DEVICE: str = Field("cpu", validation_alias="STT_SERVICE_DEVICE")
     STT_SERVICE_COMPUTE_TYPE: str = Field("int8", validation_alias="STT_SERVICE_COMPUTE_TYPE")
     STT_SERVICE_TARGET_SAMPLE_RATE: int = Field(16000, validation_alias="STT_SERVICE_TARGET_SAMPLE_RATE")
+    # Önceden CTranslate2 formatına çevrilmiş yerel model dizini. Verilirse varsayılan model Hugging Face önbelleği yerine buradan yüklenir.
+    STT_SERVICE_MODEL_PATH: str = Field("", validation_alias="STT_SERVICE_MODEL_PATH")
+    # True ise model çözümlenirken Hugging Face'e hiç istek atılmaz; sadece yerel dosyalar kullanılır.
+    STT_SERVICE_MODEL_LOCAL_FILES_ONLY: bool = Field(False, validation_alias="STT_SERVICE_MODEL_LOCAL_FILES_ONLY")
+    # Model hazır ilan edilmeden önce çalıştırılacak ısınma çıkarımlarının ses uzunlukları (saniye, virgülle ayrılmış). Boşsa ısınma yapılmaz.
+    STT_SERVICE_WARMUP_DURATIONS: str = Field("1,5,15", validation_alias="STT_SERVICE_WARMUP_DURATIONS")
+
+    # --- Model Registry Settings ---
+    # STT_SERVICE_MODEL_SIZE/COMPUTE_TYPE ile yüklenen varsayılan modelin adı. Bu model bellekten hiç boşaltılmaz.
+    STT_SERVICE_DEFAULT_MODEL: str = Field("default", validation_alias="STT_SERVICE_DEFAULT_MODEL")
+    # İlk kullanımda yüklenecek ek model varyantları: "isim=model_boyutu:hesaplama_tipi[:bellek_mb]" (virgülle ayrılmış).
+    # Ör: "live=small:int8,archive=large-v3:int8"
+    STT_SERVICE_MODEL_VARIANTS: str = Field("", validation_alias="STT_SERVICE_MODEL_VARIANTS")
+    # İstekte `model` belirtilmediğinde WebSocket akışları (düşük gecikme) için kullanılacak varyant. Boşsa varsayılan model.
+    STT_SERVICE_STREAMING_MODEL: str = Field("", validation_alias="STT_SERVICE_STREAMING_MODEL")
+    # İstekte `model` belirtilmediğinde dosya transkripsiyonu (yüksek doğruluk) için kullanılacak varyant. Boşsa varsayılan model.
+    STT_SERVICE_FILE_MODEL: str = Field("", validation_alias="STT_SERVICE_FILE_MODEL")
+    # Yüklü modellerin toplam bellek bütçesi (MB). Aşılacaksa en uzun süredir kullanılmayan model boşaltılır. 0 ise sınırsız.
+    STT_SERVICE_MODEL_MEMORY_BUDGET_MB: int = Field(0, validation_alias="STT_SERVICE_MODEL_MEMORY_BUDGET_MB")
+
+    # --- FFmpeg Settings ---
+    # İşlem içi kod çözücülerin açamadığı dosyalar için aynı anda çalışabilecek maksimum ffmpeg süreci sayısı.
+    STT_SERVICE_FFMPEG_MAX_CONCURRENCY: int = Field(2, validation_alias="STT_SERVICE_FFMPEG_MAX_CONCURRENCY")
+    # Tek bir ffmpeg dönüşümü için izin verilen maksimum süre (saniye). Aşılırsa süreç öldürülür.
+    STT_SERVICE_FFMPEG_TIMEOUT_SECONDS: float = Field(120.0, validation_alias="STT_SERVICE_FFMPEG_TIMEOUT_SECONDS")
+
+    # --- Upload Settings ---
+    # Bir HTTP isteğinin gövdesi için maksimum boyut (MB). Gövde okunmadan (Content-Length) ya da okunurken aşılırsa 413 döner.
+    STT_SERVICE_MAX_UPLOAD_MB: int = Field(512, validation_alias="STT_SERVICE_MAX_UPLOAD_MB")
+    # Çözülen sesin izin verilen maksimum süresi (saniye). Aşılırsa 413 döner.
+    STT_SERVICE_MAX_AUDIO_DURATION_SECONDS: float = Field(4 * 3600.0, validation_alias="STT_SERVICE_MAX_AUDIO_DURATION_SECONDS")
+    # Çözülen PCM'in diske (memory-mapped geçici dosyaya) taşmadan önce bellekte tutulacağı maksimum boyut (MB).
+    STT_SERVICE_UPLOAD_SPOOL_MB: int = Field(16, validation_alias="STT_SERVICE_UPLOAD_SPOOL_MB")
+    # /transcribe-batch isteğinin tamamında (arşivlerin içindekiler dahil) izin verilen maksimum dosya sayısı.
+    STT_SERVICE_BATCH_MAX_FILES: int = Field(500, validation_alias="STT_SERVICE_BATCH_MAX_FILES")
+    # Uzun dosyalar modele bu uzunlukta (saniye) pencereler halinde verilir; böylece float32 kopya tüm kayıt için oluşturulmaz.
+    STT_SERVICE_FILE_WINDOW_SECONDS: int = Field(300, validation_alias="STT_SERVICE_FILE_WINDOW_SECONDS")
+    # Uzun dosyaların sessizlik noktalarından parçalara bölünüp inference havuzunda paralel işlenmesini etkinleştirir.
+    STT_SERVICE_LONG_FILE_CHUNKING_ENABLED: bool = Field(True, validation_alias="STT_SERVICE_LONG_FILE_CHUNKING_ENABLED")
+    # Parçalı işlemenin devreye girdiği minimum ses süresi (saniye).
+    STT_SERVICE_LONG_FILE_MIN_SECONDS: float = Field(60.0, validation_alias="STT_SERVICE_LONG_FILE_MIN_SECONDS")
+    # Bir parçanın maksimum uzunluğu (saniye). Whisper'ın 30 saniyelik penceresine sığması verimlidir.
+    STT_SERVICE_LONG_FILE_CHUNK_SECONDS: float = Field(30.0, validation_alias="STT_SERVICE_LONG_FILE_CHUNK_SECONDS")
+    # Parçaların bölünebileceği minimum sessizlik süresi (ms).
+    STT_SERVICE_LONG_FILE_MIN_SILENCE_MS: int = Field(300, validation_alias="STT_SERVICE_LONG_FILE_MIN_SILENCE_MS")
+
+    # --- Result Cache Settings ---
+    # Aynı ses ve parametrelerle tekrar gönderilen dosyaların sonucunu önbellekten döndürür.
+    STT_SERVICE_CACHE_ENABLED: bool = Field(True, validation_alias="STT_SERVICE_CACHE_ENABLED")
+    # Bellekteki önbelleğin maksimum boyutu (MB). Aşılırsa en uzun süredir kullanılmayan sonuçlar silinir.
+    STT_SERVICE_CACHE_MAX_MB: int = Field(64, validation_alias="STT_SERVICE_CACHE_MAX_MB")
+    # Sonuçların yeniden başlatmalardan sonra da korunacağı disk dizini. Boş bırakılırsa disk katmanı kapalıdır.
+    STT_SERVICE_CACHE_DIR: str = Field("", validation_alias="STT_SERVICE_CACHE_DIR")
+
+    # --- Async Job Settings ---
+    # Uzun kayıtlar için gönder/sorgula/sonuç al (/jobs) API'sini açar/kapatır.
+    STT_SERVICE_JOBS_ENABLED: bool = Field(True, validation_alias="STT_SERVICE_JOBS_ENABLED")
+    # İş kuyruğu veritabanının (SQLite) ve bekleyen seslerin tutulduğu dizin. Boş bırakılırsa geçici dizin kullanılır.
+    STT_SERVICE_JOBS_DIR: str = Field("", validation_alias="STT_SERVICE_JOBS_DIR")
+    # Aynı anda işlenebilecek iş sayısı. İşler toplamda en fazla INFERENCE_WORKERS - 1 çıkarım iş parçacığı kullanır; tek iş parçacığı varsa etkileşimli istek beklerken duraklar.
+    STT_SERVICE_JOBS_WORKERS: int = Field(1, validation_alias="STT_SERVICE_JOBS_WORKERS")
+    # Kuyrukta bekleyebilecek maksimum iş sayısı. Dolduğunda yeni işler reddedilir (429).
+    STT_SERVICE_JOBS_MAX_QUEUED: int = Field(100, validation_alias="STT_SERVICE_JOBS_MAX_QUEUED")
+    # Tamamlanan/başarısız işlerin sonuçlarının saklanacağı süre (saniye).
+    STT_SERVICE_JOBS_RETENTION_SECONDS: int = Field(86400, validation_alias="STT_SERVICE_JOBS_RETENTION_SECONDS")
+    # İş bittiğinde durumunun POST edileceği adres (ör. http://localhost:8080/stt-callback). Boş bırakılırsa kapalıdır.
+    STT_SERVICE_JOBS_CALLBACK_URL: str = Field("", validation_alias="STT_SERVICE_JOBS_CALLBACK_URL")
+    # Geri çağrı isteğinin zaman aşımı (saniye).
+    STT_SERVICE_JOBS_CALLBACK_TIMEOUT_SECONDS: float = Field(10.0, validation_alias="STT_SERVICE_JOBS_CALLBACK_TIMEOUT_SECONDS")
 
     # --- Whisper Filtering Settings ---
     STT_SERVICE_LOGPROB_THRESHOLD: float = Field(-1.0, validation_alias="STT_SERVICE_LOGPROB_THRESHOLD")
     STT_SERVICE_NO_SPEECH_THRESHOLD: float = Field(0.75, validation_alias="STT_SERVICE_NO_SPEECH_THRESHOLD")
+
+    # --- Adaptive Decoding Settings ---
+    # Her ses önce bu ışın genişliğiyle (1 = greedy) çözülür; akış (WebSocket) ve dosya yolları için ayrı ayarlanır.
+    STT_SERVICE_STREAMING_BEAM_SIZE: int = Field(1, validation_alias="STT_SERVICE_STREAMING_BEAM_SIZE")
+    STT_SERVICE_FILE_BEAM_SIZE: int = Field(1, validation_alias="STT_SERVICE_FILE_BEAM_SIZE")
+    # İlk sonuçta güvensiz bir segment varsa o segmentin penceresi bu ışın genişliğiyle (ve gerekirse sıcaklık yedeğiyle) yeniden çözülür.
+    # İlk ışın genişliğine eşit ya da küçükse yeniden çözümleme kapalıdır.
+    STT_SERVICE_STREAMING_FALLBACK_BEAM_SIZE: int = Field(5, validation_alias="STT_SERVICE_STREAMING_FALLBACK_BEAM_SIZE")
+    STT_SERVICE_FILE_FALLBACK_BEAM_SIZE: int = Field(5, validation_alias="STT_SERVICE_FILE_FALLBACK_BEAM_SIZE")
+    # Bir segmentin ortalama log olasılığı bu değerin altındaysa yeniden çözümleme tetiklenir.
+    # Dosyalarda doğruluk gecikmeden önemli olduğu için eşik daha sıkıdır.
+    STT_SERVICE_STREAMING_FALLBACK_LOGPROB: float = Field(-0.8, validation_alias="STT_SERVICE_STREAMING_FALLBACK_LOGPROB")
+    STT_SERVICE_FILE_FALLBACK_LOGPROB: float = Field(-0.5, validation_alias="STT_SERVICE_FILE_FALLBACK_LOGPROB")
+    # Sıkıştırma oranı bu değeri aşan (kendini tekrar eden, greedy çözümlemede sık görülen) segmentler de yeniden çözülür.
+    STT_SERVICE_FALLBACK_COMPRESSION_RATIO: float = Field(2.4, validation_alias="STT_SERVICE_FALLBACK_COMPRESSION_RATIO")
     
     # --- VAD (Voice Activity Detection) Settings ---
-    # VAD'ın ne kadar agresif olacağını belirler (0-3 arası). 3 en agresif olanıdır.
+    # Kullanılacak VAD motoru: "webrtc" (frame başına webrtcvad çağrısı) veya
+    # "energy" (bir parçadaki tüm frame'leri tek seferde sınıflandıran NumPy motoru).
+    STT_SERVICE_VAD_ENGINE: str = Field("webrtc", validation_alias="STT_SERVICE_VAD_ENGINE")
+    # VAD'ın ne kadar agresif olacağını belirler (0-3 arası). 3 en agresif olanıdır. Sadece webrtc motoru için.
     STT_SERVICE_VAD_AGGRESSIVENESS: int = Field(3, validation_alias="STT_SERVICE_VAD_AGGRESSIVENESS")
+    # "energy" motoru: konuşmanın başlaması için enerjinin gürültü tabanını aşması gereken miktar (dB).
+    STT_SERVICE_VAD_ENERGY_ON_DB: float = Field(15.0, validation_alias="STT_SERVICE_VAD_ENERGY_ON_DB")
+    # "energy" motoru: başlamış konuşmanın devam etmesi için gereken, tabanın üzerindeki enerji (dB).
+    STT_SERVICE_VAD_ENERGY_OFF_DB: float = Field(8.0, validation_alias="STT_SERVICE_VAD_ENERGY_OFF_DB")
+    # "energy" motoru: gürültü tabanı ne kadar düşük olursa olsun konuşma başlangıcı için gereken en düşük seviye (dBFS).
+    STT_SERVICE_VAD_ENERGY_MIN_DBFS: float = Field(-50.0, validation_alias="STT_SERVICE_VAD_ENERGY_MIN_DBFS")
     # VAD'ın bir cümlenin bittiğini kabul etmesi için gereken minimum sessizlik süresi (ms).
     STT_SERVICE_VAD_END_OF_SPEECH_MS: int = Field(700, validation_alias="STT_SERVICE_VAD_END_OF_SPEECH_MS")
     # İşleme alınacak minimum konuşma süresi (ms). Bundan kısa sesler gürültü kabul edilir.
     STT_SERVICE_VAD_MIN_SPEECH_MS: int = Field(250, validation_alias="STT_SERVICE_VAD_MIN_SPEECH_MS")
     # VAD'ın daha uzun sessizliklerde tetikte kalmasını sağlayan periyodik kontrol süresi (ms).
     STT_SERVICE_VAD_PADDING_MS: int = Field(300, validation_alias="STT_SERVICE_VAD_PADDING_MS")
+    # Bir cümlenin (utterance) maksimum süresi (saniye). VAD sessizlik bulamasa da (arka plan müziği,
+    # takılı hat) cümle bu sürede en sessiz noktadan bölünüp işlenir. 0 ise sınır yoktur.
+    STT_SERVICE_VAD_MAX_UTTERANCE_SECONDS: float = Field(15.0, validation_alias="STT_SERVICE_VAD_MAX_UTTERANCE_SECONDS")
+    # Bölme noktasının aranacağı, sınırdan geriye doğru süre (ms). Bu aralıktaki en düşük enerjili frame'den bölünür.
+    STT_SERVICE_VAD_SPLIT_SEARCH_MS: int = Field(3000, validation_alias="STT_SERVICE_VAD_SPLIT_SEARCH_MS")
+    # Bölme noktasından önceki bu kadar ses (ms) bir sonraki parçaya da verilir; böylece kesilen kelimeler kaybolmaz.
+    STT_SERVICE_VAD_SPLIT_OVERLAP_MS: int = Field(300, validation_alias="STT_SERVICE_VAD_SPLIT_OVERLAP_MS")
+
+    # --- Stream Ingestion Settings ---
+    # Çıkarım geride kaldığında bir akış oturumunda işlenmeyi bekleyebilecek maksimum alınmış ses süresi (saniye).
+    STT_SERVICE_STREAM_MAX_BUFFER_SECONDS: float = Field(10.0, validation_alias="STT_SERVICE_STREAM_MAX_BUFFER_SECONDS")
+    # Tampon dolduğunda uygulanacak politika: "drop_oldest" (en eski sesi at, alım gerçek zamanlı kalır) veya
+    # "backpressure" (tamponda yer açılana kadar soketten okumayı durdur). Her ikisinde de istemciye {"type": "overload"} gönderilir.
+    STT_SERVICE_STREAM_OVERLOAD_POLICY: str = Field("drop_oldest", validation_alias="STT_SERVICE_STREAM_OVERLOAD_POLICY")
+    # Çoklu akış (/transcribe-stream-mux) bağlantısında aynı anda açık olabilecek maksimum akış sayısı.
+    STT_SERVICE_MUX_MAX_STREAMS: int = Field(256, validation_alias="STT_SERVICE_MUX_MAX_STREAMS")
+
+    # --- Streaming Session Settings ---
+    # Bu süreç (process) üzerinde aynı anda açık olabilecek maksimum akış oturumu sayısı (çoklu akış bağlantılarındaki
+    # her akış bir oturumdur). Aşıldığında yeni bağlantılar 1013 (Try Again Later) ile reddedilir. 0 ise sınır yoktur.
+    STT_SERVICE_MAX_STREAMING_SESSIONS: int = Field(200, validation_alias="STT_SERVICE_MAX_STREAMING_SESSIONS")
+    # Bu kadar saniye hiç ses almayan (ör. yarı açık kalmış) oturumun alımı kapatılır. 0 ise kapalıdır.
+    STT_SERVICE_SESSION_IDLE_TIMEOUT_SECONDS: float = Field(30.0, validation_alias="STT_SERVICE_SESSION_IDLE_TIMEOUT_SECONDS")
+    # Ses gelse de bu kadar saniye konuşma içermeyen (ör. takılı hat) oturumun alımı kapatılır. 0 ise kapalıdır.
+    STT_SERVICE_SESSION_NO_SPEECH_TIMEOUT_SECONDS: float = Field(300.0, validation_alias="STT_SERVICE_SESSION_NO_SPEECH_TIMEOUT_SECONDS")
+    # Boşta kalan oturumların aranma ve oturum metriklerinin güncellenme aralığı (saniye).
+    STT_SERVICE_SESSION_SWEEP_INTERVAL_SECONDS: float = Field(5.0, validation_alias="STT_SERVICE_SESSION_SWEEP_INTERVAL_SECONDS")
+
+    # --- Partial (Interim) Result Settings ---
+    # Konuşma devam ederken ara sonuç ({"type": "partial"}) gönderilmesini varsayılan olarak açar.
+    # WebSocket'te `partial_results` parametresi ile oturum bazında değiştirilebilir.
+    STT_SERVICE_PARTIAL_RESULTS_ENABLED: bool = Field(False, validation_alias="STT_SERVICE_PARTIAL_RESULTS_ENABLED")
+    # İki ara sonuç arasındaki minimum konuşma süresi (ms).
+    STT_SERVICE_PARTIAL_INTERVAL_MS: int = Field(1000, validation_alias="STT_SERVICE_PARTIAL_INTERVAL_MS")
+    # Ara sonuçların çözümüne harcanabilecek sürenin, ara sonuç aralığına oranı (0-1). Aşılırsa aralık uzatılır.
+    STT_SERVICE_PARTIAL_CPU_BUDGET: float = Field(0.5, validation_alias="STT_SERVICE_PARTIAL_CPU_BUDGET")
+    # Çıkarım kuyruğunun doluluk oranı (0-1) bu değere ulaştığında ara sonuçlar atlanır.
+    STT_SERVICE_PARTIAL_MAX_QUEUE_LOAD: float = Field(0.5, validation_alias="STT_SERVICE_PARTIAL_MAX_QUEUE_LOAD")
+
+    # --- Language Pinning Settings ---
+    # Dil belirtilmeden açılan akış oturumlarında, dil yeterince güvenle tespit edildikten sonra oturumun
+    # geri kalanı için sabitlenir; böylece her cümlede dil tespiti tekrarlanmaz.
+    STT_SERVICE_LANGUAGE_PINNING_ENABLED: bool = Field(True, validation_alias="STT_SERVICE_LANGUAGE_PINNING_ENABLED")
+    # Dilin sabitlenmesi için tespit olasılığının ulaşması gereken minimum değer (0-1).
+    STT_SERVICE_LANGUAGE_PIN_MIN_PROBABILITY: float = Field(0.8, validation_alias="STT_SERVICE_LANGUAGE_PIN_MIN_PROBABILITY")
+    # Dil tespitine güvenilecek minimum cümle süresi (saniye). Kısa cümlelerde ("evet", "alo") tespit güvenilmezdir.
+    STT_SERVICE_LANGUAGE_PIN_MIN_SECONDS: float = Field(2.0, validation_alias="STT_SERVICE_LANGUAGE_PIN_MIN_SECONDS")
+    # Sabitlenen dilin, akışın bu kadar saniyesi geçtikten sonraki ilk cümlede yeniden tespit edilmesini sağlar. 0 ise kapalıdır.
+    STT_SERVICE_LANGUAGE_REDETECT_SECONDS: float = Field(0.0, validation_alias="STT_SERVICE_LANGUAGE_REDETECT_SECONDS")
+
+    # --- Inference Executor Settings ---
+    # Model çıkarımını (inference) event loop dışında çalıştıran iş parçacığı sayısı.
+    STT_SERVICE_INFERENCE_WORKERS: int = Field(1, validation_alias="STT_SERVICE_INFERENCE_WORKERS")
+    # Tüm iş parçacıkları meşgulken sırada bekleyebilecek maksimum istek sayısı. Dolduğunda istek reddedilir (429/1013).
+    STT_SERVICE_INFERENCE_QUEUE_SIZE: int = Field(8, validation_alias="STT_SERVICE_INFERENCE_QUEUE_SIZE")
+    # Tek bir çıkarım isteğinin (kuyrukta bekleme dahil) sürebileceği maksimum süre (saniye).
+    STT_SERVICE_INFERENCE_TIMEOUT_SECONDS: float = Field(120.0, validation_alias="STT_SERVICE_INFERENCE_TIMEOUT_SECONDS")
+
+    # --- Streaming Batching Settings ---
+    # Farklı akış oturumlarından gelen cümlelerin tek bir model çağrısında toplu işlenmesini açar/kapatır.
+    STT_SERVICE_BATCHING_ENABLED: bool = Field(True, validation_alias="STT_SERVICE_BATCHING_ENABLED")
+    # Bir partinin gönderilmeden önce yeni cümleler için bekleyeceği maksimum süre (ms).
+    STT_SERVICE_BATCH_WINDOW_MS: int = Field(30, validation_alias="STT_SERVICE_BATCH_WINDOW_MS")
+    # Bir partideki maksimum cümle sayısı. Bu sayıya ulaşıldığında pencere beklenmeden gönderilir.
+    STT_SERVICE_BATCH_MAX_SIZE: int = Field(8, validation_alias="STT_SERVICE_BATCH_MAX_SIZE")
+
+    @model_validator(mode="after")
+    def _check_utterance_split(self) -> "Settings":
+        # Örtüşme çıkarıldıktan sonra bölme noktası tamponun başından ileride kalmalıdır; aksi halde bölme ilerlemez
+        max_utterance_ms = self.STT_SERVICE_VAD_MAX_UTTERANCE_SECONDS * 1000
+        if max_utterance_ms > 0 and self.STT_SERVICE_VAD_SPLIT_SEARCH_MS + self.STT_SERVICE_VAD_SPLIT_OVERLAP_MS >= max_utterance_ms:
+            raise ValueError(
+                "STT_SERVICE_VAD_SPLIT_SEARCH_MS + STT_SERVICE_VAD_SPLIT_OVERLAP_MS must be shorter than "
+                "STT_SERVICE_VAD_MAX_UTTERANCE_SECONDS."
+            )
+        return self
 
     model_config = SettingsConfigDict(
         extra='ignore',
@@ -0,0 +1,128 @@
+# sentiric-stt-service/app/core/metrics.py
+# Servise özgü Prometheus metrikleri. Varsayılan registry'e kaydedilirler ve
+# Instrumentator'ın /metrics endpoint'i üzerinden HTTP metrikleriyle birlikte yayınlanırlar.
+from prometheus_client import Counter, Gauge, Histogram
+
+TRANSCRIPTION_CACHE_REQUESTS = Counter(
+    "stt_transcription_cache_requests_total",
+    "Transkripsiyon sonuç önbelleği sorguları.",
+    ["result"]  # hit, miss, bypass
+)
+
+STARTUP_PHASE_SECONDS = Gauge(
+    "stt_startup_phase_seconds",
+    "Başlatma aşamalarının süresi (saniye).",
+    ["phase", "model"]  # load, warmup, total
+)
+
+# --- Aşama gecikmeleri ---
+
+AUDIO_DECODE_SECONDS = Histogram(
+    "stt_audio_decode_seconds",
+    "Sesin çözülüp hedef örnekleme hızına dönüştürülme süresi (saniye).",
+    ["decoder"]  # pcm_wav, soundfile, pyav, ffmpeg, stream
+)
+
+VAD_PROCESSING_SECONDS = Histogram(
+    "stt_vad_processing_seconds",
+    "Bir akış parçasının VAD'dan geçirilme süresi (saniye).",
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05)
+)
+
+INFERENCE_QUEUE_WAIT_SECONDS = Histogram(
+    "stt_inference_queue_wait_seconds",
+    "Çıkarım çağrılarının bir iş parçacığı boşalana kadar kuyrukta bekleme süresi (saniye).",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+
+INFERENCE_SECONDS = Histogram(
+    "stt_inference_seconds",
+    "Model çıkarımının süresi (saniye).",
+    ["adapter", "model"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+)
+
+REAL_TIME_FACTOR = Histogram(
+    "stt_real_time_factor",
+    "Çıkarım süresinin işlenen ses süresine oranı (1'den küçükse gerçek zamandan hızlı).",
+    ["adapter", "model"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 5)
+)
+
+# --- Anlık durum ---
+
+ACTIVE_STREAMING_SESSIONS = Gauge(
+    "stt_active_streaming_sessions",
+    "Açık WebSocket transkripsiyon oturumu sayısı."
+)
+
+BUFFERED_SPEECH_SECONDS = Gauge(
+    "stt_buffered_speech_seconds",
+    "Tüm akış oturumlarında henüz modele verilmemiş biriken konuşma süresi (saniye)."
+)
+
+INFERENCE_QUEUE_DEPTH = Gauge(
+    "stt_inference_queue_depth",
+    "Bir iş parçacığı boşalmasını bekleyen çıkarım çağrısı sayısı."
+)
+
+STREAMING_SESSION_LIMIT = Gauge(
+    "stt_streaming_session_limit",
+    "İzin verilen maksimum eşzamanlı akış oturumu sayısı (0 ise sınırsız)."
+)
+
+STREAM_INGEST_BUFFERED_SECONDS = Gauge(
+    "stt_stream_ingest_buffered_seconds",
+    "Tüm akış oturumlarında alınmış ama henüz işlenmemiş ses süresi (saniye)."
+)
+
+STREAM_SESSIONS_REJECTED = Counter(
+    "stt_stream_sessions_rejected_total",
+    "Maksimum oturum sayısına ulaşıldığı için reddedilen akış oturumu sayısı."
+)
+
+STREAM_SESSIONS_RECLAIMED = Counter(
+    "stt_stream_sessions_reclaimed_total",
+    "Boşta kaldığı için sunucu tarafından kapatılan akış oturumu sayısı.",
+    ["reason"]  # idle, no_speech
+)
+
+STREAM_OVERLOADS = Counter(
+    "stt_stream_overloads_total",
+    "Çıkarım geride kaldığı için alınan sesin tamponu dolan akış oturumu sayısı (aşırı yük başına bir kez).",
+    ["policy"]  # drop_oldest, backpressure
+)
+
+STREAM_DROPPED_AUDIO_SECONDS = Counter(
+    "stt_stream_dropped_audio_seconds_total",
+    "drop_oldest politikasıyla işlenmeden atılan akış sesi (saniye)."
+)
+
+FORCED_UTTERANCE_SPLITS = Counter(
+    "stt_forced_utterance_splits_total",
+    "Maksimum cümle süresine ulaşıldığı için sessizlik beklenmeden bölünen cümle sayısı."
+)
+
+REJECTED_SEGMENTS = Counter(
+    "stt_rejected_segments_total",
+    "Güven eşiklerini geçemediği için atılan segmentler.",
+    ["model", "reason"]  # low_logprob, no_speech
+)
+
+DECODING_PASSES = Counter(
+    "stt_decoding_passes_total",
+    "Uyarlamalı çözümlemenin ilk (hızlı) geçişinden geçen ses sayısı.",
+    ["model", "tier"]  # streaming, file
+)
+
+DECODING_FALLBACKS = Counter(
+    "stt_decoding_fallbacks_total",
+    "İlk geçişin sonucu güvensiz bulunduğu için daha geniş ışınla yeniden çözülen ses sayısı.",
+    ["model", "tier", "reason"]  # low_logprob, compression_ratio
+)
+
+
+def observe_inference(adapter: str, model: str, audio_seconds: float, elapsed_seconds: float) -> None:
+    INFERENCE_SECONDS.labels(adapter=adapter, model=model).observe(elapsed_seconds)
+    if audio_seconds > 0:
+        REAL_TIME_FACTOR.labels(adapter=adapter, model=model).observe(elapsed_seconds / audio_seconds)
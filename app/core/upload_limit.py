@@ -0,0 +1,86 @@
+# sentiric-stt-service/app/core/upload_limit.py
+import json
+import structlog
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+log = structlog.get_logger(__name__)
+
+
+class RequestTooLargeError(Exception):
+    """İstek gövdesi okunurken boyut sınırı aşıldığında fırlatılır."""
+
+
+class UploadSizeLimitMiddleware:
+    """
+    HTTP istek gövdesini, Starlette form ayrıştırıcısı onu geçici dosyaya
+    yazmadan önce sınırlar. `Content-Length` sınırı aşıyorsa istek gövde hiç
+    okunmadan 413 ile reddedilir; başlık yoksa (chunked) ya da yanlışsa okunan
+    byte'lar sayılır ve sınır aşıldığı anda okuma kesilir.
+    """
+
+    def __init__(self, app: ASGIApp, max_body_bytes: int):
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.max_body_bytes <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = self._content_length(scope)
+        if content_length is not None and content_length > self.max_body_bytes:
+            log.warn("Request body exceeds the upload limit.", path=scope.get("path"), size_bytes=content_length)
+            await self._reject(send)
+            return
+
+        received = 0
+        exceeded = False
+        rejected = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_bytes:
+                    exceeded = True
+                    raise RequestTooLargeError()
+            return message
+
+        async def limited_send(message: Message) -> None:
+            nonlocal rejected
+            if not exceeded:
+                await send(message)
+            elif not rejected and message["type"] == "http.response.start":
+                # Uygulamanın ürettiği hata yanıtı (ör. form ayrıştırma hatası için 400) 413 ile değiştirilir
+                rejected = True
+                await self._reject(send)
+
+        try:
+            await self.app(scope, limited_receive, limited_send)
+        except RequestTooLargeError:
+            pass
+        if exceeded:
+            log.warn("Request body exceeded the upload limit while streaming.", path=scope.get("path"), size_bytes=received)
+            if not rejected:
+                await self._reject(send)
+
+    @staticmethod
+    def _content_length(scope: Scope):
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                try:
+                    return int(value)
+                except ValueError:
+                    return None
+        return None
+
+    @staticmethod
+    async def _reject(send: Send) -> None:
+        body = json.dumps({"detail": "Request is too large."}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
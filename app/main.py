@@ -14,7 +14,12 @@ from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 from app.api.v1.endpoints import router as api_v1_router
 from app.core.config import settings
 from app.core.logging import setup_logging
+from app.core.upload_limit import UploadSizeLimitMiddleware
 from app.services import stt_service
+from app.services.batching_service import create_batch_scheduler
+from app.services.cache_service import create_transcription_cache
+from app.services.job_service import create_job_manager
+from app.services.session_service import create_session_manager
 
 SERVICE_NAME = "stt-service"
 
@@ -47,17 +52,32 @@ async def lifespan(app: FastAPI):
     
     app.state.model_ready = False
     app.state.stt_adapter = None
+    app.state.inference_executor = stt_service.create_inference_executor()
+    app.state.batch_scheduler = create_batch_scheduler(app.state.inference_executor)
+    app.state.transcription_cache = create_transcription_cache()
+    app.state.job_manager = create_job_manager()
+    app.state.session_manager = create_session_manager()
+    app.state.session_manager.start()
     
     loop = asyncio.get_event_loop()
     loop.create_task(stt_service.load_and_set_adapter(app))
+    # İşler model hazır olana kadar kuyrukta bekler
+    if app.state.job_manager is not None:
+        app.state.job_manager.start(app.state)
     
     yield
     log.info("Application shutting down.")
+    await app.state.session_manager.stop()
+    if app.state.job_manager is not None:
+        await app.state.job_manager.stop()
+    app.state.inference_executor.shutdown()
 
 app = FastAPI(title=settings.PROJECT_NAME, version=settings.SERVICE_VERSION, lifespan=lifespan)
 log = structlog.get_logger(__name__)
 
 app.add_middleware(ProxyHeadersMiddleware, trusted_hosts="*")
+# Yüklemeler form ayrıştırılıp diske yazılmadan önce boyut sınırına göre reddedilir
+app.add_middleware(UploadSizeLimitMiddleware, max_body_bytes=settings.STT_SERVICE_MAX_UPLOAD_MB * 1024 * 1024)
 
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 templates = Jinja2Templates(directory="app/templates")
@@ -1,5 +1,77 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+
+# Çözümleme (decoding) katmanları: adaptörler hız/doğruluk dengesini çağrının
+# geldiği yola göre seçebilir (ör. akışta daha dar ışın, dosyada daha sıkı yedek eşiği)
+DECODING_TIER_STREAMING = "streaming"
+DECODING_TIER_FILE = "file"
+
+
+@dataclass
+class TranscriptionRequest:
+    """Toplu (batch) transkripsiyondaki tek bir öğe."""
+    audio: np.ndarray
+    language: Optional[str] = None
+    logprob_threshold: Optional[float] = None
+    no_speech_threshold: Optional[float] = None
+    tier: str = DECODING_TIER_FILE
+
+
+@dataclass
+class TranscriptionWord:
+    """Kelime düzeyinde zaman damgası (saniye) ve modelin kelimeye verdiği olasılık."""
+    start: float
+    end: float
+    word: str
+    probability: float
+
+
+@dataclass
+class TranscriptionSegment:
+    """Transkripsiyonun, sesin başına göre saniye cinsinden konumlandırılmış bir parçası."""
+    start: float
+    end: float
+    text: str
+    # Segmentin ortalama token olasılığı (exp(avg_logprob)); adaptör vermiyorsa None
+    confidence: Optional[float] = None
+    # Sadece kelime zaman damgaları istendiğinde doldurulur
+    words: List[TranscriptionWord] = field(default_factory=list)
+
+    def __post_init__(self):
+        # JSON'dan (önbellek, iş kuyruğu) geri yüklenen kelimeler sözlük olarak gelir
+        self.words = [TranscriptionWord(**word) if isinstance(word, dict) else word for word in self.words]
+
+
+@dataclass
+class TranscriptionResult:
+    text: str
+    segments: List[TranscriptionSegment] = field(default_factory=list)
+    # Model dili kendisi tespit ettiyse tespit edilen dil ve olasılığı; dil verildiyse ya da adaptör desteklemiyorsa None
+    language: Optional[str] = None
+    language_probability: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        """
+        JSON'a uygun sözlük. Kelime listesi boşsa ve güven skoru bilinmiyorsa bu
+        alanlar yazılmaz; böylece API yanıtları ve önbellek kayıtları sadece
+        istenen ayrıntıyı taşır.
+        """
+        segments = []
+        for segment in self.segments:
+            item = {"start": segment.start, "end": segment.end, "text": segment.text}
+            if segment.confidence is not None:
+                item["confidence"] = segment.confidence
+            if segment.words:
+                item["words"] = [asdict(word) for word in segment.words]
+            segments.append(item)
+        return {"text": self.text, "segments": segments}
+
 
 class BaseSTTAdapter(ABC):
     """
@@ -19,4 +91,56 @@ class BaseSTTAdapter(ABC):
         Returns:
             Transkripsiyon sonucu olan metin.
         """
-        pass
\ No newline at end of file
+        pass
+
+    def transcribe_batch(self, requests: List[TranscriptionRequest]) -> List[str]:
+        """
+        Birden fazla sesi tek çağrıda metne çevirir. Varsayılan uygulama öğeleri
+        sırayla `transcribe` ile işler; toplu çıkarımı destekleyen adaptörler
+        bu metodu ezmelidir.
+
+        Returns:
+            Her istek için, aynı sırada, transkripsiyon metni.
+        """
+        return [
+            self.transcribe(
+                request.audio,
+                request.language,
+                logprob_threshold=request.logprob_threshold,
+                no_speech_threshold=request.no_speech_threshold,
+                tier=request.tier
+            )
+            for request in requests
+        ]
+
+    def transcribe_detailed(
+        self,
+        audio: np.ndarray,
+        language: Optional[str] = None,
+        logprob_threshold: Optional[float] = None,
+        no_speech_threshold: Optional[float] = None,
+        word_timestamps: bool = False,
+        tier: str = DECODING_TIER_FILE
+    ) -> TranscriptionResult:
+        """
+        Metnin yanında zaman damgalı segmentleri de döndürür. Varsayılan
+        uygulama, segment bilgisi vermeyen adaptörler için tüm sesi kapsayan
+        tek bir segment üretir; `word_timestamps` desteklenmiyorsa yok sayılır.
+        """
+        text = self.transcribe(
+            audio,
+            language,
+            logprob_threshold=logprob_threshold,
+            no_speech_threshold=no_speech_threshold,
+            tier=tier
+        )
+        duration = len(audio) / settings.STT_SERVICE_TARGET_SAMPLE_RATE
+        segments = [TranscriptionSegment(start=0.0, end=duration, text=text)] if text else []
+        return TranscriptionResult(text=text, segments=segments)
+
+    def detect_language(self, audio: np.ndarray) -> Tuple[Optional[str], Optional[float]]:
+        """
+        Sesin dilini metne çevirmeden tespit eder ve (dil, olasılık) döndürür.
+        Dil tespiti yapamayan adaptörler için varsayılan uygulama (None, None) döner.
+        """
+        return None, None
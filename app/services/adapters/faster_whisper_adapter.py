@@ -1,32 +1,97 @@
 from faster_whisper import WhisperModel
+from faster_whisper.audio import decode_audio, pad_or_trim
+from faster_whisper.tokenizer import Tokenizer
+from faster_whisper.transcribe import get_compression_ratio, get_suppressed_tokens
 from app.core.config import settings
+from app.core.metrics import DECODING_FALLBACKS, DECODING_PASSES, REJECTED_SEGMENTS, observe_inference
 import structlog
 import io
+import math
+import time
 import numpy as np
-from .base import BaseSTTAdapter
-from typing import Optional, Union
+from dataclasses import dataclass
+from .base import (
+    DECODING_TIER_FILE, DECODING_TIER_STREAMING, BaseSTTAdapter, TranscriptionRequest, TranscriptionResult,
+    TranscriptionSegment, TranscriptionWord
+)
+from typing import List, Optional, Tuple, Union
 
 log = structlog.get_logger(__name__)
 
+# Whisper kodlayıcısının tek seferde işleyebildiği maksimum ses uzunluğu (saniye)
+MAX_BATCH_ITEM_SECONDS = 30
+# Geniş ışınlı geçiş de güvensiz kalırsa faster-whisper'ın pencere bazında denediği sıcaklıklar
+FALLBACK_TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+
+@dataclass(frozen=True)
+class DecodingPolicy:
+    """
+    Uyarlamalı çözümleme ayarları. Ses önce `beam_size` ile (varsayılan greedy)
+    çözülür; bir segment `fallback_logprob_threshold` altında kalırsa ya da
+    `fallback_compression_ratio` üzerinde tekrar ediyorsa sadece o segmentin
+    penceresi `fallback_beam_size` ile yeniden çözülür.
+    """
+    beam_size: int
+    fallback_beam_size: int
+    fallback_logprob_threshold: float
+    fallback_compression_ratio: float
+
+    @property
+    def fallback_enabled(self) -> bool:
+        return self.fallback_beam_size > self.beam_size
+
+    def fallback_reason(self, avg_logprob: float, compression_ratio: float) -> Optional[str]:
+        if compression_ratio > self.fallback_compression_ratio:
+            return "compression_ratio"
+        if avg_logprob < self.fallback_logprob_threshold:
+            return "low_logprob"
+        return None
+
+
+def decoding_policy(tier: str) -> DecodingPolicy:
+    """Çağrının geldiği yol (akış ya da dosya) için ayarlardaki çözümleme politikasını döner."""
+    if tier == DECODING_TIER_STREAMING:
+        return DecodingPolicy(
+            beam_size=settings.STT_SERVICE_STREAMING_BEAM_SIZE,
+            fallback_beam_size=settings.STT_SERVICE_STREAMING_FALLBACK_BEAM_SIZE,
+            fallback_logprob_threshold=settings.STT_SERVICE_STREAMING_FALLBACK_LOGPROB,
+            fallback_compression_ratio=settings.STT_SERVICE_FALLBACK_COMPRESSION_RATIO
+        )
+    return DecodingPolicy(
+        beam_size=settings.STT_SERVICE_FILE_BEAM_SIZE,
+        fallback_beam_size=settings.STT_SERVICE_FILE_FALLBACK_BEAM_SIZE,
+        fallback_logprob_threshold=settings.STT_SERVICE_FILE_FALLBACK_LOGPROB,
+        fallback_compression_ratio=settings.STT_SERVICE_FALLBACK_COMPRESSION_RATIO
+    )
+
+
 class FasterWhisperAdapter(BaseSTTAdapter):
     
-    def __init__(self):
+    def __init__(self, model_size: Optional[str] = None, compute_type: Optional[str] = None, model_path: Optional[str] = None):
         self.model: WhisperModel | None = None
         self.model_loaded: bool = False
+        self.model_size = model_size or settings.STT_SERVICE_MODEL_SIZE
+        self.compute_type = compute_type or settings.STT_SERVICE_COMPUTE_TYPE
+        # Yerel, önceden çevrilmiş bir CTranslate2 dizini verildiyse model çözümleme/indirme adımı atlanır
+        model_source = model_path or self.model_size
         log.info(
             "Initializing FasterWhisperAdapter and loading model...",
-            model=settings.STT_SERVICE_MODEL_SIZE,
+            model=model_source,
             device=settings.STT_SERVICE_DEVICE,
-            compute_type=settings.STT_SERVICE_COMPUTE_TYPE
+            compute_type=self.compute_type
         )
         try:
             self.model = WhisperModel(
-                settings.STT_SERVICE_MODEL_SIZE,
+                model_source,
                 device=settings.STT_SERVICE_DEVICE,
-                compute_type=settings.STT_SERVICE_COMPUTE_TYPE
+                compute_type=self.compute_type,
+                local_files_only=settings.STT_SERVICE_MODEL_LOCAL_FILES_ONLY,
+                # Inference executor'daki her iş parçacığının modeli paralel kullanabilmesi için
+                num_workers=settings.STT_SERVICE_INFERENCE_WORKERS
             )
             self.model_loaded = True
-            log.info("FasterWhisperAdapter model loaded successfully.")
+            log.info("FasterWhisperAdapter model loaded successfully.", model=self.model_size)
         except Exception as e:
             self.model_loaded = False
             log.error("Failed to load FasterWhisperAdapter model", error=str(e), exc_info=True)
@@ -37,8 +102,62 @@ class FasterWhisperAdapter(BaseSTTAdapter):
         audio_input: Union[bytes, np.ndarray], 
         language: Optional[str] = None,
         logprob_threshold: Optional[float] = None,
-        no_speech_threshold: Optional[float] = None
+        no_speech_threshold: Optional[float] = None,
+        tier: str = DECODING_TIER_FILE
     ) -> str:
+        segments, _ = self._transcribe_segments(audio_input, language, logprob_threshold, no_speech_threshold, tier=tier)
+        # Sadece kabul edilen segmentleri birleştir
+        return "".join(segment.text for segment in segments).strip()
+
+    def transcribe_detailed(
+        self,
+        audio: np.ndarray,
+        language: Optional[str] = None,
+        logprob_threshold: Optional[float] = None,
+        no_speech_threshold: Optional[float] = None,
+        word_timestamps: bool = False,
+        tier: str = DECODING_TIER_FILE
+    ) -> TranscriptionResult:
+        segments, info = self._transcribe_segments(audio, language, logprob_threshold, no_speech_threshold, word_timestamps, tier)
+        return TranscriptionResult(
+            language=None if language else info.language,
+            language_probability=None if language else info.language_probability,
+            text="".join(segment.text for segment in segments).strip(),
+            segments=[
+                TranscriptionSegment(
+                    start=segment.start,
+                    end=segment.end,
+                    text=segment.text.strip(),
+                    confidence=math.exp(segment.avg_logprob),
+                    words=[
+                        TranscriptionWord(start=word.start, end=word.end, word=word.word.strip(), probability=word.probability)
+                        for word in segment.words or []
+                    ]
+                )
+                for segment in segments
+            ]
+        )
+
+    def detect_language(self, audio: np.ndarray) -> Tuple[Optional[str], Optional[float]]:
+        if not self.model_loaded or self.model is None:
+            log.error("Language detection requested but model is not available.")
+            raise RuntimeError("Model is not available for transcription.")
+        language, language_probability, _ = self.model.detect_language(audio)
+        return language, language_probability
+
+    def _transcribe_segments(
+        self,
+        audio_input: Union[bytes, np.ndarray],
+        language: Optional[str],
+        logprob_threshold: Optional[float],
+        no_speech_threshold: Optional[float],
+        word_timestamps: bool = False,
+        tier: str = DECODING_TIER_FILE
+    ) -> tuple:
+        """
+        Modeli çalıştırır; güven eşiklerini geçen faster-whisper segmentlerini ve
+        tespit edilen dili taşıyan `TranscriptionInfo`'yu döndürür.
+        """
         if not self.model_loaded or self.model is None:
             log.error("Transcription requested but model is not available.")
             raise RuntimeError("Model is not available for transcription.")
@@ -52,8 +171,7 @@ class FasterWhisperAdapter(BaseSTTAdapter):
         else:
             raise TypeError("Unsupported audio input type. Must be bytes or numpy.ndarray.")
 
-        final_logprob_threshold = logprob_threshold if logprob_threshold is not None else settings.STT_SERVICE_LOGPROB_THRESHOLD
-        final_no_speech_threshold = no_speech_threshold if no_speech_threshold is not None else settings.STT_SERVICE_NO_SPEECH_THRESHOLD
+        final_logprob_threshold, final_no_speech_threshold = self._resolve_thresholds(logprob_threshold, no_speech_threshold)
         
         log.debug(
             "Applying transcription filters",
@@ -61,17 +179,26 @@ class FasterWhisperAdapter(BaseSTTAdapter):
             no_speech_threshold=final_no_speech_threshold
         )
         
-        segments, info = self.model.transcribe(
-            input_for_model, 
-            beam_size=5, 
-            language=effective_language
-        )
-        
-        log.debug(
-            "Transcription by model completed",
-            detected_language=info.language,
-            language_probability=round(info.language_probability, 2)
-        )
+        policy = decoding_policy(tier)
+        started = time.perf_counter()
+        if policy.fallback_enabled:
+            # Hızlı yol: tek sıcaklıkla greedy (ya da dar ışınlı) çözümleme
+            segments, info = self._decode(input_for_model, effective_language, word_timestamps, policy.beam_size, 0.0)
+            DECODING_PASSES.labels(model=self.model_size, tier=tier).inc()
+            reason = self._fallback_reason(segments, policy, final_no_speech_threshold)
+            if reason:
+                DECODING_FALLBACKS.labels(model=self.model_size, tier=tier, reason=reason).inc()
+                log.debug("Greedy result is not reliable, decoding unreliable windows again with a wider beam.", reason=reason, tier=tier)
+                if isinstance(input_for_model, io.BytesIO):
+                    input_for_model.seek(0)
+                    input_for_model = decode_audio(input_for_model, sampling_rate=self.model.feature_extractor.sampling_rate)
+                # Dil ilk geçişte belirlendi; pencereler için tekrar tespit edilmez
+                segments = self._redecode_unreliable_windows(
+                    input_for_model, segments, info.language, word_timestamps, policy, final_no_speech_threshold
+                )
+        else:
+            # Yedek kapalı: faster-whisper'ın kendi sıcaklık yedeğiyle tek geçiş
+            segments, info = self._decode(input_for_model, effective_language, word_timestamps, policy.beam_size, FALLBACK_TEMPERATURES)
 
         filtered_segments = []
         rejected_texts = [] # Reddedilenleri loglamak için bir liste
@@ -82,9 +209,17 @@ class FasterWhisperAdapter(BaseSTTAdapter):
             )
             
             if is_reliable:
-                filtered_segments.append(segment.text)
+                filtered_segments.append(segment)
             else:
                 rejected_texts.append(segment.text.strip())
+                self._count_rejection(segment.avg_logprob, final_logprob_threshold)
+
+        observe_inference("faster_whisper", self.model_size, info.duration, time.perf_counter() - started)
+        log.debug(
+            "Transcription by model completed",
+            detected_language=info.language,
+            language_probability=round(info.language_probability, 2)
+        )
 
         # Eğer herhangi bir segment reddedildiyse, bunu tek bir logda toplayalım
         if rejected_texts:
@@ -95,8 +230,217 @@ class FasterWhisperAdapter(BaseSTTAdapter):
                 logprob_threshold=final_logprob_threshold,
                 no_speech_threshold=final_no_speech_threshold
             )
-        
-        # Sadece kabul edilen segmentleri birleştir
-        full_text = "".join(filtered_segments).strip()
-        
-        return full_text
\ No newline at end of file
+
+        return filtered_segments, info
+
+    def _decode(self, input_for_model, language, word_timestamps, beam_size, temperature):
+        segments, info = self.model.transcribe(
+            input_for_model,
+            beam_size=beam_size,
+            language=language,
+            temperature=temperature,
+            # Kelime hizalaması ek bir çapraz dikkat (cross-attention) geçişi gerektirir; sadece istenince açılır
+            word_timestamps=word_timestamps
+        )
+        # Segmentler tembel (lazy) üretilir; asıl çözümleme burada yapılır
+        return list(segments), info
+
+    def _redecode_unreliable_windows(
+        self, audio: np.ndarray, segments: list, language: str, word_timestamps: bool,
+        policy: DecodingPolicy, no_speech_threshold: float
+    ) -> list:
+        """
+        Güvensiz segmentleri, komşu güvenli segmentlerin arasında kalan
+        pencereyle birlikte geniş ışın ve sıcaklık yedeğiyle yeniden çözer;
+        ardışık güvensiz segmentler tek pencerede çözülür. Güvenli segmentler
+        olduğu gibi kalır, böylece tek bir kötü segment tüm sesi yeniden çözdürmez.
+        """
+        sample_rate = self.model.feature_extractor.sampling_rate
+        unreliable = [self._segment_fallback_reason(segment, policy, no_speech_threshold) is not None for segment in segments]
+        result = []
+        index = 0
+        while index < len(segments):
+            if not unreliable[index]:
+                result.append(segments[index])
+                index += 1
+                continue
+            last = index
+            while last + 1 < len(segments) and unreliable[last + 1]:
+                last += 1
+            window_start = segments[index - 1].end if index > 0 else 0.0
+            window_end = segments[last + 1].start if last + 1 < len(segments) else len(audio) / sample_rate
+            window = audio[int(window_start * sample_rate):int(math.ceil(window_end * sample_rate))]
+            if len(window):
+                # Sıcaklık yedeği faster-whisper'ın varsayılan log olasılık eşiğiyle (-1.0) tetiklenir;
+                # `fallback_logprob_threshold` yalnızca pencerenin yeniden çözülüp çözülmeyeceğini belirler
+                redecoded, _ = self._decode(window, language, word_timestamps, policy.fallback_beam_size, FALLBACK_TEMPERATURES)
+                for segment in redecoded:
+                    self._shift_segment(segment, window_start)
+                result.extend(redecoded)
+            else:
+                result.extend(segments[index:last + 1])
+            index = last + 1
+        return result
+
+    @staticmethod
+    def _shift_segment(segment, offset: float) -> None:
+        segment.start += offset
+        segment.end += offset
+        for word in segment.words or []:
+            word.start += offset
+            word.end += offset
+
+    @staticmethod
+    def _segment_fallback_reason(segment, policy: DecodingPolicy, no_speech_threshold: float) -> Optional[str]:
+        # Sessizlik olarak reddedilecek segmentler daha geniş ışınla da kurtarılamaz
+        if segment.no_speech_prob >= no_speech_threshold:
+            return None
+        return policy.fallback_reason(segment.avg_logprob, segment.compression_ratio)
+
+    @classmethod
+    def _fallback_reason(cls, segments: list, policy: DecodingPolicy, no_speech_threshold: float) -> Optional[str]:
+        for segment in segments:
+            reason = cls._segment_fallback_reason(segment, policy, no_speech_threshold)
+            if reason:
+                return reason
+        return None
+
+    def _count_rejection(self, avg_logprob: float, logprob_threshold: float) -> None:
+        reason = "low_logprob" if avg_logprob <= logprob_threshold else "no_speech"
+        REJECTED_SEGMENTS.labels(model=self.model_size, reason=reason).inc()
+
+    @staticmethod
+    def _resolve_thresholds(logprob_threshold: Optional[float], no_speech_threshold: Optional[float]):
+        final_logprob_threshold = logprob_threshold if logprob_threshold is not None else settings.STT_SERVICE_LOGPROB_THRESHOLD
+        final_no_speech_threshold = no_speech_threshold if no_speech_threshold is not None else settings.STT_SERVICE_NO_SPEECH_THRESHOLD
+        return final_logprob_threshold, final_no_speech_threshold
+
+    def transcribe_batch(self, requests: List[TranscriptionRequest]) -> List[str]:
+        """
+        Farklı oturumlardan gelen kısa sesleri tek bir kodlayıcı (encoder) ve
+        kod çözücü (decoder) çağrısında işler. 30 saniyeden uzun sesler tek
+        pencereye sığmadığı için normal `transcribe` yolundan geçer.
+        """
+        if not self.model_loaded or self.model is None:
+            log.error("Batch transcription requested but model is not available.")
+            raise RuntimeError("Model is not available for transcription.")
+
+        results: List[Optional[str]] = [None] * len(requests)
+        max_samples = MAX_BATCH_ITEM_SECONDS * self.model.feature_extractor.sampling_rate
+        batch_indices = []
+        for index, request in enumerate(requests):
+            if len(request.audio) > max_samples:
+                results[index] = self.transcribe(
+                    request.audio,
+                    request.language,
+                    logprob_threshold=request.logprob_threshold,
+                    no_speech_threshold=request.no_speech_threshold,
+                    tier=request.tier
+                )
+            else:
+                batch_indices.append(index)
+
+        if not batch_indices:
+            return results
+
+        started = time.perf_counter()
+        features = np.stack([
+            pad_or_trim(self.model.feature_extractor(requests[i].audio)[..., :-1])
+            for i in batch_indices
+        ])
+        encoder_output = self.model.encode(features)
+
+        languages = [requests[i].language for i in batch_indices]
+        if any(language is None for language in languages):
+            if self.model.model.is_multilingual:
+                detected = self.model.model.detect_language(encoder_output)
+                # Sonuçlar "<|tr|>" biçimindeki token'lar olarak döner
+                languages = [
+                    language or item_probs[0][0][2:-2]
+                    for language, item_probs in zip(languages, detected)
+                ]
+            else:
+                languages = [language or "en" for language in languages]
+
+        tokenizers = [
+            Tokenizer(self.model.hf_tokenizer, self.model.model.is_multilingual, task="transcribe", language=language)
+            for language in languages
+        ]
+        prompts = [self.model.get_prompt(tokenizer, [], without_timestamps=True) for tokenizer in tokenizers]
+        policies = [decoding_policy(requests[i].tier) for i in batch_indices]
+
+        # Partideki öğeler aynı ışınla çözülür; farklı katmanlar karışırsa en genişi kullanılır
+        decoded = self._generate_batch(encoder_output, prompts, tokenizers, max(policy.beam_size for policy in policies))
+
+        fallback_positions = []
+        for position, (index, policy) in enumerate(zip(batch_indices, policies)):
+            tier = requests[index].tier
+            DECODING_PASSES.labels(model=self.model_size, tier=tier).inc()
+            if not policy.fallback_enabled:
+                continue
+            text, avg_logprob, no_speech_prob = decoded[position]
+            _, final_no_speech_threshold = self._resolve_thresholds(None, requests[index].no_speech_threshold)
+            if no_speech_prob >= final_no_speech_threshold:
+                continue
+            reason = policy.fallback_reason(avg_logprob, get_compression_ratio(text) if text else 0.0)
+            if reason:
+                DECODING_FALLBACKS.labels(model=self.model_size, tier=tier, reason=reason).inc()
+                fallback_positions.append(position)
+
+        if fallback_positions:
+            # Sadece güvensiz öğeler yeniden kodlanıp daha geniş ışınla çözülür
+            log.debug("Decoding low-confidence batch items again with a wider beam.", count=len(fallback_positions))
+            fallback_output = self.model.encode(features[fallback_positions])
+            redecoded = self._generate_batch(
+                fallback_output,
+                [prompts[position] for position in fallback_positions],
+                [tokenizers[position] for position in fallback_positions],
+                max(policies[position].fallback_beam_size for position in fallback_positions)
+            )
+            for position, result in zip(fallback_positions, redecoded):
+                decoded[position] = result
+
+        rejected_texts = []
+        for index, (text, avg_logprob, no_speech_prob) in zip(batch_indices, decoded):
+            request = requests[index]
+            final_logprob_threshold, final_no_speech_threshold = self._resolve_thresholds(
+                request.logprob_threshold, request.no_speech_threshold
+            )
+
+            if avg_logprob > final_logprob_threshold and no_speech_prob < final_no_speech_threshold:
+                results[index] = text
+            else:
+                results[index] = ""
+                rejected_texts.append(text)
+                self._count_rejection(avg_logprob, final_logprob_threshold)
+
+        batch_audio_seconds = sum(len(requests[i].audio) for i in batch_indices) / self.model.feature_extractor.sampling_rate
+        observe_inference("faster_whisper", self.model_size, batch_audio_seconds, time.perf_counter() - started)
+        log.debug("Batch transcription by model completed", batch_size=len(batch_indices))
+        if rejected_texts:
+            log.warn(
+                "Batch items REJECTED due to low confidence.",
+                rejected_count=len(rejected_texts),
+                rejected_texts=rejected_texts
+            )
+
+        return results
+
+    def _generate_batch(self, encoder_output, prompts: list, tokenizers: List[Tokenizer], beam_size: int) -> list:
+        """Kodlanmış sesleri tek bir `generate` çağrısıyla çözer; her öğe için (metin, avg_logprob, no_speech_prob) döner."""
+        generation_results = self.model.model.generate(
+            encoder_output,
+            prompts,
+            beam_size=beam_size,
+            max_length=self.model.max_length,
+            suppress_blank=True,
+            suppress_tokens=get_suppressed_tokens(tokenizers[0], (-1,)),
+            return_scores=True,
+            return_no_speech_prob=True,
+        )
+        decoded = []
+        for tokenizer, result in zip(tokenizers, generation_results):
+            tokens = result.sequences_ids[0]
+            avg_logprob = result.scores[0] * len(tokens) / (len(tokens) + 1)
+            decoded.append((tokenizer.decode(tokens).strip(), avg_logprob, result.no_speech_prob))
+        return decoded
@@ -0,0 +1,97 @@
+# sentiric-stt-service/app/services/batching_service.py
+import asyncio
+import structlog
+from fastapi import Request
+from typing import Dict, List, Optional, Tuple
+from .adapters.base import BaseSTTAdapter, TranscriptionRequest
+from .stt_service import InferenceExecutor
+from app.core.config import settings
+
+log = structlog.get_logger(__name__)
+
+_PendingItem = Tuple[TranscriptionRequest, asyncio.Future]
+
+
+class BatchScheduler:
+    """
+    Tüm akış oturumlarından gelen tamamlanmış konuşma parçalarını (utterance)
+    kısa bir pencere boyunca toplar ve tek bir `adapter.transcribe_batch`
+    çağrısında işler. Sonuçlar her oturuma kendi future'ı üzerinden döner.
+
+    Bir parti, pencere süresi dolduğunda veya `max_batch_size` öğeye
+    ulaştığında hangisi önce olursa o an inference executor'a gönderilir.
+    Farklı adaptörlere ait istekler ayrı partilerde toplanır.
+    """
+
+    def __init__(self, executor: InferenceExecutor, window_ms: int, max_batch_size: int):
+        self.executor = executor
+        self.window_seconds = max(0, window_ms) / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        self._pending: Dict[int, Tuple[BaseSTTAdapter, List[_PendingItem]]] = {}
+        self._timers: Dict[int, asyncio.TimerHandle] = {}
+        self._tasks = set()
+
+    async def transcribe(self, adapter: BaseSTTAdapter, request: TranscriptionRequest) -> str:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = id(adapter)
+
+        _, items = self._pending.setdefault(key, (adapter, []))
+        items.append((request, future))
+
+        if len(items) >= self.max_batch_size:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(self.window_seconds, self._flush, key)
+
+        return await future
+
+    def _flush(self, key: int) -> None:
+        timer = self._timers.pop(key, None)
+        if timer:
+            timer.cancel()
+
+        adapter, items = self._pending.pop(key, (None, []))
+        # Beklerken iptal edilen (ör. bağlantısı kopan) oturumları partiden çıkar
+        items = [(request, future) for request, future in items if not future.done()]
+        if not items:
+            return
+
+        task = asyncio.create_task(self._run_batch(adapter, items))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, adapter: BaseSTTAdapter, items: List[_PendingItem]) -> None:
+        log.debug("Dispatching transcription batch.", batch_size=len(items))
+        try:
+            texts = await self.executor.run(adapter.transcribe_batch, [request for request, _ in items])
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), text in zip(items, texts):
+            if not future.done():
+                future.set_result(text)
+
+
+def create_batch_scheduler(executor: InferenceExecutor) -> Optional[BatchScheduler]:
+    if not settings.STT_SERVICE_BATCHING_ENABLED:
+        log.info("Cross-session batching is disabled.")
+        return None
+
+    scheduler = BatchScheduler(
+        executor,
+        window_ms=settings.STT_SERVICE_BATCH_WINDOW_MS,
+        max_batch_size=settings.STT_SERVICE_BATCH_MAX_SIZE
+    )
+    log.info(
+        "Batch scheduler created.",
+        window_ms=settings.STT_SERVICE_BATCH_WINDOW_MS,
+        max_batch_size=scheduler.max_batch_size
+    )
+    return scheduler
+
+def get_batch_scheduler(request: Request) -> Optional[BatchScheduler]:
+    return getattr(request.app.state, 'batch_scheduler', None)
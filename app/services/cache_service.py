@@ -0,0 +1,177 @@
+# sentiric-stt-service/app/services/cache_service.py
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from typing import BinaryIO, Optional
+import numpy as np
+import structlog
+from fastapi import Request
+from .adapters.base import TranscriptionResult, TranscriptionSegment
+from app.core.config import settings
+
+log = structlog.get_logger(__name__)
+
+# Önbellek formatı veya anahtar içeriği değişirse artırılır; eski kayıtlar kendiliğinden geçersiz olur
+CACHE_KEY_VERSION = "1"
+HASH_READ_CHUNK_BYTES = 1024 * 1024
+
+
+def _options_digest(
+    model: str,
+    language: Optional[str],
+    logprob_threshold: Optional[float],
+    no_speech_threshold: Optional[float]
+) -> bytes:
+    """Sonucu etkileyen tüm parametreleri (varsayılanlar çözülmüş olarak) tek bir byte dizisine çevirir."""
+    options = {
+        "version": CACHE_KEY_VERSION,
+        "language": language,
+        "logprob_threshold": logprob_threshold if logprob_threshold is not None else settings.STT_SERVICE_LOGPROB_THRESHOLD,
+        "no_speech_threshold": no_speech_threshold if no_speech_threshold is not None else settings.STT_SERVICE_NO_SPEECH_THRESHOLD,
+        # Model boyutu ve hesaplama tipi (ör. "medium:int8")
+        "model": model,
+    }
+    return json.dumps(options, sort_keys=True).encode("utf-8")
+
+
+def pcm_cache_key(pcm: np.ndarray, **options) -> str:
+    """Çözülmüş PCM'in içeriğine ve transkripsiyon parametrelerine göre önbellek anahtarı üretir."""
+    digest = hashlib.sha256(_options_digest(**options))
+    digest.update(b"pcm:")
+    digest.update(memoryview(np.ascontiguousarray(pcm)).cast("B"))
+    return digest.hexdigest()
+
+
+def upload_cache_key(file: BinaryIO, **options) -> str:
+    """
+    Yüklenen dosyanın ham byte'larına göre anahtar üretir. Aynı dosya tekrar
+    gönderildiğinde kod çözmeye gerek kalmadan sonuca ulaşmayı sağlar.
+    """
+    digest = hashlib.sha256(_options_digest(**options))
+    digest.update(b"upload:")
+    file.seek(0)
+    while True:
+        block = file.read(HASH_READ_CHUNK_BYTES)
+        if not block:
+            break
+        digest.update(block)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def _serialize(result: TranscriptionResult) -> bytes:
+    return json.dumps(result.to_dict(), ensure_ascii=False).encode("utf-8")
+
+
+def _deserialize(data: bytes) -> TranscriptionResult:
+    payload = json.loads(data)
+    return TranscriptionResult(
+        text=payload["text"],
+        segments=[TranscriptionSegment(**segment) for segment in payload.get("segments", [])]
+    )
+
+
+class TranscriptionCache:
+    """
+    İçerik adresli transkripsiyon sonuç önbelleği.
+
+    Sonuçlar serileştirilmiş halde, toplam boyutu `max_memory_bytes` ile
+    sınırlı bir LRU'da tutulur. `disk_dir` verilirse her sonuç ayrıca bu
+    dizine yazılır; bellekte bulunmayan anahtarlar diskten okunup belleğe
+    geri alınır, böylece önbellek yeniden başlatmalardan sonra da geçerli kalır.
+    Disk işlemleri event loop dışında yapılır.
+    """
+
+    def __init__(self, max_memory_bytes: int, disk_dir: Optional[str] = None):
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_dir = disk_dir
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Optional[TranscriptionResult]:
+        data = self._entries.get(key)
+        if data is not None:
+            self._entries.move_to_end(key)
+            return _deserialize(data)
+
+        if self.disk_dir:
+            loop = asyncio.get_running_loop()
+            data = await loop.run_in_executor(None, self._read_disk, key)
+            if data is not None:
+                log.debug("Transcription result loaded from disk cache.", key=key)
+                self._store_memory(key, data)
+                return _deserialize(data)
+        return None
+
+    async def put(self, key: str, result: TranscriptionResult) -> None:
+        data = _serialize(result)
+        self._store_memory(key, data)
+        if self.disk_dir:
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(None, self._write_disk, key, data)
+            except OSError as e:
+                log.warn("Failed to write transcription result to disk cache.", error=str(e))
+
+    def _store_memory(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_memory_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._entries[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._disk_path(key), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_disk(self, key: str, data: bytes) -> None:
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Yarım yazılmış dosyalar okunmasın diye önce geçici dosyaya yazılıp atomik olarak taşınır
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+def create_transcription_cache() -> Optional[TranscriptionCache]:
+    if not settings.STT_SERVICE_CACHE_ENABLED:
+        log.info("Transcription result cache is disabled.")
+        return None
+
+    cache = TranscriptionCache(
+        max_memory_bytes=settings.STT_SERVICE_CACHE_MAX_MB * 1024 * 1024,
+        disk_dir=settings.STT_SERVICE_CACHE_DIR or None
+    )
+    log.info(
+        "Transcription result cache created.",
+        max_memory_mb=settings.STT_SERVICE_CACHE_MAX_MB,
+        disk_dir=cache.disk_dir or "disabled"
+    )
+    return cache
+
+def get_transcription_cache(request: Request) -> Optional[TranscriptionCache]:
+    return getattr(request.app.state, 'transcription_cache', None)
@@ -0,0 +1,391 @@
+# sentiric-stt-service/app/services/file_transcription_service.py
+import asyncio
+import os
+import shutil
+import tempfile
+import zipfile
+from dataclasses import asdict, dataclass
+from typing import AsyncContextManager, BinaryIO, Callable, List, Optional, Tuple, Union
+import numpy as np
+import structlog
+from .adapters.base import BaseSTTAdapter, TranscriptionRequest, TranscriptionResult, TranscriptionSegment
+from .stt_service import InferenceExecutor, InferenceQueueFullError, InferenceTimeoutError
+from .vad_service import VAD_FRAME_DURATION_MS, create_vad
+from app.core.config import settings
+from app.utils.audio import UPLOAD_READ_CHUNK_BYTES, FfmpegTimeoutError, load_audio_file
+from app.utils.audio_buffers import INT16_TO_FLOAT32_SCALE, AudioTooLongError
+
+log = structlog.get_logger(__name__)
+
+# find_silence_chunks'ın VAD'a tek seferde verdiği frame sayısı (30 ms'lik frame'lerle ~1 dakika)
+VAD_BLOCK_FRAMES = 2000
+
+# Arşivden açılan bir dosyanın diske taşmadan önce bellekte tutulacağı maksimum boyut
+ARCHIVE_MEMBER_SPOOL_BYTES = 1024 * 1024
+
+# (başlangıç örneği, bitiş örneği)
+_Chunk = Tuple[int, int]
+
+
+def find_silence_chunks(
+    pcm: np.ndarray,
+    sample_rate: int,
+    max_chunk_seconds: float,
+    min_silence_ms: int,
+    vad=None
+) -> List[_Chunk]:
+    """
+    int16 PCM'i, akış tarafındaki VAD ile aynı frame'ler üzerinden sessizlik
+    noktalarından en fazla `max_chunk_seconds` uzunluğunda parçalara böler.
+
+    Her parça, uzunluğunun ikinci yarısındaki en uzun sessizliğin ortasından
+    kesilir; uygun bir sessizlik yoksa maksimum uzunlukta kesilir. Hiç konuşma
+    içermeyen parçalar sonuçtan çıkarılır.
+    """
+    vad = vad or create_vad()
+    frame_samples = sample_rate * VAD_FRAME_DURATION_MS // 1000
+    num_frames = len(pcm) // frame_samples
+    if num_frames == 0:
+        return [(0, len(pcm))] if len(pcm) else []
+
+    # Frame'ler bloklar halinde sınıflandırılır; uzun (memory-mapped) kayıtların tamamı belleğe alınmaz
+    frames = pcm[:num_frames * frame_samples].reshape(num_frames, frame_samples)
+    voiced = np.concatenate([
+        vad.classify(frames[start:start + VAD_BLOCK_FRAMES], sample_rate)
+        for start in range(0, num_frames, VAD_BLOCK_FRAMES)
+    ])
+
+    # Sessizlik (konuşma olmayan frame) dizilerinin başlangıç/bitiş indeksleri
+    edges = np.diff(np.concatenate(([True], voiced, [True])).astype(np.int8))
+    silence_starts = np.flatnonzero(edges == -1)
+    silence_ends = np.flatnonzero(edges == 1)
+    silence_lengths = silence_ends - silence_starts
+    usable = silence_lengths >= max(1, min_silence_ms // VAD_FRAME_DURATION_MS)
+    cut_points = ((silence_starts + silence_ends) // 2)[usable]
+    cut_weights = silence_lengths[usable]
+
+    max_frames = max(1, int(max_chunk_seconds * 1000) // VAD_FRAME_DURATION_MS)
+    frame_chunks = []
+    start = 0
+    while num_frames - start > max_frames:
+        end = start + max_frames
+        candidates = (cut_points > start + max_frames // 2) & (cut_points <= end)
+        if candidates.any():
+            end = int(cut_points[candidates][np.argmax(cut_weights[candidates])])
+        frame_chunks.append((start, end))
+        start = end
+    frame_chunks.append((start, num_frames))
+
+    chunks = []
+    for index, (start, end) in enumerate(frame_chunks):
+        if not voiced[start:end].any():
+            continue
+        # Son parça, frame'e tamamlanmayan kuyruk örneklerini de kapsar
+        end_sample = len(pcm) if index == len(frame_chunks) - 1 else end * frame_samples
+        chunks.append((start * frame_samples, end_sample))
+    return chunks
+
+
+def _fixed_windows(num_samples: int, window_samples: int) -> List[_Chunk]:
+    return [(start, min(start + window_samples, num_samples)) for start in range(0, num_samples, window_samples)]
+
+
+async def _transcribe_chunks(
+    adapter: BaseSTTAdapter,
+    executor: InferenceExecutor,
+    pcm: np.ndarray,
+    chunks: List[_Chunk],
+    concurrency: int,
+    language: Optional[str],
+    logprob_threshold: Optional[float],
+    no_speech_threshold: Optional[float],
+    on_progress: Optional[Callable[[float], None]] = None,
+    queue_full_retry_seconds: Optional[float] = None,
+    inference_slot: Optional[Callable[[], AsyncContextManager]] = None
+) -> TranscriptionResult:
+    """
+    Parçaları en fazla `concurrency` tanesi aynı anda çalışacak şekilde modele
+    verir ve sonuçları, segment zamanlarını parçanın dosyadaki konumuna göre
+    kaydırarak orijinal sırayla birleştirir. float32 kopyalar sadece çalışan
+    parçalar için oluşturulur. `on_progress`, her parça bittiğinde işlenen
+    sesin toplama oranıyla (0-1) çağrılır. `queue_full_retry_seconds`
+    verilirse çıkarım kuyruğu dolu olduğunda sadece o parça bu kadar
+    beklendikten sonra tekrar denenir; biten parçalar yeniden işlenmez.
+    `inference_slot` verilirse her parçanın çıkarımı bu bağlam yöneticisinin
+    içinde çalışır (ör. işlerin paylaştığı çıkarım yuvaları).
+    """
+    sample_rate = settings.STT_SERVICE_TARGET_SAMPLE_RATE
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    total_samples = sum(end - start for start, end in chunks) or 1
+    done_samples = 0
+
+    async def infer_chunk(start: int, end: int) -> TranscriptionResult:
+        audio_np = np.multiply(pcm[start:end], INT16_TO_FLOAT32_SCALE, dtype=np.float32)
+        while True:
+            try:
+                return await executor.run(
+                    adapter.transcribe_detailed,
+                    audio_np,
+                    language,
+                    logprob_threshold=logprob_threshold,
+                    no_speech_threshold=no_speech_threshold
+                )
+            except InferenceQueueFullError:
+                if queue_full_retry_seconds is None:
+                    raise
+                await asyncio.sleep(queue_full_retry_seconds)
+
+    async def run_chunk(start: int, end: int) -> TranscriptionResult:
+        async with semaphore:
+            if inference_slot is None:
+                result = await infer_chunk(start, end)
+            else:
+                async with inference_slot():
+                    result = await infer_chunk(start, end)
+        if on_progress:
+            nonlocal done_samples
+            done_samples += end - start
+            on_progress(done_samples / total_samples)
+        offset = start / sample_rate
+        result.segments = [
+            TranscriptionSegment(start=segment.start + offset, end=segment.end + offset, text=segment.text, confidence=segment.confidence)
+            for segment in result.segments
+        ]
+        return result
+
+    tasks = [asyncio.ensure_future(run_chunk(start, end)) for start, end in chunks]
+    try:
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        # Bir parça başarısız olursa diğerleri için boşuna model çalıştırma
+        for task in tasks:
+            task.cancel()
+        raise
+
+    return TranscriptionResult(
+        text=" ".join(result.text for result in results if result.text),
+        segments=[segment for result in results for segment in result.segments]
+    )
+
+
+async def transcribe_pcm(
+    adapter: BaseSTTAdapter,
+    executor: InferenceExecutor,
+    pcm: np.ndarray,
+    language: Optional[str] = None,
+    logprob_threshold: Optional[float] = None,
+    no_speech_threshold: Optional[float] = None,
+    on_progress: Optional[Callable[[float], None]] = None,
+    concurrency: Optional[int] = None,
+    queue_full_retry_seconds: Optional[float] = None,
+    inference_slot: Optional[Callable[[], AsyncContextManager]] = None
+) -> TranscriptionResult:
+    """
+    Çözülmüş int16 PCM'i (bellekte veya memory-mapped) metne çevirir.
+
+    `STT_SERVICE_LONG_FILE_MIN_SECONDS`'tan uzun kayıtlar sessizlik
+    noktalarından parçalara bölünür ve en fazla `concurrency` (varsayılan:
+    inference havuzundaki iş parçacığı sayısı) parça paralel işlenir. Daha
+    kısa kayıtlar (veya parçalı işleme kapalıysa tüm kayıtlar)
+    `STT_SERVICE_FILE_WINDOW_SECONDS` uzunluğunda pencereler halinde sırayla
+    işlenir. `on_progress` verilirse her parçadan sonra ilerleme oranıyla
+    (0-1) çağrılır. `queue_full_retry_seconds` ve `inference_slot` için
+    `_transcribe_chunks`'a bakınız.
+    """
+    if not len(pcm):
+        return TranscriptionResult(text="")
+
+    sample_rate = settings.STT_SERVICE_TARGET_SAMPLE_RATE
+    options = dict(
+        language=language,
+        logprob_threshold=logprob_threshold,
+        no_speech_threshold=no_speech_threshold,
+        on_progress=on_progress,
+        queue_full_retry_seconds=queue_full_retry_seconds,
+        inference_slot=inference_slot
+    )
+
+    if settings.STT_SERVICE_LONG_FILE_CHUNKING_ENABLED and len(pcm) >= settings.STT_SERVICE_LONG_FILE_MIN_SECONDS * sample_rate:
+        loop = asyncio.get_running_loop()
+        chunks = await loop.run_in_executor(
+            None,
+            find_silence_chunks,
+            pcm,
+            sample_rate,
+            settings.STT_SERVICE_LONG_FILE_CHUNK_SECONDS,
+            settings.STT_SERVICE_LONG_FILE_MIN_SILENCE_MS
+        )
+        concurrency = concurrency or executor.max_workers
+        log.info(
+            "Long audio split into chunks at silence boundaries.",
+            duration_seconds=round(len(pcm) / sample_rate, 2),
+            chunks=len(chunks),
+            concurrency=concurrency
+        )
+        return await _transcribe_chunks(adapter, executor, pcm, chunks, concurrency, **options)
+
+    window_samples = max(1, settings.STT_SERVICE_FILE_WINDOW_SECONDS * sample_rate)
+    return await _transcribe_chunks(adapter, executor, pcm, _fixed_windows(len(pcm), window_samples), 1, **options)
+
+
+class BatchTooLargeError(ValueError):
+    """Toplu istekteki dosya sayısı veya arşivlerin açılmış toplam boyutu sınırı aştığında fırlatılır."""
+
+
+class BatchBudget:
+    """
+    Bir toplu isteğin tamamı (tüm yüklemeler ve arşivler birlikte) için dosya
+    sayısı ve açılmış toplam boyut sınırı. Arşivler içerikleri okunmadan,
+    merkezi dizindeki boyutlarla bu bütçeden düşülür.
+    """
+
+    def __init__(self, max_files: int, max_total_bytes: int):
+        self.max_files = max_files
+        self.max_total_bytes = max_total_bytes
+        self.files = 0
+        self.total_bytes = 0
+
+    def reserve(self, files: int, size_bytes: int) -> None:
+        if self.files + files > self.max_files:
+            raise BatchTooLargeError(f"Too many files: at most {self.max_files} are allowed per request.")
+        if self.total_bytes + size_bytes > self.max_total_bytes:
+            raise BatchTooLargeError("Request contents exceed the maximum upload size.")
+        self.files += files
+        self.total_bytes += size_bytes
+
+
+@dataclass
+class ArchiveMember:
+    """Zip arşivindeki tek bir dosya; içeriği ancak çözüleceği sırada geçici dosyaya açılır."""
+    archive: zipfile.ZipFile
+    info: zipfile.ZipInfo
+
+    def extract(self) -> BinaryIO:
+        """Dosyayı geçici bir dosyaya açar; bozuk, şifreli veya desteklenmeyen sıkıştırmalı üyelerde ValueError fırlatır."""
+        spool = tempfile.SpooledTemporaryFile(max_size=ARCHIVE_MEMBER_SPOOL_BYTES)
+        try:
+            with self.archive.open(self.info) as member:
+                shutil.copyfileobj(member, spool, UPLOAD_READ_CHUNK_BYTES)
+        except (zipfile.BadZipFile, NotImplementedError, RuntimeError) as e:
+            spool.close()
+            raise ValueError(f"Archive member could not be read: {e}")
+        spool.seek(0)
+        return spool
+
+
+@dataclass
+class BatchItemResult:
+    filename: str
+    text: Optional[str] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def read_audio_archive(file: BinaryIO, budget: BatchBudget) -> List[Tuple[str, ArchiveMember]]:
+    """
+    Bir zip arşivindeki dosyaları (dizinler ve gizli/sistem dosyaları hariç)
+    listeler; hiçbir dosya bu aşamada açılmaz. Dosya sayısı ve açılmış boyut
+    merkezi dizinden okunup isteğin bütçesinden düşülür: sınır aşılırsa
+    BatchTooLargeError, dosya geçerli bir zip değilse ValueError fırlatır.
+    Arşiv, `file` açık kaldığı sürece kullanılabilir.
+    """
+    file.seek(0)
+    try:
+        archive = zipfile.ZipFile(file)
+    except zipfile.BadZipFile:
+        raise ValueError("Archive could not be read.")
+
+    members = [
+        info for info in archive.infolist()
+        if not info.is_dir() and not info.filename.startswith("__MACOSX/")
+        and not os.path.basename(info.filename).startswith(".")
+    ]
+    # Boyutlar merkezi dizinden okunur; böylece sıkıştırma bombaları açılmadan reddedilir
+    budget.reserve(len(members), sum(info.file_size for info in members))
+    return [(info.filename, ArchiveMember(archive, info)) for info in members]
+
+
+async def transcribe_files_batch(
+    adapter: BaseSTTAdapter,
+    executor: InferenceExecutor,
+    files: List[Tuple[str, Union[bytes, BinaryIO, ArchiveMember]]],
+    language: Optional[str] = None,
+    logprob_threshold: Optional[float] = None,
+    no_speech_threshold: Optional[float] = None
+) -> List[BatchItemResult]:
+    """
+    Çok sayıda kısa dosyayı `STT_SERVICE_BATCH_MAX_SIZE` boyutunda gruplar
+    halinde işler: bir gruptaki dosyalar eşzamanlı çözülür ve tek bir
+    `adapter.transcribe_batch` çağrısıyla modele verilir. Bir grup modeldeyken
+    sıradaki grup çözülür. Hatalar tüm isteği değil, sadece ilgili öğeyi etkiler.
+    """
+    results = [BatchItemResult(filename=name) for name, _ in files]
+    batch_size = max(1, settings.STT_SERVICE_BATCH_MAX_SIZE)
+    groups = [range(start, min(start + batch_size, len(files))) for start in range(0, len(files), batch_size)]
+    # İş parçacığı başına bir grup modelde, bir grup da çözülüyor olabilir; kabul sınırı aşılmaz
+    semaphore = asyncio.Semaphore(max(1, min(executor.max_workers + 1, executor.max_pending)))
+
+    loop = asyncio.get_running_loop()
+
+    async def decode(index: int) -> Optional[np.ndarray]:
+        source = files[index][1]
+        try:
+            if isinstance(source, ArchiveMember):
+                # Arşiv üyeleri ancak grubu çözülürken açılır; aynı anda açık olanlar semafor ile sınırlıdır
+                with await loop.run_in_executor(None, source.extract) as extracted:
+                    pcm = await load_audio_file(extracted)
+            else:
+                pcm = await load_audio_file(source)
+            return np.multiply(pcm, INT16_TO_FLOAT32_SCALE, dtype=np.float32)
+        except AudioTooLongError:
+            results[index].error = "Audio is longer than the maximum allowed duration."
+        except ValueError:
+            results[index].error = "Audio file could not be decoded."
+        except FfmpegTimeoutError:
+            results[index].error = "Audio decoding timed out."
+        except Exception as e:
+            # Kod çözücüdeki beklenmeyen bir hata da sadece bu öğeyi etkiler
+            log.error("Batch item could not be decoded.", filename=files[index][0], error=str(e), exc_info=True)
+            results[index].error = "Audio file could not be decoded."
+        return None
+
+    async def process_group(indices: range) -> None:
+        async with semaphore:
+            audios = await asyncio.gather(*(decode(index) for index in indices))
+            ready = [(index, audio) for index, audio in zip(indices, audios) if audio is not None and len(audio)]
+            for index, audio in zip(indices, audios):
+                if audio is not None and not len(audio):
+                    results[index].text = ""
+            if not ready:
+                return
+
+            requests = [
+                TranscriptionRequest(
+                    audio=audio,
+                    language=language,
+                    logprob_threshold=logprob_threshold,
+                    no_speech_threshold=no_speech_threshold
+                )
+                for _, audio in ready
+            ]
+            try:
+                texts = await executor.run(adapter.transcribe_batch, requests)
+            except InferenceQueueFullError:
+                error = "Server is busy, please try again later."
+            except InferenceTimeoutError:
+                error = "Transcription timed out."
+            except Exception as e:
+                log.error("Batch transcription group failed.", error=str(e), exc_info=True)
+                error = "Transcription error"
+            else:
+                for (index, _), text in zip(ready, texts):
+                    results[index].text = text
+                return
+
+            for index, _ in ready:
+                results[index].error = error
+
+    await asyncio.gather(*(process_group(group) for group in groups))
+    return results
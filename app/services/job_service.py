@@ -0,0 +1,462 @@
+# sentiric-stt-service/app/services/job_service.py
+import asyncio
+import contextlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import urllib.request
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Dict, List, Optional, Set
+import structlog
+from fastapi import Request
+from .adapters.base import TranscriptionResult, TranscriptionSegment
+from .file_transcription_service import transcribe_pcm
+from .model_registry import UnknownModelError
+from .stt_service import InferenceTimeoutError
+from app.core.config import settings
+from app.utils.audio import FfmpegTimeoutError, load_audio_file
+from app.utils.audio_buffers import AudioTooLongError
+
+log = structlog.get_logger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+# Boşta bekleyen iş parçacıklarının kuyruğu yeniden kontrol etme aralığı (saniye)
+JOB_POLL_INTERVAL_SECONDS = 1.0
+# Çıkarım kuyruğu dolu olduğunda bir işin parçasının tekrar denenmeden önce bekleme süresi (saniye)
+JOB_RETRY_DELAY_SECONDS = 2.0
+# Tek çıkarım iş parçacığı varken bekleyen bir işin havuzun boşalıp boşalmadığını kontrol etme aralığı (saniye)
+JOB_IDLE_POLL_INTERVAL_SECONDS = 0.05
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    filename TEXT,
+    options TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+"""
+
+
+class JobQueueFullError(RuntimeError):
+    """İş kuyruğunda `STT_SERVICE_JOBS_MAX_QUEUED` iş beklerken yeni iş gönderildiğinde fırlatılır (HTTP 429)."""
+
+
+@dataclass
+class Job:
+    id: str
+    status: str
+    filename: Optional[str]
+    options: Dict[str, Any] = field(default_factory=dict)
+    progress: float = 0.0
+    result: Optional[TranscriptionResult] = None
+    error: Optional[str] = None
+    created_at: float = 0.0
+    updated_at: float = 0.0
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JOB_COMPLETED, JOB_FAILED)
+
+
+def _row_to_job(row: sqlite3.Row) -> Job:
+    result = None
+    if row["result"] is not None:
+        payload = json.loads(row["result"])
+        result = TranscriptionResult(
+            text=payload["text"],
+            segments=[TranscriptionSegment(**segment) for segment in payload.get("segments", [])]
+        )
+    return Job(
+        id=row["id"],
+        status=row["status"],
+        filename=row["filename"],
+        options=json.loads(row["options"]),
+        progress=row["progress"],
+        result=result,
+        error=row["error"],
+        created_at=row["created_at"],
+        updated_at=row["updated_at"]
+    )
+
+
+class JobStore:
+    """
+    İşlerin durumunu SQLite'ta tutar; kuyruk yeniden başlatmalardan sonra da
+    korunur. Metotlar senkrondur ve event loop dışında çağrılmalıdır.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def add(self, job: Job) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, filename, options, progress, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job.id, job.status, job.filename, json.dumps(job.options), job.progress, job.created_at, job.updated_at)
+            )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row else None
+
+    def count(self, status: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
+
+    def claim_next(self) -> Optional[Job]:
+        """En eski bekleyen işi atomik olarak `running` durumuna alır ve döndürür."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (JOB_QUEUED,)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, progress = 0, updated_at = ? WHERE id = ?",
+                    (JOB_RUNNING, time.time(), row["id"])
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        job = _row_to_job(row)
+        job.status = JOB_RUNNING
+        return job
+
+    def update_progress(self, job_id: str, progress: float) -> None:
+        with self._lock:
+            # Güncellemeler sırasız uygulanabilir; ilerleme hiçbir zaman geri gitmez
+            self._conn.execute(
+                "UPDATE jobs SET progress = MAX(progress, ?), updated_at = ? WHERE id = ? AND status = ?",
+                (progress, time.time(), job_id, JOB_RUNNING)
+            )
+
+    def finish(self, job_id: str, result: Optional[TranscriptionResult] = None, error: Optional[str] = None) -> None:
+        status = JOB_FAILED if error else JOB_COMPLETED
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, progress = ?, result = ?, error = ?, updated_at = ? WHERE id = ?",
+                (
+                    status,
+                    1.0 if status == JOB_COMPLETED else 0.0,
+                    json.dumps(result.to_dict(), ensure_ascii=False) if result is not None else None,
+                    error,
+                    time.time(),
+                    job_id
+                )
+            )
+
+    def requeue(self, job_id: Optional[str] = None) -> int:
+        """Verilen işi (veya verilmezse yarıda kalmış tüm işleri) tekrar kuyruğa alır."""
+        query = "UPDATE jobs SET status = ?, progress = 0 WHERE status = ?"
+        params = [JOB_QUEUED, JOB_RUNNING]
+        if job_id is not None:
+            query += " AND id = ?"
+            params.append(job_id)
+        with self._lock:
+            return self._conn.execute(query, params).rowcount
+
+    def delete_finished_before(self, cutoff: float) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) AND updated_at < ?", (JOB_COMPLETED, JOB_FAILED, cutoff)
+            ).fetchall()
+            ids = [row["id"] for row in rows]
+            self._conn.executemany("DELETE FROM jobs WHERE id = ?", [(job_id,) for job_id in ids])
+        return ids
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class JobManager:
+    """
+    Uzun kayıtları HTTP bağlantısından bağımsız olarak işler.
+
+    Gönderilen ses diske yazılır ve iş SQLite kuyruğuna eklenir; en fazla
+    `workers` iş aynı anda, model hazır olduğunda sırayla işlenir. Böylece
+    kabul hızı çıkarım kapasitesinden ayrılır. Tüm işler inference havuzunun
+    `max_workers - 1` boyutundaki ortak bir yuva havuzunu paylaşır; böylece
+    en az bir iş parçacığı her zaman etkileşimli isteklere (/transcribe ve
+    akış) kalır. Havuzda tek iş parçacığı varsa işler ayrılacak yuva
+    bulamaz; bu durumda bir iş parçası sadece havuzda bekleyen başka çağrı
+    yokken gönderilir, yani etkileşimli istekler varken işler duraklar ve
+    etkileşimli istek en fazla o an çalışan tek bir iş parçasını bekler.
+    Çıkarım kuyruğu dolduğunda iş başarısız sayılmaz; sadece
+    bekleyen parçası kısa bir süre sonra tekrar denenir. Süreç yeniden
+    başladığında yarıda kalmış işler baştan kuyruğa alınır. Biten işlerin
+    sonuçları `retention_seconds` boyunca saklanır, isteğe bağlı olarak
+    `callback_url` adresine POST edilir.
+    """
+
+    def __init__(self,
+                 store: JobStore,
+                 jobs_dir: str,
+                 workers: int,
+                 max_queued: int,
+                 retention_seconds: float,
+                 callback_url: Optional[str] = None,
+                 callback_timeout_seconds: float = 10.0):
+        self.store = store
+        self.jobs_dir = jobs_dir
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        self.retention_seconds = retention_seconds
+        self.callback_url = callback_url
+        self.callback_timeout_seconds = callback_timeout_seconds
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._progress_writes: Set[asyncio.Future] = set()
+        self._state = None
+        self._job_slots = 0
+        self._inference_slots: Optional[asyncio.Semaphore] = None
+
+    def start(self, state) -> None:
+        """İş parçacıklarını başlatır. `state`, modelin ve çıkarım havuzunun okunduğu `app.state`'tir."""
+        self._state = state
+        # Tüm iş parçacıkları tek bir yuva havuzunu paylaşır; son çıkarım iş parçacığı işlere verilmez
+        self._job_slots = max(0, state.inference_executor.max_workers - 1)
+        self._inference_slots = asyncio.Semaphore(self._job_slots) if self._job_slots else None
+        if not self._job_slots:
+            log.info("Single inference worker: jobs pause while interactive inference is pending.")
+        recovered = self.store.requeue()
+        if recovered:
+            log.info("Interrupted jobs re-queued after restart.", jobs=recovered)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._cleanup_loop()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Veritabanı, iş parçacıklarında süren ilerleme yazmaları bitmeden kapatılmaz
+        await asyncio.gather(*self._progress_writes, return_exceptions=True)
+        # İşlenmekte olan işler bir sonraki başlatmada tekrar kuyruğa alınır
+        self.store.close()
+
+    def _audio_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.audio")
+
+    async def submit(self, file: BinaryIO, filename: Optional[str], options: Dict[str, Any]) -> Job:
+        loop = asyncio.get_running_loop()
+        queued = await loop.run_in_executor(None, self.store.count, JOB_QUEUED)
+        if queued >= self.max_queued:
+            raise JobQueueFullError("Job queue is full.")
+
+        now = time.time()
+        job = Job(id=uuid.uuid4().hex, status=JOB_QUEUED, filename=filename, options=options, created_at=now, updated_at=now)
+        await loop.run_in_executor(None, self._save_audio, file, self._audio_path(job.id))
+        await loop.run_in_executor(None, self.store.add, job)
+        self._wakeup.set()
+        log.info("Transcription job queued.", job_id=job.id, queued_jobs=queued + 1)
+        return job
+
+    @staticmethod
+    def _save_audio(file: BinaryIO, path: str) -> None:
+        file.seek(0)
+        with open(path, "wb") as target:
+            shutil.copyfileobj(file, target)
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.store.get, job_id)
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job = None
+            if getattr(self._state, "model_ready", False):
+                job = await loop.run_in_executor(None, self.store.claim_next)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=JOB_POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run_job(job)
+
+    async def _resolve_adapter(self, model: Optional[str]):
+        registry = getattr(self._state, "model_registry", None)
+        if registry is None:
+            return self._state.stt_adapter
+        return await registry.get(model or settings.STT_SERVICE_FILE_MODEL or None)
+
+    @contextlib.asynccontextmanager
+    async def _inference_slot(self):
+        """Bir iş parçasının çıkarımı bu bağlamda çalışır; bkz. sınıf açıklaması."""
+        if self._inference_slots is not None:
+            async with self._inference_slots:
+                yield
+            return
+        # Kontrol ile çağrının gönderilmesi arasında event loop'a dönülmez; havuz boşken gönderilir
+        executor = self._state.inference_executor
+        while executor.pending:
+            await asyncio.sleep(JOB_IDLE_POLL_INTERVAL_SECONDS)
+        yield
+
+    async def _run_job(self, job: Job) -> None:
+        loop = asyncio.get_running_loop()
+        log.info("Transcription job started.", job_id=job.id)
+        started = time.perf_counter()
+        executor = self._state.inference_executor
+        progress_writes = []
+
+        def on_progress(progress: float) -> None:
+            future = loop.run_in_executor(None, self.store.update_progress, job.id, progress)
+            self._progress_writes.add(future)
+            future.add_done_callback(self._progress_writes.discard)
+            progress_writes.append(future)
+
+        result, error = None, None
+        try:
+            adapter = await self._resolve_adapter(job.options.get("model"))
+            with open(self._audio_path(job.id), "rb") as audio_file:
+                pcm = await load_audio_file(audio_file)
+            result = await transcribe_pcm(
+                adapter,
+                executor,
+                pcm,
+                job.options.get("language"),
+                logprob_threshold=job.options.get("logprob_threshold"),
+                no_speech_threshold=job.options.get("no_speech_threshold"),
+                on_progress=on_progress,
+                concurrency=max(1, self._job_slots),
+                queue_full_retry_seconds=JOB_RETRY_DELAY_SECONDS,
+                inference_slot=self._inference_slot
+            )
+        except UnknownModelError as e:
+            error = str(e)
+        except AudioTooLongError:
+            error = "Audio is longer than the maximum allowed duration."
+        except InferenceTimeoutError:
+            error = "Transcription timed out."
+        except FfmpegTimeoutError:
+            error = "Audio decoding timed out."
+        except ValueError:
+            error = "Audio file could not be decoded."
+        except Exception as e:
+            log.error("Transcription job failed.", job_id=job.id, error=str(e), exc_info=True)
+            error = "Transcription error"
+
+        # İş, bekleyen ilerleme yazmaları tamamlanmadan sonlandırılmaz
+        await asyncio.gather(*progress_writes, return_exceptions=True)
+        await loop.run_in_executor(None, self.store.finish, job.id, result, error)
+        await loop.run_in_executor(None, self._remove_audio, job.id)
+        log.info(
+            "Transcription job finished.",
+            job_id=job.id,
+            status=JOB_FAILED if error else JOB_COMPLETED,
+            error=error,
+            duration_seconds=round(time.perf_counter() - started, 2)
+        )
+
+        if self.callback_url:
+            finished_job = await loop.run_in_executor(None, self.store.get, job.id)
+            await loop.run_in_executor(None, self._post_callback, finished_job)
+
+    def _remove_audio(self, job_id: str) -> None:
+        try:
+            os.unlink(self._audio_path(job_id))
+        except FileNotFoundError:
+            pass
+
+    def _post_callback(self, job: Job) -> None:
+        payload = json.dumps(job_to_dict(job, include_result=True), ensure_ascii=False).encode("utf-8")
+        request = urllib.request.Request(
+            self.callback_url, data=payload, headers={"Content-Type": "application/json"}, method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.callback_timeout_seconds) as response:
+                log.debug("Job callback delivered.", job_id=job.id, status_code=response.status)
+        except Exception as e:
+            log.warn("Job callback could not be delivered.", job_id=job.id, callback_url=self.callback_url, error=str(e))
+
+    async def _cleanup_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        interval = max(1.0, min(self.retention_seconds, 60.0))
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                expired = await loop.run_in_executor(None, self.cleanup_expired)
+                if expired:
+                    log.info("Expired jobs removed.", jobs=expired)
+            except Exception as e:
+                log.warn("Expired job cleanup failed.", error=str(e))
+
+    def cleanup_expired(self) -> int:
+        expired = self.store.delete_finished_before(time.time() - self.retention_seconds)
+        for job_id in expired:
+            self._remove_audio(job_id)
+        return len(expired)
+
+
+def job_to_dict(job: Job, include_result: bool = False) -> Dict[str, Any]:
+    payload = {
+        "job_id": job.id,
+        "status": job.status,
+        "progress": round(job.progress, 3),
+        "filename": job.filename,
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+    }
+    if include_result and job.result is not None:
+        payload["result"] = job.result.to_dict()
+    return payload
+
+
+def create_job_manager() -> Optional[JobManager]:
+    if not settings.STT_SERVICE_JOBS_ENABLED:
+        log.info("Async job API is disabled.")
+        return None
+
+    jobs_dir = settings.STT_SERVICE_JOBS_DIR or os.path.join(tempfile.gettempdir(), "sentiric-stt-jobs")
+    os.makedirs(jobs_dir, exist_ok=True)
+    manager = JobManager(
+        JobStore(os.path.join(jobs_dir, "jobs.sqlite3")),
+        jobs_dir=jobs_dir,
+        workers=settings.STT_SERVICE_JOBS_WORKERS,
+        max_queued=settings.STT_SERVICE_JOBS_MAX_QUEUED,
+        retention_seconds=settings.STT_SERVICE_JOBS_RETENTION_SECONDS,
+        callback_url=settings.STT_SERVICE_JOBS_CALLBACK_URL or None,
+        callback_timeout_seconds=settings.STT_SERVICE_JOBS_CALLBACK_TIMEOUT_SECONDS
+    )
+    log.info(
+        "Async job manager created.",
+        jobs_dir=jobs_dir,
+        workers=manager.workers,
+        max_queued=manager.max_queued,
+        callback_url=manager.callback_url or "disabled"
+    )
+    return manager
+
+def get_job_manager(request: Request) -> Optional[JobManager]:
+    return getattr(request.app.state, 'job_manager', None)
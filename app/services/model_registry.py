@@ -0,0 +1,233 @@
+# sentiric-stt-service/app/services/model_registry.py
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Type
+import numpy as np
+import structlog
+from fastapi import Request
+from .adapters.base import BaseSTTAdapter, TranscriptionRequest
+from app.core.config import settings
+from app.core.metrics import STARTUP_PHASE_SECONDS
+
+log = structlog.get_logger(__name__)
+
+# int8 ağırlıklarla yüklenmiş modellerin yaklaşık bellek kullanımı (MB)
+MODEL_MEMORY_MB = {"tiny": 150, "base": 300, "small": 700, "medium": 1800, "large": 3500}
+# Hesaplama tipinin bellek kullanımına etkisi (int8'e göre kat)
+COMPUTE_TYPE_MEMORY_FACTOR = {"float16": 2, "bfloat16": 2, "float32": 4}
+
+
+class UnknownModelError(ValueError):
+    """İstenen model varyantı yapılandırılmamış olduğunda fırlatılır."""
+
+
+@dataclass(frozen=True)
+class ModelVariant:
+    name: str
+    model_size: str
+    compute_type: str
+    memory_mb: int
+    # Önceden çevrilmiş yerel CTranslate2 dizini; verilirse model buradan yüklenir
+    model_path: Optional[str] = None
+
+    @property
+    def identity(self) -> str:
+        """Sonucu etkileyen model kimliği (ör. önbellek anahtarları için)."""
+        return f"{self.model_size}:{self.compute_type}"
+
+
+def estimate_memory_mb(model_size: str, compute_type: str) -> int:
+    family = next((name for name in MODEL_MEMORY_MB if name in model_size), "medium")
+    return MODEL_MEMORY_MB[family] * COMPUTE_TYPE_MEMORY_FACTOR.get(compute_type, 1)
+
+
+def parse_model_variants(spec: str) -> List[ModelVariant]:
+    """
+    "isim=model_boyutu:hesaplama_tipi[:bellek_mb]" öğelerinden oluşan virgülle
+    ayrılmış listeyi çözer. Ör: "live=small:int8,archive=large-v3:int8:4000".
+    """
+    variants = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, separator, definition = item.partition("=")
+        fields = definition.split(":")
+        if not separator or not name.strip() or len(fields) not in (2, 3) or not all(fields):
+            raise ValueError(f"Invalid model variant definition: '{item}'")
+        model_size, compute_type = fields[0].strip(), fields[1].strip()
+        memory_mb = int(fields[2]) if len(fields) == 3 else estimate_memory_mb(model_size, compute_type)
+        variants.append(ModelVariant(name.strip(), model_size, compute_type, memory_mb))
+    return variants
+
+
+def parse_warmup_durations(spec: str) -> List[float]:
+    return [float(part) for part in (part.strip() for part in spec.split(",")) if part]
+
+
+def warmup_adapter(adapter: BaseSTTAdapter, durations: List[float]) -> None:
+    """
+    Modeli farklı uzunluktaki sentetik seslerle çalıştırarak ilk gerçek
+    isteklerin ödeyeceği ısınma maliyetini (bellek ayırma, çekirdek seçimi,
+    dil tespiti) başlatma sırasına çeker. Toplu işleme açıksa batch yolu da
+    ısıtılır.
+    """
+    sample_rate = settings.STT_SERVICE_TARGET_SAMPLE_RATE
+    rng = np.random.default_rng(0)
+    # Çok düşük genlikli gürültü: kodlayıcı ve kod çözücü gerçek boyutlarla çalışır
+    samples = [(rng.standard_normal(int(seconds * sample_rate)) * 0.01).astype(np.float32) for seconds in durations]
+
+    for audio in samples:
+        adapter.transcribe(audio)
+    if samples and settings.STT_SERVICE_BATCHING_ENABLED:
+        adapter.transcribe_batch([TranscriptionRequest(audio=audio) for audio in samples[:2]])
+
+
+class ModelRegistry:
+    """
+    Birden fazla model varyantını (ör. canlı görüşmeler için `small`, arşivler
+    için `medium`) tek süreçte yönetir.
+
+    Varyantlar ilk kullanıldıklarında yüklenir. Yeni bir varyantın yüklenmesi
+    `memory_budget_mb` bütçesini aşacaksa en uzun süredir kullanılmayan
+    varyantlar boşaltılır; varsayılan varyant hiçbir zaman boşaltılmaz. Boşaltılan
+    bir model, onu kullanmakta olan istekler bitene kadar bellekte kalır.
+    """
+
+    def __init__(self,
+                 variants: List[ModelVariant],
+                 default_model: str,
+                 memory_budget_mb: int,
+                 adapter_factory: Callable[[ModelVariant], BaseSTTAdapter]):
+        self.variants: Dict[str, ModelVariant] = {variant.name: variant for variant in variants}
+        if default_model not in self.variants:
+            raise ValueError(f"Default model '{default_model}' is not a configured variant.")
+        self.default_model = default_model
+        self.memory_budget_mb = memory_budget_mb
+        self._adapter_factory = adapter_factory
+        self._loaded: "OrderedDict[str, BaseSTTAdapter]" = OrderedDict()
+        # Yüklemeler sırayla yapılır; böylece bütçe hesabı eşzamanlı yüklemelerle bozulmaz
+        self._load_lock = asyncio.Lock()
+
+    @property
+    def loaded_models(self) -> List[str]:
+        return list(self._loaded)
+
+    def resolve(self, name: Optional[str] = None) -> ModelVariant:
+        variant = self.variants.get(name or self.default_model)
+        if variant is None:
+            raise UnknownModelError(f"Unknown model '{name}'. Available models: {', '.join(self.variants)}")
+        return variant
+
+    async def get(self, name: Optional[str] = None) -> BaseSTTAdapter:
+        """İstenen varyantın adaptörünü döndürür; yüklü değilse event loop dışında yükler."""
+        variant = self.resolve(name)
+        adapter = self._loaded.get(variant.name)
+        if adapter is not None:
+            self._loaded.move_to_end(variant.name)
+            return adapter
+
+        async with self._load_lock:
+            adapter = self._loaded.get(variant.name)
+            if adapter is not None:
+                return adapter
+
+            self._evict_for(variant)
+            log.info("Loading model variant.", model=variant.name, model_size=variant.model_size, compute_type=variant.compute_type)
+            loop = asyncio.get_running_loop()
+            adapter = await loop.run_in_executor(None, self._adapter_factory, variant)
+            self._loaded[variant.name] = adapter
+            log.info("Model variant loaded.", model=variant.name, loaded_models=self.loaded_models)
+            return adapter
+
+    def _evict_for(self, variant: ModelVariant) -> None:
+        if self.memory_budget_mb <= 0:
+            return
+
+        used_mb = sum(self.variants[name].memory_mb for name in self._loaded)
+        # OrderedDict sırası en eski kullanılandan en yeniye doğrudur
+        for name in list(self._loaded):
+            if used_mb + variant.memory_mb <= self.memory_budget_mb:
+                break
+            if name == self.default_model:
+                continue
+            del self._loaded[name]
+            used_mb -= self.variants[name].memory_mb
+            log.info("Model variant evicted to stay within memory budget.", model=name, memory_budget_mb=self.memory_budget_mb)
+
+        if used_mb + variant.memory_mb > self.memory_budget_mb:
+            log.warn(
+                "Loading model variant exceeds the memory budget.",
+                model=variant.name,
+                required_mb=used_mb + variant.memory_mb,
+                memory_budget_mb=self.memory_budget_mb
+            )
+
+
+def create_model_registry(adapter_name: str, adapter_class: Type[BaseSTTAdapter]) -> ModelRegistry:
+    default_variant = ModelVariant(
+        name=settings.STT_SERVICE_DEFAULT_MODEL,
+        model_size=settings.STT_SERVICE_MODEL_SIZE,
+        compute_type=settings.STT_SERVICE_COMPUTE_TYPE,
+        memory_mb=estimate_memory_mb(settings.STT_SERVICE_MODEL_SIZE, settings.STT_SERVICE_COMPUTE_TYPE),
+        model_path=settings.STT_SERVICE_MODEL_PATH or None
+    )
+    variants = [default_variant]
+
+    # Sadece faster-whisper adaptörü farklı model boyutu/hesaplama tipiyle örneklenebilir
+    supports_variants = adapter_name == "faster_whisper"
+    extra_variants = parse_model_variants(settings.STT_SERVICE_MODEL_VARIANTS)
+    if extra_variants and not supports_variants:
+        log.warn("Model variants are only supported by the faster_whisper adapter; ignoring them.", adapter_name=adapter_name)
+    elif extra_variants:
+        variants.extend(variant for variant in extra_variants if variant.name != default_variant.name)
+
+    warmup_durations = parse_warmup_durations(settings.STT_SERVICE_WARMUP_DURATIONS)
+
+    def adapter_factory(variant: ModelVariant) -> BaseSTTAdapter:
+        started = time.perf_counter()
+        if not supports_variants:
+            # Uzak API adaptörleri için ısınma yapılmaz; her çağrı ücretli bir istektir
+            adapter = adapter_class()
+            STARTUP_PHASE_SECONDS.labels(phase="load", model=variant.name).set(time.perf_counter() - started)
+            return adapter
+
+        adapter = adapter_class(model_size=variant.model_size, compute_type=variant.compute_type, model_path=variant.model_path)
+        load_seconds = time.perf_counter() - started
+        STARTUP_PHASE_SECONDS.labels(phase="load", model=variant.name).set(load_seconds)
+
+        started = time.perf_counter()
+        try:
+            warmup_adapter(adapter, warmup_durations)
+        except Exception as e:
+            # Isınma başarısız olsa da model kullanılabilir; sadece ilk istekler yavaş olur
+            log.warn("Model warmup failed.", model=variant.name, error=str(e))
+        warmup_seconds = time.perf_counter() - started
+        STARTUP_PHASE_SECONDS.labels(phase="warmup", model=variant.name).set(warmup_seconds)
+
+        log.info(
+            "Model variant ready.",
+            model=variant.name,
+            load_seconds=round(load_seconds, 2),
+            warmup_seconds=round(warmup_seconds, 2),
+            warmup_runs=len(warmup_durations)
+        )
+        return adapter
+
+    registry = ModelRegistry(
+        variants,
+        default_model=default_variant.name,
+        memory_budget_mb=settings.STT_SERVICE_MODEL_MEMORY_BUDGET_MB,
+        adapter_factory=adapter_factory
+    )
+    log.info(
+        "Model registry created.",
+        models=list(registry.variants),
+        default_model=registry.default_model,
+        memory_budget_mb=registry.memory_budget_mb or "unlimited"
+    )
+    return registry
+
+def get_model_registry(request: Request) -> Optional[ModelRegistry]:
+    if not getattr(request.app.state, 'model_ready', False):
+        return None
+    return getattr(request.app.state, 'model_registry', None)
@@ -0,0 +1,250 @@
+# sentiric-stt-service/app/services/multiplex_service.py
+import asyncio
+import json
+import struct
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Deque, Dict, Optional, Set
+import structlog
+from .model_registry import UnknownModelError
+from .session_service import SessionLimitError, SessionManager, StreamSession
+from .streaming_service import AudioIngestQueue, AudioProcessor
+from .stt_service import InferenceQueueFullError
+from app.core.config import settings
+from app.utils.audio import MAX_STREAM_SAMPLE_RATE
+
+log = structlog.get_logger(__name__)
+
+# Çoklu akış modunda her binary mesajın başındaki akış kimliği (4 byte, big-endian, işaretsiz)
+MUX_HEADER = struct.Struct(">I")
+MAX_STREAM_ID = 2 ** 32 - 1
+
+
+@dataclass
+class _MuxStream:
+    stream_id: int
+    processor: Optional[AudioProcessor] = None
+    # Akış açılırken (ör. model yüklenirken) None'dır; gelen ses `pending`'de bekler
+    queue: Optional[AudioIngestQueue] = None
+    session: Optional[StreamSession] = None
+    task: Optional[asyncio.Task] = None
+    pending: Deque[bytes] = field(default_factory=deque)
+    pending_bytes: int = 0
+    # Bekletme sınırı aşıldığı için `pending`'in başından atılan ses (byte)
+    pending_dropped_bytes: int = 0
+    close_requested: bool = False
+
+    def close(self) -> None:
+        if self.queue is not None:
+            self.queue.close()
+        else:
+            self.close_requested = True
+
+
+class MultiplexedSession:
+    """
+    Tek bir WebSocket bağlantısı üzerinden taşınan birden çok ses akışını yönetir.
+
+    Binary mesajlar `MUX_HEADER` ile başlayan akış kimliği ve ardından gelen ses
+    parçasıdır. Metin mesajları JSON kontrol mesajlarıdır:
+    `{"type": "open", "stream_id": 7, ...}` akışı oturum seçenekleriyle
+    (language, codec, sample_rate, model, ...) açar; `{"type": "close", "stream_id": 7}`
+    sesin bittiğini bildirir. Her akışın kendi `AudioProcessor`'ı, alma kuyruğu
+    ve işleme görevi vardır; sunucudan giden her mesaj `stream_id` taşır.
+    Akış kapandığında, kalan konuşması işlendikten sonra `{"type": "closed"}` gönderilir.
+
+    Akışlar arka planda açılır; bir akışın modeli yüklenirken bağlantının
+    okunması durmaz. Açılış sürerken gelen ses bekletilir ve akış açılınca
+    sırasıyla alma kuyruğuna verilir; bekletilen ses sınırı aşarsa en eskisi
+    atılır ve akışa `drop_oldest`'taki gibi bir boşluk olarak bildirilir.
+
+    Alma kuyruğunun `backpressure` politikası, tek bir akışın geride kalması
+    durumunda bağlantıdaki tüm akışların okunmasını durdurur. `session_manager`
+    verilirse her akış süreç genelindeki oturum sınırına sayılır ve boşta
+    kaldığında sunucu tarafından kapatılabilir.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[dict], Awaitable[bool]],
+        create_processor: Callable[[dict], Awaitable[AudioProcessor]],
+        max_streams: int,
+        session_manager: Optional[SessionManager] = None,
+        client: str = ""
+    ):
+        self.send = send
+        self.create_processor = create_processor
+        self.max_streams = max_streams
+        self.session_manager = session_manager
+        self.client = client
+        self.streams: Dict[int, _MuxStream] = {}
+        # Açılış sırasında bekletilebilecek ses; desteklenen en yüksek örnekleme hızında pcm_s16le'ye göre hesaplanır
+        self.max_pending_bytes = int(settings.STT_SERVICE_STREAM_MAX_BUFFER_SECONDS * MAX_STREAM_SAMPLE_RATE * 2)
+        # Ses gönderilen ama açık olmayan akışlar; her biri için tek bir hata gönderilir
+        self._reported_unknown: Set[int] = set()
+
+    async def _send_error(self, message: str, stream_id=None) -> None:
+        error = {"type": "error", "message": message}
+        if stream_id is not None:
+            error["stream_id"] = stream_id
+        await self.send(error)
+
+    async def handle_control(self, text: str) -> None:
+        try:
+            message = json.loads(text)
+            message_type = message["type"]
+            stream_id = int(message["stream_id"])
+        except (ValueError, TypeError, KeyError):
+            await self._send_error("Invalid control message. Expected JSON with 'type' and 'stream_id'.")
+            return
+
+        if message_type == "open":
+            await self.open_stream(stream_id, message)
+        elif message_type == "close":
+            stream = self.streams.get(stream_id)
+            if stream is None:
+                await self._send_error("Unknown stream.", stream_id)
+                return
+            stream.close()
+        else:
+            await self._send_error(f"Unknown control message type: {message_type}", stream_id)
+
+    async def open_stream(self, stream_id: int, options: dict) -> None:
+        if not 0 <= stream_id <= MAX_STREAM_ID:
+            await self._send_error("Stream id must be a 32-bit unsigned integer.", stream_id)
+            return
+        if stream_id in self.streams:
+            await self._send_error("Stream is already open.", stream_id)
+            return
+        if len(self.streams) >= self.max_streams:
+            await self._send_error(f"Too many open streams on this connection (max {self.max_streams}).", stream_id)
+            return
+
+        # İşlemci arka planda oluşturulur; bu sırada bağlantıdaki diğer akışların sesi okunmaya devam eder
+        stream = _MuxStream(stream_id=stream_id)
+        self.streams[stream_id] = stream
+        self._reported_unknown.discard(stream_id)
+        stream.task = asyncio.create_task(self._open_and_run(stream, options))
+
+    async def _open_and_run(self, stream: _MuxStream, options: dict) -> None:
+        stream_id = stream.stream_id
+        try:
+            processor = await self.create_processor(options)
+        except (UnknownModelError, ValueError) as e:
+            # UnknownModelError de ValueError'dır; ikisi de istemci hatasıdır (bilinmeyen model, geçersiz codec)
+            self.streams.pop(stream_id, None)
+            await self._send_error(str(e), stream_id)
+            return
+        except Exception as e:
+            log.error("Could not open multiplexed stream.", stream_id=stream_id, error=str(e))
+            self.streams.pop(stream_id, None)
+            await self._send_error("Stream could not be opened.", stream_id)
+            return
+
+        async def on_overload(message: dict) -> None:
+            await self.send({**message, "stream_id": stream_id})
+
+        queue = AudioIngestQueue(
+            processor.input_bytes_per_second,
+            settings.STT_SERVICE_STREAM_MAX_BUFFER_SECONDS,
+            policy=settings.STT_SERVICE_STREAM_OVERLOAD_POLICY,
+            on_overload=on_overload,
+            frame_bytes=processor.input_frame_bytes
+        )
+        stream.processor = processor
+        if self.session_manager is not None:
+            try:
+                stream.session = self.session_manager.register(processor, queue, f"{self.client}#{stream_id}")
+            except SessionLimitError as e:
+                self.streams.pop(stream_id, None)
+                await self._send_error(str(e), stream_id)
+                return
+        await self.send({"type": "opened", "stream_id": stream_id})
+
+        processing = asyncio.create_task(self._run_stream(stream, queue))
+        if stream.pending_dropped_bytes:
+            self._align_pending_drop(stream, processor.input_frame_bytes)
+            queue.report_gap(stream.pending_dropped_bytes)
+        # Açılış sırasında bekleyen ses sırasıyla kuyruğa verilir; bu arada gelen ses de `pending`'in sonuna eklenir
+        while stream.pending:
+            chunk = stream.pending.popleft()
+            stream.pending_bytes -= len(chunk)
+            await queue.put(chunk)
+        stream.queue = queue
+        if stream.close_requested:
+            queue.close()
+        await processing
+
+    async def _run_stream(self, stream: _MuxStream, queue: AudioIngestQueue) -> None:
+        try:
+            async for result in stream.processor.transcribe_stream(queue.chunks()):
+                if not await self.send({**result, "stream_id": stream.stream_id}):
+                    return
+            await self.send({"type": "closed", "stream_id": stream.stream_id})
+        except InferenceQueueFullError:
+            # Kuyruk dolu: sadece bu akış kapatılır, bağlantıdaki diğer akışlar sürer
+            log.warn("Closing multiplexed stream: inference queue is full.", stream_id=stream.stream_id)
+            await self._send_error("Server is busy, please try again later.", stream.stream_id)
+        except Exception as e:
+            log.error("Unexpected error in multiplexed stream.", stream_id=stream.stream_id, error=str(e), exc_info=True)
+            await self._send_error("Transcription error", stream.stream_id)
+        finally:
+            if stream.session is not None:
+                self.session_manager.unregister(stream.session)
+            queue.close()
+            self.streams.pop(stream.stream_id, None)
+
+    async def feed(self, frame: bytes) -> None:
+        """Başlığındaki akış kimliğine göre bir binary mesajı ilgili akışın kuyruğuna ekler."""
+        if len(frame) < MUX_HEADER.size:
+            await self._send_error("Binary message is shorter than the stream id header.")
+            return
+        (stream_id,) = MUX_HEADER.unpack_from(frame)
+        stream = self.streams.get(stream_id)
+        if stream is None:
+            # Kapanmış ya da hiç açılmamış akışa gelen her parça için değil, akış başına bir kez bildirilir
+            if stream_id not in self._reported_unknown:
+                self._reported_unknown.add(stream_id)
+                await self._send_error("Unknown stream.", stream_id)
+            return
+        # Ses, başlık atlanarak kopyalanmadan kuyruğa verilir
+        audio = memoryview(frame)[MUX_HEADER.size:]
+        if stream.queue is None:
+            self._hold_while_opening(stream, audio)
+            return
+        await stream.queue.put(audio)
+
+    def _hold_while_opening(self, stream: _MuxStream, audio: memoryview) -> None:
+        if stream.close_requested:
+            return
+        stream.pending.append(audio)
+        stream.pending_bytes += len(audio)
+        while stream.pending_bytes > self.max_pending_bytes:
+            if not stream.pending_dropped_bytes:
+                log.warn("Dropping the oldest audio of a stream that is still opening.", stream_id=stream.stream_id)
+            dropped = stream.pending.popleft()
+            stream.pending_bytes -= len(dropped)
+            stream.pending_dropped_bytes += len(dropped)
+
+    @staticmethod
+    def _align_pending_drop(stream: _MuxStream, frame_bytes: int) -> None:
+        """Atılan sesi frame katına tamamlar; böylece kalan sesin örnek ve frame hizası korunur."""
+        extra = -stream.pending_dropped_bytes % frame_bytes
+        while extra and stream.pending:
+            head = stream.pending[0]
+            if len(head) <= extra:
+                stream.pending.popleft()
+                removed = len(head)
+            else:
+                stream.pending[0] = head[extra:]
+                removed = extra
+            extra -= removed
+            stream.pending_bytes -= removed
+            stream.pending_dropped_bytes += removed
+
+    async def close(self) -> None:
+        """Bağlantı kapanırken tüm akışların alımını bitirir ve işlenmelerini bekler."""
+        streams = list(self.streams.values())
+        for stream in streams:
+            stream.close()
+        await asyncio.gather(*(stream.task for stream in streams), return_exceptions=True)
@@ -0,0 +1,163 @@
+# sentiric-stt-service/app/services/session_service.py
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+import structlog
+from fastapi import Request
+from .streaming_service import AudioIngestQueue, AudioProcessor
+from app.core.config import settings
+from app.core.metrics import (
+    ACTIVE_STREAMING_SESSIONS, STREAM_INGEST_BUFFERED_SECONDS, STREAM_SESSIONS_RECLAIMED, STREAM_SESSIONS_REJECTED,
+    STREAMING_SESSION_LIMIT
+)
+
+log = structlog.get_logger(__name__)
+
+RECLAIM_REASON_IDLE = "idle"
+RECLAIM_REASON_NO_SPEECH = "no_speech"
+
+
+class SessionLimitError(Exception):
+    """Süreçteki akış oturumu sayısı sınıra ulaştığında fırlatılır."""
+
+
+@dataclass
+class StreamSession:
+    """Oturum yöneticisinin takip ettiği tek bir akış (WebSocket ya da çoklu akış bağlantısındaki bir akış)."""
+    id: int
+    client: str
+    # Yer ayrılıp henüz işlemci/kuyruk kurulmamış oturumda ikisi de None'dır
+    processor: Optional[AudioProcessor] = None
+    queue: Optional[AudioIngestQueue] = None
+    opened_at: float = field(default_factory=time.monotonic)
+    reclaimed: Optional[str] = None
+
+
+class SessionManager:
+    """
+    Süreçteki tüm canlı akış oturumlarını (`AudioProcessor` + alma kuyruğu)
+    takip eder. Eşzamanlı oturum sayısını `max_sessions` ile sınırlar ve
+    periyodik bir tarama ile boşta kalan oturumların alımını kapatır: hiç ses
+    gelmeyen (`idle_timeout_seconds`, ör. yarı açık bağlantı) ya da ses gelse
+    de konuşma içermeyen (`no_speech_timeout_seconds`, ör. takılı hat) oturumlar.
+    Kapatılan oturum, kuyruğundaki konuşmayı işledikten sonra normal şekilde biter.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int,
+        idle_timeout_seconds: float,
+        no_speech_timeout_seconds: float,
+        sweep_interval_seconds: float
+    ):
+        self.max_sessions = max_sessions
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.no_speech_timeout_seconds = no_speech_timeout_seconds
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self._sessions: Dict[int, StreamSession] = {}
+        self._ids = itertools.count(1)
+        self._task: Optional[asyncio.Task] = None
+        STREAMING_SESSION_LIMIT.set(max_sessions)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def reserve(self, client: str) -> StreamSession:
+        """
+        Sınırdan bir oturum yeri ayırır. Bağlantı kabul edilir edilmez, model
+        çözümleme ve işlemci kurulumu gibi ağır işlerden önce çağrılır; işlemci
+        ve kuyruk hazır olunca `attach` ile bağlanır.
+        """
+        if self.max_sessions and len(self._sessions) >= self.max_sessions:
+            STREAM_SESSIONS_REJECTED.inc()
+            raise SessionLimitError(f"Too many active streaming sessions (max {self.max_sessions}).")
+        session = StreamSession(id=next(self._ids), client=client)
+        self._sessions[session.id] = session
+        ACTIVE_STREAMING_SESSIONS.inc()
+        return session
+
+    def attach(self, session: StreamSession, processor: AudioProcessor, queue: AudioIngestQueue) -> None:
+        session.processor = processor
+        session.queue = queue
+
+    def register(self, processor: AudioProcessor, queue: AudioIngestQueue, client: str) -> StreamSession:
+        session = self.reserve(client)
+        self.attach(session, processor, queue)
+        return session
+
+    def unregister(self, session: StreamSession) -> None:
+        if self._sessions.pop(session.id, None) is not None:
+            ACTIVE_STREAMING_SESSIONS.dec()
+
+    def _reclaim_reason(self, session: StreamSession, now: float) -> Optional[str]:
+        if self.idle_timeout_seconds and now - session.queue.last_activity > self.idle_timeout_seconds:
+            return RECLAIM_REASON_IDLE
+        if self.no_speech_timeout_seconds and now - session.processor.last_speech_activity > self.no_speech_timeout_seconds:
+            return RECLAIM_REASON_NO_SPEECH
+        return None
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Boşta kalan oturumların alımını kapatır ve oturum metriklerini günceller; kapatılan oturum sayısını döner."""
+        now = time.monotonic() if now is None else now
+        reclaimed = 0
+        buffered_seconds = 0.0
+        for session in list(self._sessions.values()):
+            # Henüz kurulmakta olan oturumun izlenecek alımı yoktur
+            if session.queue is None or session.processor is None:
+                continue
+            buffered_seconds += session.queue.buffered_seconds
+            if session.queue.closed:
+                continue
+            reason = self._reclaim_reason(session, now)
+            if reason is None:
+                continue
+            log.warn(
+                "Reclaiming idle streaming session.",
+                session_id=session.id, client=session.client, reason=reason,
+                age_seconds=round(now - session.opened_at, 1)
+            )
+            STREAM_SESSIONS_RECLAIMED.labels(reason=reason).inc()
+            session.reclaimed = reason
+            session.queue.close()
+            reclaimed += 1
+        STREAM_INGEST_BUFFERED_SECONDS.set(buffered_seconds)
+        return reclaimed
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval_seconds)
+            try:
+                self.sweep()
+            except Exception as e:
+                log.error("Streaming session sweep failed.", error=str(e), exc_info=True)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._sweep_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+def create_session_manager() -> SessionManager:
+    manager = SessionManager(
+        max_sessions=settings.STT_SERVICE_MAX_STREAMING_SESSIONS,
+        idle_timeout_seconds=settings.STT_SERVICE_SESSION_IDLE_TIMEOUT_SECONDS,
+        no_speech_timeout_seconds=settings.STT_SERVICE_SESSION_NO_SPEECH_TIMEOUT_SECONDS,
+        sweep_interval_seconds=max(0.1, settings.STT_SERVICE_SESSION_SWEEP_INTERVAL_SECONDS)
+    )
+    log.info(
+        "Streaming session manager created.",
+        max_sessions=manager.max_sessions,
+        idle_timeout_seconds=manager.idle_timeout_seconds,
+        no_speech_timeout_seconds=manager.no_speech_timeout_seconds
+    )
+    return manager
+
+
+def get_session_manager(request: Request) -> Optional[SessionManager]:
+    return getattr(request.app.state, 'session_manager', None)
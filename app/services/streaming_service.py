@@ -1,40 +1,284 @@
 # sentiric-stt-service/app/services/streaming_service.py
+import asyncio
 import time
-import collections
-import webrtcvad
+from collections import deque
+from dataclasses import dataclass
 import numpy as np
 import structlog
-from typing import AsyncGenerator, Optional
-from .adapters.base import BaseSTTAdapter
+from typing import AsyncGenerator, Awaitable, Callable, Deque, List, Optional, Union
+from .adapters.base import DECODING_TIER_STREAMING, BaseSTTAdapter, TranscriptionRequest, TranscriptionResult
+from .batching_service import BatchScheduler
+from .stt_service import InferenceExecutor, InferenceQueueFullError, InferenceTimeoutError
+from .vad_service import VAD_FRAME_DURATION_MS, create_vad
 from app.core.config import settings
+from app.core.metrics import (
+    AUDIO_DECODE_SECONDS, BUFFERED_SPEECH_SECONDS, FORCED_UTTERANCE_SPLITS, STREAM_DROPPED_AUDIO_SECONDS, STREAM_OVERLOADS,
+    VAD_PROCESSING_SECONDS
+)
+from app.utils.audio import CODEC_PCM_S16LE, StreamDecoder
+from app.utils.audio_buffers import FrameAssembler, FrameRingBuffer, SpeechBuffer
 
 log = structlog.get_logger(__name__)
 
+OVERLOAD_POLICY_DROP_OLDEST = "drop_oldest"
+OVERLOAD_POLICY_BACKPRESSURE = "backpressure"
+OVERLOAD_POLICIES = (OVERLOAD_POLICY_DROP_OLDEST, OVERLOAD_POLICY_BACKPRESSURE)
+
+
+# Bölünmüş bir cümlenin örtüşme bölgesinde tekrar edebilecek en fazla kelime sayısı
+MAX_OVERLAP_WORDS = 6
+_WORD_PUNCTUATION = ".,!?;:…\"'"
+
+
+def repeated_prefix_length(previous: str, text: str, max_words: int = MAX_OVERLAP_WORDS) -> int:
+    """
+    `text`'in başındaki, `previous`'ın sonunda zaten bulunan kelime sayısını döner.
+    Cümle bölünürken örtüşen ses iki parçada da çözüldüğü için tekrar eden
+    kelimeleri ayıklamakta kullanılır; noktalama ve büyük/küçük harf yok sayılır.
+    """
+    previous_words = [word.strip(_WORD_PUNCTUATION).lower() for word in previous.split()]
+    words = [word.strip(_WORD_PUNCTUATION).lower() for word in text.split()]
+    for count in range(min(max_words, len(previous_words), len(words)), 0, -1):
+        if previous_words[-count:] == words[:count]:
+            return count
+    return 0
+
+
+class PartialHypothesisStabilizer:
+    """
+    Ara (partial) sonuçlar için "local agreement" politikası uygular: art arda
+    iki hipotezde aynı kalan kelime öneki kesinleşmiş (committed) kabul edilir
+    ve sonraki hipotezler ne derse desin bir daha değiştirilmez. Böylece
+    istemciye gönderilen kesinleşmiş kelimeler titremez (flicker).
+    """
+
+    def __init__(self):
+        self.committed: List[str] = []
+        self.previous: List[str] = []
+
+    def update(self, hypothesis: str) -> tuple[str, str]:
+        """
+        Yeni hipotezi işler.
+
+        Returns:
+            (kesinleşmiş metin, kesinleşmiş metin + henüz kesinleşmemiş kuyruk)
+        """
+        # Kesinleşmiş kelimeler sabittir; yeni hipotezin sadece onlardan sonraki kısmı değerlendirilir
+        tail = hypothesis.split()[len(self.committed):]
+
+        previous_tail = self.previous[len(self.committed):]
+        agreed = 0
+        for current_word, previous_word in zip(tail, previous_tail):
+            if current_word != previous_word:
+                break
+            agreed += 1
+
+        self.committed.extend(tail[:agreed])
+        self.previous = self.committed + tail[agreed:]
+
+        stable_text = " ".join(self.committed)
+        return stable_text, " ".join(self.previous)
+
+    def reset(self) -> None:
+        self.committed.clear()
+        self.previous.clear()
+
+
+@dataclass(frozen=True)
+class AudioGap:
+    """
+    `drop_oldest` politikasıyla atılan sesin akıştaki yeri. `AudioIngestQueue.chunks`
+    bunu atılan sesten sonraki ilk parçadan önce verir; `input_bytes` atılan
+    (henüz çözülmemiş) sesin byte sayısıdır.
+    """
+    input_bytes: int
+
+
+class AudioIngestQueue:
+    """
+    Bir akış oturumunda soketten alınan ses parçalarını işleme (VAD ve çıkarım)
+    görevine aktaran, ses süresiyle sınırlı kuyruk. Alma ve işleme ayrı
+    görevlerde çalıştığından bir cümle çözülürken de soketten okunmaya devam edilir.
+
+    Kuyruktaki ses `max_seconds`'ı aşacaksa politika uygulanır: `drop_oldest`
+    en eski sesi `frame_bytes`'ın katları halinde atar (alım gerçek zamanlı
+    kalır; örnek ve frame hizası bozulmaz) ve atılan sesin yerine `AudioGap`
+    verir; `backpressure` yer açılana kadar `put`'u bekletir (soketten okuma
+    durur ve TCP akış kontrolü istemciyi yavaşlatır). Her aşırı yük döneminin
+    başında, kuyruk tamamen boşalana kadar bir kez `on_overload` ile
+    `{"type": "overload"}` mesajı iletilir.
+    """
+
+    def __init__(
+        self,
+        bytes_per_second: int,
+        max_seconds: float,
+        policy: str = OVERLOAD_POLICY_DROP_OLDEST,
+        on_overload: Optional[Callable[[dict], Awaitable]] = None,
+        frame_bytes: int = 1
+    ):
+        if policy not in OVERLOAD_POLICIES:
+            log.warn("Unknown stream overload policy, falling back to drop_oldest.", policy=policy)
+            policy = OVERLOAD_POLICY_DROP_OLDEST
+        self.bytes_per_second = bytes_per_second
+        self.max_bytes = max(1, int(bytes_per_second * max_seconds))
+        self.policy = policy
+        self.on_overload = on_overload
+        self.frame_bytes = max(1, frame_bytes)
+        self.overloaded = False
+        self.dropped_bytes = 0
+        # Atılmış ama henüz tüketiciye `AudioGap` olarak bildirilmemiş ses (byte)
+        self._gap_bytes = 0
+        # Soketten son ses alınan zaman (time.monotonic); oturum yöneticisi boşta kalan oturumları bununla bulur
+        self.last_activity = time.monotonic()
+        self._chunks: Deque[bytes] = deque()
+        self._size = 0
+        self._closed = False
+        self._readable = asyncio.Event()
+        self._writable = asyncio.Event()
+        self._writable.set()
+
+    @property
+    def buffered_seconds(self) -> float:
+        return self._size / self.bytes_per_second
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _fits(self, chunk: bytes) -> bool:
+        # Limitten büyük tek bir parça, kuyruk boşken her zaman kabul edilir
+        return not self._size or self._size + len(chunk) <= self.max_bytes
+
+    async def put(self, chunk: bytes) -> None:
+        if self._closed:
+            return
+        self.last_activity = time.monotonic()
+        if not self._fits(chunk):
+            if not self.overloaded:
+                self.overloaded = True
+                STREAM_OVERLOADS.labels(policy=self.policy).inc()
+                log.warn("Stream is falling behind real time.", policy=self.policy, buffered_seconds=round(self.buffered_seconds, 2))
+                if self.on_overload:
+                    await self.on_overload({
+                        "type": "overload",
+                        "policy": self.policy,
+                        "buffered_ms": int(self.buffered_seconds * 1000)
+                    })
+
+            if self.policy == OVERLOAD_POLICY_BACKPRESSURE:
+                while not self._fits(chunk) and not self._closed:
+                    self._writable.clear()
+                    await self._writable.wait()
+            else:
+                self._drop_oldest(self._size + len(chunk) - self.max_bytes)
+
+        if self._closed:
+            return
+        self._chunks.append(chunk)
+        self._size += len(chunk)
+        self._readable.set()
+
+    def _drop_oldest(self, excess: int) -> None:
+        """Kuyruğun başından en az `excess` byte'ı, `frame_bytes`'ın katı olacak şekilde atar."""
+        frame_bytes = self.frame_bytes
+        dropped = min(-(-excess // frame_bytes) * frame_bytes, self._size - self._size % frame_bytes)
+        remaining = dropped
+        while remaining:
+            head = self._chunks[0]
+            if len(head) <= remaining:
+                self._chunks.popleft()
+                remaining -= len(head)
+            else:
+                # Parça ortasından bölünür; kalan kısım sırasını korur
+                self._chunks[0] = head[remaining:]
+                remaining = 0
+        self._size -= dropped
+        self._gap_bytes += dropped
+        self.dropped_bytes += dropped
+        STREAM_DROPPED_AUDIO_SECONDS.inc(dropped / self.bytes_per_second)
+
+    def report_gap(self, input_bytes: int) -> None:
+        """
+        Kuyruğa ulaşmadan atılan sesi (ör. akış açılırken taşan ses) kuyruğun
+        başına `AudioGap` olarak ekler; kuyruk boşken çağrılmalıdır.
+        """
+        self._gap_bytes += input_bytes
+        self.dropped_bytes += input_bytes
+        STREAM_DROPPED_AUDIO_SECONDS.inc(input_bytes / self.bytes_per_second)
+        self._readable.set()
+
+    def close(self) -> None:
+        """Alımın bittiğini bildirir; `chunks` kalan parçaları verdikten sonra sonlanır."""
+        self._closed = True
+        self._readable.set()
+        self._writable.set()
+
+    async def chunks(self) -> AsyncGenerator[Union[bytes, AudioGap], None]:
+        while True:
+            if self._gap_bytes:
+                gap = AudioGap(self._gap_bytes)
+                self._gap_bytes = 0
+                yield gap
+            elif self._chunks:
+                chunk = self._chunks.popleft()
+                self._size -= len(chunk)
+                if not self._chunks:
+                    self.overloaded = False
+                self._writable.set()
+                yield chunk
+            elif self._closed:
+                return
+            else:
+                self._readable.clear()
+                await self._readable.wait()
+
+
 class AudioProcessor:
     def __init__(self,
                  adapter: BaseSTTAdapter,
+                 executor: InferenceExecutor,
                  language: str | None = None,
                  logprob_threshold: Optional[float] = None,
-                 no_speech_threshold: Optional[float] = None):
+                 no_speech_threshold: Optional[float] = None,
+                 scheduler: Optional[BatchScheduler] = None,
+                 partial_results: Optional[bool] = None,
+                 codec: str = CODEC_PCM_S16LE,
+                 sample_rate: int = 16000,
+                 timestamps: bool = False,
+                 word_timestamps: bool = False):
         
         self.adapter = adapter
+        self.executor = executor
+        self.scheduler = scheduler
         self.language = language
         self.logprob_threshold = logprob_threshold
         self.no_speech_threshold = no_speech_threshold
+        # Nihai sonuçlara cümlenin akış başına göre başlangıç/bitiş zamanı eklenir;
+        # kelime zaman damgaları bunu da gerektirir
+        self.word_timestamps = word_timestamps
+        self.timestamps = timestamps or word_timestamps
+
+        # Dil verilmediyse, ilk yeterince uzun ve güvenilir tespitten sonra oturum dili sabitlenir
+        self.language_pinning = language is None and settings.STT_SERVICE_LANGUAGE_PINNING_ENABLED
+        self.pinned_language: Optional[str] = None
+        self.language_pinned_at_frame = 0
+
+        # Giriş sesi 16kHz PCM değilse (ör. 8kHz G.711), VAD'dan önce çözülüp yeniden örneklenir.
+        # Geçersiz codec/örnekleme hızı için ValueError fırlatır.
+        decoder = StreamDecoder(codec, sample_rate, target_sample_rate=16000)
+        self.input_decoder = None if decoder.is_passthrough else decoder
+        # Alınan (henüz çözülmemiş) sesin saniyedeki byte sayısı; G.711 örnek başına 1 byte'tır
+        input_sample_bytes = 2 if codec == CODEC_PCM_S16LE else 1
+        self.input_bytes_per_second = sample_rate * input_sample_bytes
+        # Bir VAD frame'ine karşılık gelen giriş sesi (byte); alma kuyruğu sesi bu birimlerle atar
+        self.input_frame_bytes = max(1, round(sample_rate * VAD_FRAME_DURATION_MS / 1000)) * input_sample_bytes
 
         # VAD'ı yapılandır
-        self.vad = webrtcvad.Vad()
-        try:
-            # Ortam değişkeninden gelen değeri kullan
-            aggressiveness = settings.STT_SERVICE_VAD_AGGRESSIVENESS
-            self.vad.set_mode(aggressiveness)
-            log.info("VAD initialized", aggressiveness=aggressiveness)
-        except Exception as e:
-            log.error("Failed to set VAD mode, defaulting to 1.", error=str(e))
-            self.vad.set_mode(1) # Hata durumunda güvenli bir varsayılana dön
+        self.vad = create_vad()
 
         # VAD, 10, 20 veya 30 ms'lik frame'ler üzerinde çalışır. 30ms en verimlisidir.
-        self.frame_duration_ms = 30
+        self.frame_duration_ms = VAD_FRAME_DURATION_MS
         # 16-bit PCM (2 byte) * 16000 sample/s -> 32000 byte/s
         # 30ms'lik bir frame'in byte cinsinden boyutu
         self.frame_size_bytes = int(16000 * 2 * (self.frame_duration_ms / 1000.0))
@@ -46,109 +290,428 @@ class AudioProcessor:
         
         # Ring buffer, belirli bir süre boyunca ses frame'lerini tutar
         self.ring_buffer_frames = int(self.padding_duration_ms / self.frame_duration_ms)
-        self.ring_buffer = collections.deque(maxlen=self.ring_buffer_frames)
+        self.ring_buffer = FrameRingBuffer(self.ring_buffer_frames, self.frame_size_bytes // 2)
 
         # Durum değişkenleri
         self.triggered = False
-        self.speech_frames = []
+        self.frame_assembler = FrameAssembler(self.frame_size_bytes)
+        self.speech_buffer = SpeechBuffer(sample_rate=16000)
         self.silence_frames_count = 0
-        self.last_activity = time.time()
-        self.no_speech_timeout_seconds = 10 # Uzun sessizlikler için timeout
+        # Akışın başından beri işlenen frame sayısı ve mevcut cümlenin ilk örneği (zaman damgaları için)
+        self.frames_processed = 0
+        self.utterance_start_sample = 0
+
+        # Sessizlik gelmese de cümle bu uzunlukta, sınırdan önceki arama aralığındaki en sessiz frame'den bölünür
+        frame_samples = self.frame_size_bytes // 2
+        max_utterance_frames = int(settings.STT_SERVICE_VAD_MAX_UTTERANCE_SECONDS * 1000 // self.frame_duration_ms)
+        self.max_utterance_samples = max_utterance_frames * frame_samples if max_utterance_frames > 0 else None
+        self.split_search_frames = max(1, settings.STT_SERVICE_VAD_SPLIT_SEARCH_MS // self.frame_duration_ms)
+        self.split_overlap_samples = 16000 * settings.STT_SERVICE_VAD_SPLIT_OVERLAP_MS // 1000
+        # Bölünen cümlenin önceki parçasının metni; örtüşmede tekrar eden kelimeler bununla ayıklanır
+        self.previous_split_text: Optional[str] = None
+        # Son işlenen parçanın ve son konuşma içeren parçanın zamanı (time.monotonic); oturum
+        # yöneticisi ses gelse de konuşma olmayan (takılı hat) oturumları bununla bulur
+        self.last_activity = time.monotonic()
+        self.last_speech_activity = self.last_activity
+
+        # Ara (partial) sonuç ayarları
+        self.partial_results = settings.STT_SERVICE_PARTIAL_RESULTS_ENABLED if partial_results is None else partial_results
+        self.partial_interval_frames = max(1, settings.STT_SERVICE_PARTIAL_INTERVAL_MS // self.frame_duration_ms)
+        self.partial_frames_until_next = self.partial_interval_frames
+        self.partial_stabilizer = PartialHypothesisStabilizer()
+
+        # Bu oturumun BUFFERED_SPEECH_SECONDS metriğine en son eklediği değer
+        self._reported_buffered_seconds = 0.0
+
+    def _report_buffered_speech(self) -> None:
+        buffered_seconds = self.speech_buffer.duration_ms / 1000
+        BUFFERED_SPEECH_SECONDS.inc(buffered_seconds - self._reported_buffered_seconds)
+        self._reported_buffered_seconds = buffered_seconds
+
+    async def _infer(self, inference: Awaitable):
+        """
+        `speech_buffer.as_float32` görünümü üzerinde çalışan bir çıkarımı bekler.
+        Zaman aşımı ya da iptalde model çağrısı iş parçacığında sürebileceği için
+        ortak float32 tamponu bırakılır; sonraki cümle onun üzerine yazmaz.
+        """
+        try:
+            return await inference
+        except (InferenceTimeoutError, asyncio.CancelledError):
+            self.speech_buffer.detach_float_buffer()
+            raise
+
+    async def _transcribe(self, audio_np: np.ndarray) -> str:
+        """
+        Sesi, varsa diğer oturumlarla birlikte toplu (batch) işlenmek üzere
+        scheduler'a, yoksa doğrudan inference executor'a gönderir. Her iki yol da
+        model çağrısını event loop dışında çalıştırır.
+        """
+        if self.scheduler:
+            request = TranscriptionRequest(
+                audio=audio_np,
+                language=self._decoding_language(),
+                logprob_threshold=self.logprob_threshold,
+                no_speech_threshold=self.no_speech_threshold,
+                tier=DECODING_TIER_STREAMING
+            )
+            return await self._infer(self.scheduler.transcribe(self.adapter, request))
 
-    async def _process_utterance(self) -> dict | None:
-        """Birikmiş konuşma sesini (utterance) işler ve transkripsiyon yapar."""
-        if not self.speech_frames:
+        return await self._infer(self.executor.run(
+            self.adapter.transcribe,
+            audio_np,
+            self._decoding_language(),
+            logprob_threshold=self.logprob_threshold,
+            no_speech_threshold=self.no_speech_threshold,
+            tier=DECODING_TIER_STREAMING
+        ))
+
+    async def _transcribe_detailed(self, audio_np: np.ndarray) -> TranscriptionResult:
+        """
+        Kelime zamanları ya da tespit edilen dil gerektiğinde kullanılır. Toplu
+        işleme yolu sadece metin döndürdüğü için scheduler atlanır ve doğrudan
+        executor kullanılır.
+        """
+        return await self._infer(self.executor.run(
+            self.adapter.transcribe_detailed,
+            audio_np,
+            self._decoding_language(),
+            logprob_threshold=self.logprob_threshold,
+            no_speech_threshold=self.no_speech_threshold,
+            word_timestamps=self.word_timestamps,
+            tier=DECODING_TIER_STREAMING
+        ))
+
+    def _needs_language_detection(self) -> bool:
+        if not self.language_pinning:
+            return False
+        if self.pinned_language is None:
+            return True
+        redetect_seconds = settings.STT_SERVICE_LANGUAGE_REDETECT_SECONDS
+        if redetect_seconds <= 0:
+            return False
+        elapsed_seconds = (self.frames_processed - self.language_pinned_at_frame) * self.frame_duration_ms / 1000
+        return elapsed_seconds >= redetect_seconds
+
+    def _decoding_language(self) -> Optional[str]:
+        """
+        Modele verilecek dil; None ise model dili kendisi tespit eder. Dil bir
+        kez sabitlendikten sonra, yeniden tespit sırasında da sabit dille çözülür.
+        """
+        return self.language or self.pinned_language
+
+    def _maybe_pin_language(self, language: Optional[str], probability: Optional[float], duration_seconds: float) -> None:
+        """Tespit yeterince uzun bir cümleden ve yüksek olasılıkla geldiyse oturum dilini sabitler."""
+        if not language or probability is None:
+            # Adaptör tespit ettiği dili bildirmiyor; bu oturumda (yeniden) tespit denemesi bırakılır
+            self.language_pinning = False
+            return
+        if (duration_seconds < settings.STT_SERVICE_LANGUAGE_PIN_MIN_SECONDS
+                or probability < settings.STT_SERVICE_LANGUAGE_PIN_MIN_PROBABILITY):
+            log.debug(
+                "Language detection not confident enough to pin.",
+                language=language, probability=round(probability, 2), duration_seconds=round(duration_seconds, 2)
+            )
+            return
+        if language != self.pinned_language:
+            log.info(
+                "Pinned session language.",
+                language=language, previous=self.pinned_language, probability=round(probability, 2)
+            )
+        self.pinned_language = language
+        self.language_pinned_at_frame = self.frames_processed
+
+    async def _redetect_language(self, audio_np: np.ndarray, duration_seconds: float) -> None:
+        """
+        Sabitlenmiş dili ayrı bir dil tespiti çağrısıyla yeniler; cümlenin
+        kendisi bu sırada sabit dille çözülmüş olur.
+        """
+        try:
+            language, probability = await self._infer(self.executor.run(self.adapter.detect_language, audio_np))
+        except InferenceQueueFullError:
+            # Tespit bir sonraki cümlede yeniden denenir
+            log.debug("Skipping language re-detection because the inference queue is full.")
+            return
+        self._maybe_pin_language(language, probability, duration_seconds)
+
+    def _final_result(self, text: str, start_seconds: float, duration_seconds: float,
+                      detailed: Optional[TranscriptionResult] = None, skip_words: int = 0) -> dict:
+        result = {"type": "final", "text": text}
+        if self.timestamps:
+            result["start"] = round(start_seconds, 3)
+            result["end"] = round(start_seconds + duration_seconds, 3)
+        if detailed is not None:
+            confidences = [segment.confidence for segment in detailed.segments if segment.confidence is not None]
+            result["confidence"] = round(sum(confidences) / len(confidences), 4) if confidences else None
+            # Kelime zamanları cümleye göredir; akışın başına göre kaydırılır
+            result["words"] = [
+                {
+                    "start": round(start_seconds + word.start, 3),
+                    "end": round(start_seconds + word.end, 3),
+                    "word": word.word,
+                    "probability": round(word.probability, 4)
+                }
+                for segment in detailed.segments
+                for word in segment.words
+            ][skip_words:]
+        return result
+
+    def _partial_allowed(self) -> bool:
+        """Sistem yük altındayken ara sonuç üretimini kısıtlar."""
+        load = self.executor.pending / self.executor.max_pending
+        return load < settings.STT_SERVICE_PARTIAL_MAX_QUEUE_LOAD
+
+    async def _process_partial(self) -> dict | None:
+        """Devam eden konuşmanın o ana kadarki kısmını çözerek ara sonuç üretir."""
+        speech_duration_ms = self.speech_buffer.duration_ms
+        if speech_duration_ms < self.min_speech_duration_ms:
             return None
 
-        # Konuşmanın toplam süresini hesapla
-        speech_duration_ms = len(self.speech_frames) * self.frame_duration_ms
+        if not self._partial_allowed():
+            log.debug("Skipping partial result due to inference load.", pending=self.executor.pending)
+            self.partial_frames_until_next = self.partial_interval_frames
+            return None
+
+        audio_np = self.speech_buffer.as_float32()
+
+        started = time.perf_counter()
+        try:
+            text = await self._transcribe(audio_np)
+        except InferenceQueueFullError:
+            # Ara sonuçlar için kuyruğun dolu olması oturumu sonlandırmaz, sadece atlanır
+            self.partial_frames_until_next = self.partial_interval_frames
+            return None
+        except Exception as e:
+            log.warn("Partial transcription failed.", error=str(e))
+            self.partial_frames_until_next = self.partial_interval_frames
+            return None
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        # CPU bütçesi: çözme süresi aralığın izin verilen oranını aşıyorsa bir sonraki
+        # ara sonucu, harcanan süre bütçeye sığacak kadar ertele
+        budget_interval_ms = elapsed_ms / settings.STT_SERVICE_PARTIAL_CPU_BUDGET
+        interval_ms = max(settings.STT_SERVICE_PARTIAL_INTERVAL_MS, budget_interval_ms)
+        self.partial_frames_until_next = max(1, int(interval_ms // self.frame_duration_ms))
+
+        if not text:
+            return None
+
+        stable_text, full_text = self.partial_stabilizer.update(text)
+        return {"type": "partial", "text": full_text, "stable_text": stable_text}
+
+    async def _split_long_utterance(self) -> dict | None:
+        """
+        Maksimum süreye ulaşan cümleyi, sınırdan önceki arama aralığındaki en düşük
+        enerjili frame'in ortasından böler. Bölme noktasına kadarki ses hemen
+        işlenir; son `split_overlap_samples` örnek ve sonrası bir sonraki parçaya kalır.
+        Arama aralığı örtüşmeden sonra başlar; böylece her bölmede tampon ilerler.
+        """
+        frame_samples = self.frame_size_bytes // 2
+        pcm = self.speech_buffer.pcm()
+        total_frames = len(pcm) // frame_samples
+        first_frame = max(total_frames - self.split_search_frames, self.split_overlap_samples // frame_samples + 1)
+        if first_frame < total_frames:
+            search_frames = total_frames - first_frame
+            window = pcm[first_frame * frame_samples:total_frames * frame_samples].reshape(search_frames, frame_samples)
+            window = window.astype(np.float32)
+            split_frame = first_frame + int(np.argmin(np.einsum("ij,ij->i", window, window)))
+            split_sample = split_frame * frame_samples + frame_samples // 2
+            keep_from = split_sample - self.split_overlap_samples
+        else:
+            # Tampon örtüşmeden bile kısa; örtüşme bırakılmadan tamponun sonundan bölünür
+            split_sample = keep_from = len(pcm)
+
+        FORCED_UTTERANCE_SPLITS.inc()
+        log.info("VAD: Maximum utterance length reached, splitting at the quietest frame.", split_seconds=split_sample / 16000)
+        result = await self._process_utterance(split_sample, keep_from)
+        self.partial_stabilizer.reset()
+        self.partial_frames_until_next = self.partial_interval_frames
+        return result
+
+    async def _process_utterance(self, length: Optional[int] = None, keep_from: Optional[int] = None) -> dict | None:
+        """
+        Birikmiş konuşma sesini (utterance) işler ve transkripsiyon yapar. `length`
+        verilirse sadece ilk `length` örnek işlenir ve `keep_from`'dan sonraki
+        örnekler bir sonraki parça için tamponda bırakılır (uzun cümle bölme).
+        """
+        if not len(self.speech_buffer):
+            return None
+        split = length is not None
+
+        # İşlenecek konuşmanın süresini hesapla; bölmede sadece ayrılan parça sayılır
+        speech_duration_ms = length * 1000 // 16000 if split else self.speech_buffer.duration_ms
         if speech_duration_ms < self.min_speech_duration_ms:
             log.warn("Skipping transcription for very short speech.", duration_ms=speech_duration_ms)
-            self.speech_frames.clear()
+            if split:
+                self.speech_buffer.discard_head(keep_from)
+                self.utterance_start_sample += keep_from
+            else:
+                self.speech_buffer.clear()
+            self.previous_split_text = None
             return None
 
         log.info(f"Processing a speech segment of {speech_duration_ms / 1000:.2f} seconds.")
         
-        # Tüm ses frame'lerini tek bir byte dizisine birleştir
-        audio_data = b''.join(self.speech_frames)
-        self.speech_frames.clear()
+        # Biriken int16 sesi, oturumun ortak float32 tamponuna yerinde dönüştür
+        audio_np = self.speech_buffer.as_float32(length)
+        duration_seconds = len(audio_np) / 16000
+        start_seconds = self.utterance_start_sample / 16000
+        if split:
+            self.speech_buffer.discard_head(keep_from)
+            self.utterance_start_sample += keep_from
+        else:
+            self.speech_buffer.clear()
+        previous_split_text = self.previous_split_text
+        self.previous_split_text = None
 
         try:
-            # Byte dizisini modele uygun float array'e çevir
-            audio_np = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32) / 32767.0
-            
-            text = self.adapter.transcribe(
-                audio_np,
-                self.language,
-                logprob_threshold=self.logprob_threshold,
-                no_speech_threshold=self.no_speech_threshold
-            )
+            detailed = None
+            needs_detection = self._needs_language_detection()
+            # İlk tespit çözümlemeyle birlikte yapılır; dil sabitlendikten sonraki tespitler ayrı çağrıdır
+            detect_while_decoding = needs_detection and self.pinned_language is None
+            if self.word_timestamps or detect_while_decoding:
+                detailed = await self._transcribe_detailed(audio_np)
+                text = detailed.text
+            else:
+                text = await self._transcribe(audio_np)
+            if detect_while_decoding:
+                self._maybe_pin_language(detailed.language, detailed.language_probability, duration_seconds)
+            elif needs_detection:
+                await self._redetect_language(audio_np, duration_seconds)
+
+            if split:
+                self.previous_split_text = text
+            # Örtüşen seste önceki parçada zaten çözülmüş kelimeler atılır
+            repeated_words = repeated_prefix_length(previous_split_text, text) if previous_split_text and text else 0
+            if repeated_words:
+                text = " ".join(text.split()[repeated_words:])
 
             if text:
                 log.info("Transcription successful", text=text)
-                return {"type": "final", "text": text}
+                return self._final_result(
+                    text, start_seconds, duration_seconds, detailed if self.word_timestamps else None, repeated_words
+                )
             else:
                 log.warn("Transcription resulted in empty text, likely due to noise or non-speech.")
                 return None
-                
+
+        except InferenceQueueFullError:
+            # Kuyruk dolu: oturumu kapatma kararı çağırana (WebSocket handler) aittir
+            raise
         except Exception as e:
             log.error("Error during transcription of utterance", error=str(e), exc_info=True)
             return {"type": "error", "message": "Transcription error"}
 
-    async def transcribe_stream(self, audio_chunk_generator: AsyncGenerator[bytes, None]) -> AsyncGenerator[dict, None]:
-        log.info("Starting VAD-based audio stream transcription", language=self.language or "auto")
+    def _reset_utterance_state(self) -> None:
+        """Cümle bittikten sonra VAD'ı yeni bir cümleyi bekleyecek duruma getirir."""
+        self.triggered = False
+        self.silence_frames_count = 0
+        self.partial_stabilizer.reset()
+        self.partial_frames_until_next = self.partial_interval_frames
+
+    async def _process_gap(self, gap: AudioGap) -> dict | None:
+        """
+        Alma kuyruğunun attığı ses, iki yanındaki sesin tek bir cümlede
+        birleştirilmemesi için cümleyi bitirir: o ana kadar biriken konuşma
+        işlenir, konuşma başlamadıysa ring buffer'daki ön ses atılır. Atılan
+        sesin süresi akış zaman çizgisine eklenir; sonraki sonuçların zamanları
+        istemcinin gönderdiği sesle hizalı kalır.
+        """
+        log.warn("Audio was dropped from the stream; ending the current utterance.", dropped_bytes=gap.input_bytes)
+        self.ring_buffer.clear()
+        result = None
+        if self.triggered:
+            result = await self._process_utterance()
+            self._reset_utterance_state()
+        self.frames_processed += gap.input_bytes // self.input_frame_bytes
+        return result
+
+    async def transcribe_stream(self, audio_chunk_generator: AsyncGenerator[Union[bytes, AudioGap], None]) -> AsyncGenerator[dict, None]:
+        log.info(
+            "Starting VAD-based audio stream transcription",
+            language=self.language or "auto", language_pinning=self.language_pinning
+        )
 
-        buffer = bytearray()
         end_of_speech_frames_needed = self.end_of_speech_silence_ms // self.frame_duration_ms
+        trigger_voiced_frames = 0.9 * self.ring_buffer.maxlen
 
-        async for chunk in audio_chunk_generator:
-            buffer.extend(chunk)
-            self.last_activity = time.time()
+        try:
+            async for chunk in audio_chunk_generator:
+                if isinstance(chunk, AudioGap):
+                    result = await self._process_gap(chunk)
+                    if result:
+                        yield result
+                    self._report_buffered_speech()
+                    continue
+                self.last_activity = time.monotonic()
+
+                if self.input_decoder:
+                    started = time.perf_counter()
+                    chunk = self.input_decoder.decode(chunk)
+                    AUDIO_DECODE_SECONDS.labels(decoder="stream").observe(time.perf_counter() - started)
 
-            while len(buffer) >= self.frame_size_bytes:
-                frame = buffer[:self.frame_size_bytes]
-                buffer = buffer[self.frame_size_bytes:]
-                
-                is_speech = self.vad.is_speech(frame, 16000)
+                # Parçadaki tüm tam frame'ler tek çağrıda sınıflandırılır
+                frames = self.frame_assembler.push_array(chunk)
+                started = time.perf_counter()
+                voiced = self.vad.classify(frames, 16000)
+                VAD_PROCESSING_SECONDS.observe(time.perf_counter() - started)
+                if self.triggered or voiced.any():
+                    self.last_speech_activity = self.last_activity
 
-                if not self.triggered:
-                    # Konuşma başlamadıysa, frame'i ring buffer'a ekle
-                    self.ring_buffer.append((frame, is_speech))
-                    num_voiced = len([f for f, speech in self.ring_buffer if speech])
+                for frame, is_speech in zip(frames, voiced):
+                    self.frames_processed += 1
+                    if not self.triggered:
+                        # Konuşma başlamadıysa, frame'i ring buffer'a ekle
+                        self.ring_buffer.append(frame, is_speech)
                     
-                    # Ring buffer'daki frame'lerin çoğu konuşma ise, konuşma başladı (triggered)
-                    if num_voiced > 0.9 * self.ring_buffer.maxlen:
-                        self.triggered = True
-                        log.info("VAD: Speech detected, started capturing utterance.")
-                        # Konuşmanın başındaki sessiz kısımları da al
-                        for f, s in self.ring_buffer:
-                            self.speech_frames.append(f)
-                        self.ring_buffer.clear()
-                else:
-                    # Konuşma devam ediyorsa, frame'i doğrudan biriktir
-                    self.speech_frames.append(frame)
-                    # Sessizlik anlarını say
-                    if not is_speech:
-                        self.silence_frames_count += 1
+                        # Ring buffer'daki frame'lerin çoğu konuşma ise, konuşma başladı (triggered)
+                        if self.ring_buffer.num_voiced > trigger_voiced_frames:
+                            self.triggered = True
+                            log.info("VAD: Speech detected, started capturing utterance.")
+                            # Cümle, ring buffer'daki en eski frame'den başlar
+                            self.utterance_start_sample = (self.frames_processed - len(self.ring_buffer)) * (self.frame_size_bytes // 2)
+                            # Konuşmanın başındaki sessiz kısımları da al
+                            self.ring_buffer.drain_into(self.speech_buffer)
                     else:
-                        self.silence_frames_count = 0 # Konuşma varsa sayacı sıfırla
-
-                    # Belirlenen süre kadar sessizlik olduysa, cümlenin bittiğini varsay
-                    if self.silence_frames_count > end_of_speech_frames_needed:
-                        log.info("VAD: End of speech detected due to silence.")
-                        result = await self._process_utterance()
-                        if result:
-                            yield result
+                        # Konuşma devam ediyorsa, frame'i doğrudan biriktir
+                        self.speech_buffer.append_frame(frame)
+                        # Sessizlik anlarını say
+                        if not is_speech:
+                            self.silence_frames_count += 1
+                        else:
+                            self.silence_frames_count = 0 # Konuşma varsa sayacı sıfırla
+
+                        if self.partial_results:
+                            self.partial_frames_until_next -= 1
+
+                        # Belirlenen süre kadar sessizlik olduysa, cümlenin bittiğini varsay
+                        if self.silence_frames_count > end_of_speech_frames_needed:
+                            log.info("VAD: End of speech detected due to silence.")
+                            result = await self._process_utterance()
+                            if result:
+                                yield result
                         
-                        # Durumu sıfırla ve yeni bir cümle için hazır ol
-                        self.triggered = False
-                        self.silence_frames_count = 0
+                            # Durumu sıfırla ve yeni bir cümle için hazır ol
+                            self._reset_utterance_state()
+                        elif self.max_utterance_samples and len(self.speech_buffer) >= self.max_utterance_samples:
+                            result = await self._split_long_utterance()
+                            if result:
+                                yield result
+                        elif self.partial_results and self.partial_frames_until_next <= 0:
+                            partial = await self._process_partial()
+                            if partial:
+                                yield partial
+
+                self._report_buffered_speech()
+
+            # Döngü bittiğinde, buffer'da kalan son konuşma parçasını işle
+            log.info("Audio stream ended. Processing any final buffered speech.")
+            if len(self.speech_buffer):
+                result = await self._process_utterance()
+                if result:
+                    yield result
+        finally:
+            # Oturum nasıl biterse bitsin, biriken konuşması metrikten düşülür
+            BUFFERED_SPEECH_SECONDS.dec(self._reported_buffered_seconds)
+            self._reported_buffered_seconds = 0.0
 
-        # Döngü bittiğinde, buffer'da kalan son konuşma parçasını işle
-        log.info("Audio stream ended. Processing any final buffered speech.")
-        if self.speech_frames:
-            result = await self._process_utterance()
-            if result:
-                yield result
-        
         log.info("VAD-based stream transcription finished.")
\ No newline at end of file
@@ -1,9 +1,15 @@
 import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import FastAPI, Request
 from app.core.config import settings
 import structlog
 from .adapters.base import BaseSTTAdapter
-from typing import Dict, Type, Optional
+from .model_registry import create_model_registry
+from app.core.metrics import INFERENCE_QUEUE_DEPTH, INFERENCE_QUEUE_WAIT_SECONDS, STARTUP_PHASE_SECONDS
+from typing import Any, Callable, Dict, Type, Optional
 
 log = structlog.get_logger(__name__)
 
@@ -21,23 +27,26 @@ async def load_and_set_adapter(app: FastAPI):
         model_size=settings.STT_SERVICE_MODEL_SIZE
     )
     
-    loop = asyncio.get_event_loop()
-    
+    started = time.perf_counter()
     try:
-        def sync_load():
-            adapter_class = _ADAPTERS.get(adapter_name)
-            if not adapter_class:
-                raise ValueError(f"Invalid STT adapter: {adapter_name}")
-            return adapter_class()
-
-        adapter_instance = await loop.run_in_executor(None, sync_load)
-        
+        adapter_class = _ADAPTERS.get(adapter_name)
+        if not adapter_class:
+            raise ValueError(f"Invalid STT adapter: {adapter_name}")
+
+        # Varsayılan model hemen, diğer varyantlar ilk kullanıldıklarında yüklenir.
+        # Model, ısınma çıkarımları bitmeden hazır (model_ready) ilan edilmez.
+        registry = create_model_registry(adapter_name, adapter_class)
+        adapter_instance = await registry.get()
+        STARTUP_PHASE_SECONDS.labels(phase="total", model=registry.default_model).set(time.perf_counter() - started)
+
+        app.state.model_registry = registry
         app.state.stt_adapter = adapter_instance
         app.state.model_ready = True
         log.info(f"SUCCESS: STT adapter '{adapter_name}' is now loaded and ready.", model_ready=app.state.model_ready)
     except Exception as e:
         app.state.model_ready = False
         app.state.stt_adapter = None
+        app.state.model_registry = None
         log.error(f"FATAL: Failed to load adapter '{adapter_name}'", error=str(e), exc_info=True)
 
 def get_adapter(request: Request) -> Optional[BaseSTTAdapter]:
@@ -45,6 +54,99 @@ def get_adapter(request: Request) -> Optional[BaseSTTAdapter]:
         return None
     return request.app.state.stt_adapter
 
+
+class InferenceQueueFullError(RuntimeError):
+    """Çıkarım kuyruğu dolu olduğunda fırlatılır (HTTP 429 / WS 1013)."""
+
+
+class InferenceTimeoutError(RuntimeError):
+    """Çıkarım isteği izin verilen sürede tamamlanamadığında fırlatılır."""
+
+
+class InferenceExecutor:
+    """
+    Senkron model çağrılarını (adapter.transcribe) event loop dışında, sınırlı
+    sayıda iş parçacığında çalıştırır.
+
+    Aynı anda kabul edilen istek sayısı `max_workers + max_queue_size` ile
+    sınırlıdır; sınır aşıldığında istek beklemeden `InferenceQueueFullError`
+    ile reddedilir. Zaman aşımına uğrayan bir çağrının iş parçacığı kesilemez,
+    bu yüzden kuyruk yuvası ancak çağrı gerçekten bittiğinde serbest bırakılır.
+    """
+
+    def __init__(self, max_workers: int, max_queue_size: int, timeout_seconds: float):
+        self.max_workers = max(1, max_workers)
+        self.max_pending = self.max_workers + max(0, max_queue_size)
+        self.timeout_seconds = timeout_seconds
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stt-inference")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Çalışmakta olan ve kuyrukta bekleyen toplam çağrı sayısı."""
+        return self._pending
+
+    def _release(self, future) -> None:
+        with self._lock:
+            self._pending -= 1
+        if future is not None and future.cancelled():
+            # Hiç başlamadan iptal edilen çağrı kuyruktan çıkmış sayılır
+            INFERENCE_QUEUE_DEPTH.dec()
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise InferenceQueueFullError(
+                    f"Inference queue is full ({self._pending}/{self.max_pending})."
+                )
+            self._pending += 1
+
+        call = functools.partial(func, *args, **kwargs)
+        submitted = time.perf_counter()
+
+        def timed_call():
+            # Kuyrukta bekleme süresi, çağrı bir iş parçacığında başladığı anda ölçülür
+            INFERENCE_QUEUE_WAIT_SECONDS.observe(time.perf_counter() - submitted)
+            INFERENCE_QUEUE_DEPTH.dec()
+            return call()
+
+        INFERENCE_QUEUE_DEPTH.inc()
+        try:
+            future = self._pool.submit(timed_call)
+        except Exception:
+            INFERENCE_QUEUE_DEPTH.dec()
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout_seconds)
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise InferenceTimeoutError(f"Inference did not finish within {self.timeout_seconds} seconds.")
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def create_inference_executor() -> InferenceExecutor:
+    executor = InferenceExecutor(
+        max_workers=settings.STT_SERVICE_INFERENCE_WORKERS,
+        max_queue_size=settings.STT_SERVICE_INFERENCE_QUEUE_SIZE,
+        timeout_seconds=settings.STT_SERVICE_INFERENCE_TIMEOUT_SECONDS,
+    )
+    log.info(
+        "Inference executor created.",
+        workers=executor.max_workers,
+        max_pending=executor.max_pending,
+        timeout_seconds=executor.timeout_seconds
+    )
+    return executor
+
+def get_inference_executor(request: Request) -> Optional[InferenceExecutor]:
+    return getattr(request.app.state, 'inference_executor', None)
+
 from .adapters.faster_whisper_adapter import FasterWhisperAdapter
 register_adapter("faster_whisper", FasterWhisperAdapter)
 
@@ -0,0 +1,161 @@
+# sentiric-stt-service/app/services/vad_service.py
+from abc import ABC, abstractmethod
+import webrtcvad
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import structlog
+from app.core.config import settings
+
+log = structlog.get_logger(__name__)
+
+# webrtcvad'ın desteklediği frame süreleri 10, 20 ve 30 ms'dir
+VAD_FRAME_DURATION_MS = 30
+
+VAD_ENGINE_WEBRTC = "webrtc"
+VAD_ENGINE_ENERGY = "energy"
+
+# Enerji motorunun konuşma başlangıcı için baktığı spektral özellik: komşu
+# örnekler arasındaki normalize korelasyon. Enerjisi düşük frekanslarda toplanan
+# sesli konuşmada yüksek, beyaz gürültüde sıfıra yakın, sürtünmeli ünsüzlerde
+# (s, ş) negatiftir. FFT'ye göre çok daha ucuz bir spektral eğim ölçüsüdür.
+MIN_LAG1_CORRELATION = 0.5
+# int16 tam ölçek gücü; eşikler dBFS cinsinden verilir
+_FULL_SCALE_POWER = 32768.0 ** 2
+
+
+class VadEngine(ABC):
+    """
+    Ses aktivitesi tespiti (VAD) motorları için ortak arayüz.
+
+    Motorlar, bir parçadaki tüm tam frame'leri `(n, frame_samples)` int16
+    matris olarak alan `classify` ile kullanılır. Frame'leri tek tek
+    sınıflandıran motorlar sadece `is_speech`'i uygular; varsayılan `classify`
+    onu her frame için çağırır.
+    """
+
+    @abstractmethod
+    def is_speech(self, frame, sample_rate: int) -> bool:
+        """Tek bir frame'in (int16 PCM byte'ları) konuşma olup olmadığını döner."""
+
+    def classify(self, frames: np.ndarray, sample_rate: int) -> np.ndarray:
+        """Her frame için konuşma olup olmadığını gösteren bool dizisi döner."""
+        return np.fromiter(
+            (self.is_speech(frame, sample_rate) for frame in frames), dtype=bool, count=len(frames)
+        )
+
+
+class WebRtcVadEngine(VadEngine):
+    """webrtcvad'ı frame başına bir çağrıyla kullanan motor."""
+
+    def __init__(self, aggressiveness: int):
+        self._vad = webrtcvad.Vad()
+        self._vad.set_mode(aggressiveness)
+
+    def is_speech(self, frame, sample_rate: int) -> bool:
+        return self._vad.is_speech(frame, sample_rate)
+
+    def classify(self, frames: np.ndarray, sample_rate: int) -> np.ndarray:
+        if not len(frames):
+            return np.zeros(0, dtype=bool)
+        # webrtcvad byte uzunluğu bekler; frame'ler tek bir byte view'ından kopyasız dilimlenir
+        frames = np.ascontiguousarray(frames, dtype=np.int16)
+        data = memoryview(frames).cast("B")
+        size = frames.shape[1] * 2
+        is_speech = self._vad.is_speech
+        return np.fromiter(
+            (is_speech(data[offset:offset + size], sample_rate) for offset in range(0, len(data), size)),
+            dtype=bool,
+            count=len(frames)
+        )
+
+
+class EnergyVadEngine(VadEngine):
+    """
+    Bir parçadaki tüm frame'leri tek seferde NumPy ile sınıflandıran motor.
+
+    Her frame için enerji ve komşu örnekler arasındaki korelasyon hesaplanır.
+    Konuşma; enerji gürültü tabanının `on_db` üzerine çıktığında ve spektrum
+    sesli konuşmaya benzediğinde başlar, enerji tabanın `off_db` üzerinin
+    altına inene kadar devam eder (histerezis). Bir frame'in gürültü tabanı,
+    kendisiyle biten son `noise_window_seconds` içindeki en sessiz frame'in
+    enerjisidir (pencereli minimum); böylece taban ilk frame'lerden başlar ve
+    konuşmanın ardından başlayan sabit bir gürültü en geç bir pencere sonra
+    taban kabul edilir. Kararlar sadece frame dizisine bağlıdır, parçalara
+    nasıl bölündüğüne değil; motor durumlu olduğundan her oturum (ya da dosya)
+    için ayrı bir örnek kullanılmalıdır.
+    """
+
+    def __init__(self, on_db: float, off_db: float, min_dbfs: float, noise_window_seconds: float = 3.0):
+        self.on_db = on_db
+        self.off_db = min(off_db, on_db)
+        self.min_dbfs = min_dbfs
+        self.noise_window_seconds = noise_window_seconds
+        self._speaking = False
+        # Pencerenin bir önceki parçadan taşınan kısmı (son `window - 1` frame'in enerjisi)
+        self._energy_history = np.zeros(0, dtype=np.float32)
+
+    def is_speech(self, frame, sample_rate: int) -> bool:
+        return bool(self.classify(np.frombuffer(frame, dtype=np.int16)[np.newaxis], sample_rate)[0])
+
+    def classify(self, frames: np.ndarray, sample_rate: int) -> np.ndarray:
+        if not len(frames):
+            return np.zeros(0, dtype=bool)
+        # Küçük parçalarda maliyet NumPy çağrı sayısıyla belirlendiği için eşikler
+        # frame başına logaritma almak yerine doğrusal enerji oranlarına çevrilir
+        samples = frames.astype(np.float32)
+        energy = np.einsum("ij,ij->i", samples, samples)
+        correlation = np.einsum("ij,ij->i", samples[:, 1:], samples[:, :-1])
+        full_scale = frames.shape[1] * _FULL_SCALE_POWER
+
+        noise_floor = self._noise_floor(energy, frames.shape[1], sample_rate)
+        on_threshold = np.maximum(noise_floor * 10.0 ** (self.on_db / 10.0), full_scale * 10.0 ** (self.min_dbfs / 10.0))
+        off_threshold = np.maximum(
+            noise_floor * 10.0 ** (self.off_db / 10.0),
+            full_scale * 10.0 ** ((self.min_dbfs - (self.on_db - self.off_db)) / 10.0)
+        )
+
+        starts = (energy >= on_threshold) & (correlation >= MIN_LAG1_CORRELATION * energy)
+        stops = energy < off_threshold
+        # Başlangıç ve bitiş eşikleri ayrık olduğundan her frame'in durumu, kendisinden
+        # önceki son olayın başlangıç olup olmamasıdır (ileri doldurma)
+        last_event = np.where(starts | stops, np.arange(len(frames)), -1)
+        np.maximum.accumulate(last_event, out=last_event)
+        voiced = starts[last_event]
+        if last_event[0] < 0:
+            # Parçanın başındaki olaysız frame'ler önceki parçanın durumunu sürdürür
+            voiced[last_event < 0] = self._speaking
+        self._speaking = bool(voiced[-1])
+        return voiced
+
+    def _noise_floor(self, energy: np.ndarray, frame_samples: int, sample_rate: int) -> np.ndarray:
+        """Her frame için, kendisiyle biten pencere içindeki en düşük frame enerjisini döner."""
+        window = max(1, round(self.noise_window_seconds * sample_rate / frame_samples))
+        history = self._energy_history
+        # Oturumun ilk frame'lerinde pencere henüz dolmamıştır; eksik kısım minimumu etkilemez
+        padding = np.full(max(0, window - 1 - len(history)), np.inf, dtype=np.float32)
+        padded = np.concatenate([padding, history, energy])
+        self._energy_history = padded[len(padded) - (window - 1):] if window > 1 else history
+        return sliding_window_view(padded, window).min(axis=1)
+
+
+def create_vad(engine: str | None = None) -> VadEngine:
+    """Ayarlarda seçilen VAD motorunun yeni bir örneğini oluşturur."""
+    engine = (engine or settings.STT_SERVICE_VAD_ENGINE).lower()
+    if engine == VAD_ENGINE_ENERGY:
+        return EnergyVadEngine(
+            on_db=settings.STT_SERVICE_VAD_ENERGY_ON_DB,
+            off_db=settings.STT_SERVICE_VAD_ENERGY_OFF_DB,
+            min_dbfs=settings.STT_SERVICE_VAD_ENERGY_MIN_DBFS
+        )
+    if engine != VAD_ENGINE_WEBRTC:
+        log.warn("Unknown VAD engine, falling back to webrtc.", engine=engine)
+
+    try:
+        # Ortam değişkeninden gelen değeri kullan
+        aggressiveness = settings.STT_SERVICE_VAD_AGGRESSIVENESS
+        vad = WebRtcVadEngine(aggressiveness)
+        log.info("VAD initialized", aggressiveness=aggressiveness)
+    except Exception as e:
+        log.error("Failed to set VAD mode, defaulting to 1.", error=str(e))
+        vad = WebRtcVadEngine(1) # Hata durumunda güvenli bir varsayılana dön
+    return vad
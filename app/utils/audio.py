@@ -1,53 +1,448 @@
-import subprocess
+import asyncio
+import io
+import math
+import mmap
+import struct
+import time
+from typing import AsyncIterator, BinaryIO, Optional, Union
+import numpy as np
+import soundfile as sf
 import structlog
 from app.core.config import settings
+from app.core.metrics import AUDIO_DECODE_SECONDS
+from app.utils.audio_buffers import AudioTooLongError, PcmSpool
+
+try:
+    # PyAV, faster-whisper'ın bağımlılığıdır; soundfile'ın açamadığı konteynerler (m4a, aac vb.) için kullanılır
+    import av
+except ImportError:  # pragma: no cover
+    av = None
+
+# Kod çözücülerin tek seferde okuduğu blok uzunluğu (saniye)
+DECODE_BLOCK_SECONDS = 10
+# Yüklenen dosyanın ffmpeg'e aktarılırken okunduğu parça boyutu
+UPLOAD_READ_CHUNK_BYTES = 1024 * 1024
 
 log = structlog.get_logger(__name__)
 
-def resample_audio(audio_bytes: bytes) -> bytes:
+# WebSocket akışında desteklenen giriş codec'leri (isimler ffmpeg ile aynıdır)
+CODEC_PCM_S16LE = "pcm_s16le"
+CODEC_PCM_MULAW = "pcm_mulaw"
+CODEC_PCM_ALAW = "pcm_alaw"
+SUPPORTED_STREAM_CODECS = (CODEC_PCM_S16LE, CODEC_PCM_MULAW, CODEC_PCM_ALAW)
+MIN_STREAM_SAMPLE_RATE = 8000
+MAX_STREAM_SAMPLE_RATE = 48000
+
+def _build_ulaw_table() -> np.ndarray:
+    """ITU-T G.711 μ-law -> 16-bit lineer PCM dönüşüm tablosu (256 giriş)."""
+    u = ~np.arange(256, dtype=np.uint8)
+    exponent = (u >> 4) & 0x07
+    mantissa = (u & 0x0F).astype(np.int32)
+    magnitude = (((mantissa << 3) + 0x84) << exponent) - 0x84
+    return np.where(u & 0x80, -magnitude, magnitude).astype(np.int16)
+
+
+def _build_alaw_table() -> np.ndarray:
+    """ITU-T G.711 A-law -> 16-bit lineer PCM dönüşüm tablosu (256 giriş)."""
+    a = np.arange(256, dtype=np.uint8) ^ 0x55
+    exponent = ((a >> 4) & 0x07).astype(np.int32)
+    mantissa = (a & 0x0F).astype(np.int32)
+    magnitude = np.where(
+        exponent == 0,
+        (mantissa << 4) + 8,
+        ((mantissa << 4) + 0x108) << np.maximum(exponent - 1, 0)
+    )
+    return np.where(a & 0x80, magnitude, -magnitude).astype(np.int16)
+
+
+ULAW_TO_PCM16 = _build_ulaw_table()
+ALAW_TO_PCM16 = _build_alaw_table()
+
+
+def decode_g711(payload: bytes, codec: str) -> np.ndarray:
+    """G.711 (μ-law / A-law) byte dizisini tablo araması ile tek adımda int16 PCM'e çözer."""
+    table = ULAW_TO_PCM16 if codec == CODEC_PCM_MULAW else ALAW_TO_PCM16
+    return table[np.frombuffer(payload, dtype=np.uint8)]
+
+
+class StreamingResampler:
     """
-    Verilen ses byte'larını ffmpeg kullanarak hedef örnekleme oranına dönüştürür
-    ve temiz, standart bir PCM WAV formatına sokar.
-    Bu, modele her zaman doğru ve temiz formatta ses gitmesini garanti eder.
+    Parça parça gelen int16 sesi rasyonel bir oranla (L/M) yeniden örnekleyen
+    polifaz FIR filtresi. Filtre geçmişi ve faz konumu parçalar arasında
+    korunur; bu sayede parça sınırlarında süreksizlik (tık sesi) oluşmaz ve
+    sonuç, sesin tek seferde işlenmesiyle aynıdır.
     """
-    target_sample_rate = settings.STT_SERVICE_TARGET_SAMPLE_RATE
-    log.info(f"Resampling and cleaning audio to {target_sample_rate}Hz, PCM S16LE...")
 
+    def __init__(self, input_rate: int, output_rate: int, taps_per_phase: int = 16):
+        divisor = math.gcd(input_rate, output_rate)
+        self.up = output_rate // divisor
+        self.down = input_rate // divisor
+        self.taps_per_phase = taps_per_phase
+
+        # Prototip alçak geçiren filtre, L kat yükseltilmiş örnekleme hızında tasarlanır
+        num_taps = self.up * taps_per_phase
+        cutoff = 0.5 * min(1.0 / self.up, 1.0 / self.down) * 0.9
+        n = np.arange(num_taps) - (num_taps - 1) / 2.0
+        prototype = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(num_taps, 8.0)
+        prototype *= self.up / prototype.sum()
+
+        # phases[p] -> pencere içindeki en eski örnekten en yeniye doğru sıralı katsayılar
+        self._phases = np.stack([prototype[p::self.up][::-1] for p in range(self.up)])
+        self._history = np.zeros(taps_per_phase - 1, dtype=np.float64)
+        # Bir sonraki çıkış örneğinin, mevcut parçanın başına göre yükseltilmiş zaman indeksi
+        self._next_position = 0
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """int16 örnekleri yeniden örnekler ve int16 olarak döndürür."""
+        if len(samples) == 0:
+            return np.empty(0, dtype=np.int16)
+        return np.clip(np.rint(self._filter(samples)), -32768, 32767).astype(np.int16)
+
+    def _filter(self, samples: np.ndarray) -> np.ndarray:
+        extended = np.concatenate([self._history, samples.astype(np.float64)])
+        total_positions = len(samples) * self.up
+        count = max(0, -(-(total_positions - self._next_position) // self.down))
+
+        positions = self._next_position + self.down * np.arange(count)
+        input_indices = positions // self.up
+        phase_indices = positions % self.up
+
+        windows = np.lib.stride_tricks.sliding_window_view(extended, self.taps_per_phase)
+        output = np.einsum("ij,ij->i", windows[input_indices], self._phases[phase_indices])
+
+        self._next_position = self._next_position + self.down * count - total_positions
+        self._history = extended[-(self.taps_per_phase - 1):]
+        return output
+
+
+class StreamDecoder:
+    """
+    WebSocket'ten gelen ham ses parçalarını (G.711 veya PCM, herhangi bir
+    örnekleme hızında) modelin beklediği 16-bit PCM'e ve hedef örnekleme
+    hızına çevirir. Tek bir oturum boyunca yaşar ve durumunu (yarım kalan
+    byte'lar, filtre geçmişi) parçalar arasında korur.
+    """
+
+    def __init__(self, codec: str, sample_rate: int, target_sample_rate: int):
+        if codec not in SUPPORTED_STREAM_CODECS:
+            raise ValueError(f"Unsupported codec: {codec}. Supported: {', '.join(SUPPORTED_STREAM_CODECS)}")
+        if not MIN_STREAM_SAMPLE_RATE <= sample_rate <= MAX_STREAM_SAMPLE_RATE:
+            raise ValueError(
+                f"Unsupported sample rate: {sample_rate}. Must be between {MIN_STREAM_SAMPLE_RATE} and {MAX_STREAM_SAMPLE_RATE}."
+            )
+        self.codec = codec
+        self.sample_rate = sample_rate
+        self.resampler = StreamingResampler(sample_rate, target_sample_rate) if sample_rate != target_sample_rate else None
+        self._odd_byte = b""
+
+    @property
+    def is_passthrough(self) -> bool:
+        return self.codec == CODEC_PCM_S16LE and self.resampler is None
+
+    def decode(self, chunk: bytes) -> bytes:
+        if self.codec == CODEC_PCM_S16LE:
+            if self._odd_byte:
+                chunk = self._odd_byte + chunk
+            usable = len(chunk) - (len(chunk) % 2)
+            self._odd_byte = bytes(chunk[usable:])
+            samples = np.frombuffer(chunk, dtype=np.int16, count=usable // 2)
+        else:
+            samples = decode_g711(chunk, self.codec)
+
+        if self.resampler:
+            samples = self.resampler.process(samples)
+        return samples.tobytes()
+
+
+def _new_spool() -> PcmSpool:
+    return PcmSpool(
+        max_memory_bytes=settings.STT_SERVICE_UPLOAD_SPOOL_MB * 1024 * 1024,
+        max_samples=int(settings.STT_SERVICE_MAX_AUDIO_DURATION_SECONDS * settings.STT_SERVICE_TARGET_SAMPLE_RATE)
+    )
+
+
+def _buffer_of(source: Union[bytes, BinaryIO]):
+    """
+    Kaynağın byte'larına kopyalamadan erişim sağlar: dosya tanıtıcısı olan
+    kaynaklar memory-map edilir, olmayanlar (BytesIO vb.) doğrudan okunur.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return source
+    try:
+        # SpooledTemporaryFile henüz bellekteyse fileno() onu diske taşır (yükleme zaten spool sınırının altındadır)
+        return mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError, io.UnsupportedOperation):
+        pass
+    source.seek(0)
+    return source.read()
+
+
+def _as_file(source: Union[bytes, BinaryIO]) -> BinaryIO:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    source.seek(0)
+    return source
+
+
+def _parse_pcm_wav(buffer, target_sample_rate: int) -> Optional[np.ndarray]:
+    """
+    Dosya zaten hedef formatta (mono, 16-bit PCM, hedef örnekleme hızı) bir WAV
+    ise, örnekleri hiçbir kod çözücüden geçirmeden doğrudan (kopyasız) int16
+    görünüm olarak döndürür. Uygun değilse None döner.
+    """
+    if len(buffer) < 12 or buffer[:4] != b"RIFF" or buffer[8:12] != b"WAVE":
+        return None
+
+    view = memoryview(buffer)
+    offset = 12
+    is_conformant = False
+    while offset + 8 <= len(buffer):
+        chunk_id = bytes(buffer[offset:offset + 4])
+        chunk_size = struct.unpack_from("<I", buffer, offset + 4)[0]
+        body = offset + 8
+
+        if chunk_id == b"fmt ":
+            # Kesik ya da bozuk bir fmt bloğu: normal kod çözücüler denensin
+            if chunk_size < 16 or body + 16 > len(buffer):
+                return None
+            audio_format, channels, sample_rate = struct.unpack_from("<HHI", buffer, body)
+            bits_per_sample = struct.unpack_from("<H", buffer, body + 14)[0]
+            is_conformant = (
+                audio_format == 1 and channels == 1 and
+                sample_rate == target_sample_rate and bits_per_sample == 16
+            )
+            if not is_conformant:
+                return None
+        elif chunk_id == b"data":
+            if not is_conformant:
+                return None
+            # Pipe'tan yazılan WAV'larda boyut alanı geçersiz (0xFFFFFFFF) olabilir; eldeki veriyle sınırla
+            end = min(body + chunk_size, len(buffer))
+            end -= (end - body) % 2
+            return np.frombuffer(view[body:end], dtype=np.int16)
+
+        offset = body + chunk_size + (chunk_size % 2)
+    return None
+
+
+def _decode_with_soundfile(file: BinaryIO, target_sample_rate: int, spool: PcmSpool) -> Optional[np.ndarray]:
+    try:
+        sound_file = sf.SoundFile(file)
+    except Exception:
+        return None
+
+    try:
+        with sound_file:
+            resampler = StreamingResampler(sound_file.samplerate, target_sample_rate) if sound_file.samplerate != target_sample_rate else None
+            block_frames = sound_file.samplerate * DECODE_BLOCK_SECONDS
+            for block in sound_file.blocks(blocksize=block_frames, dtype="int16", always_2d=True):
+                samples = block[:, 0] if block.shape[1] == 1 else block.mean(axis=1).astype(np.int16)
+                spool.write(resampler.process(samples) if resampler else samples)
+    except (sf.LibsndfileError, RuntimeError) as e:
+        # Açılıp okunurken bozulan dosya: sıradaki kod çözücü denenir
+        log.debug("soundfile failed while reading audio, trying the next decoder.", error=str(e))
+        return None
+    return spool.finish()
+
+
+def _decode_with_pyav(file: BinaryIO, target_sample_rate: int, spool: PcmSpool) -> Optional[np.ndarray]:
+    if av is None:
+        return None
     try:
-        command = [
+        resampler = av.audio.resampler.AudioResampler(format="s16", layout="mono", rate=target_sample_rate)
+        with av.open(file, mode="r", metadata_errors="ignore") as container:
+            for frame in container.decode(audio=0):
+                for resampled in resampler.resample(frame):
+                    spool.write(resampled.to_ndarray().reshape(-1))
+            for resampled in resampler.resample(None):
+                spool.write(resampled.to_ndarray().reshape(-1))
+    except AudioTooLongError:
+        raise
+    except Exception:
+        return None
+    return spool.finish()
+
+
+def decode_audio_in_process(source: Union[bytes, BinaryIO]) -> Optional[np.ndarray]:
+    """
+    Yüklenen bir ses dosyasını alt süreç başlatmadan, hedef örnekleme hızında
+    mono int16 PCM'e çevirir. Sırasıyla şu yollar denenir:
+
+    1. Zaten uygun formattaki PCM WAV: kod çözme olmadan doğrudan (dosya
+       diskteyse memory-map üzerinden) okunur.
+    2. soundfile (libsndfile): WAV, FLAC, OGG, MP3 gibi yaygın formatlar.
+    3. PyAV: libsndfile'ın desteklemediği konteynerler (m4a, aac, webm...).
+
+    2 ve 3 numaralı yollar sesi bloklar halinde çözer ve sonucu `PcmSpool`'a
+    yazar; bu yüzden bellek kullanımı kaydın uzunluğundan bağımsızdır.
+    Hiçbiri dosyayı açamazsa None döner; ses izin verilenden uzunsa
+    AudioTooLongError fırlatır.
+    """
+    target_sample_rate = settings.STT_SERVICE_TARGET_SAMPLE_RATE
+    max_samples = int(settings.STT_SERVICE_MAX_AUDIO_DURATION_SECONDS * target_sample_rate)
+
+    started = time.perf_counter()
+    pcm = _parse_pcm_wav(_buffer_of(source), target_sample_rate)
+    if pcm is not None:
+        if len(pcm) > max_samples:
+            raise AudioTooLongError("Audio exceeds the maximum allowed duration.")
+        AUDIO_DECODE_SECONDS.labels(decoder="pcm_wav").observe(time.perf_counter() - started)
+        log.debug("Audio decoded in-process.", decoder="pcm_wav", duration_seconds=round(len(pcm) / target_sample_rate, 2))
+        return pcm
+
+    for decoder_name, decoder in (
+        ("soundfile", _decode_with_soundfile),
+        ("pyav", _decode_with_pyav),
+    ):
+        started = time.perf_counter()
+        pcm = decoder(_as_file(source), target_sample_rate, _new_spool())
+        if pcm is not None:
+            AUDIO_DECODE_SECONDS.labels(decoder=decoder_name).observe(time.perf_counter() - started)
+            log.debug("Audio decoded in-process.", decoder=decoder_name, duration_seconds=round(len(pcm) / target_sample_rate, 2))
+            return pcm
+    return None
+
+
+class FfmpegTranscodeError(ValueError):
+    """ffmpeg sesi çözemediğinde fırlatılır."""
+
+
+class FfmpegTimeoutError(RuntimeError):
+    """ffmpeg sesi `STT_SERVICE_FFMPEG_TIMEOUT_SECONDS` içinde çözemediğinde fırlatılır (bozuk dosya değil, sunucu tarafı zaman aşımı)."""
+
+
+class AsyncFfmpegTranscoder:
+    """
+    ffmpeg'i asyncio alt süreci olarak çalıştırır: giriş stdin'e parça parça
+    yazılırken, ham `s16le` PCM çıkışı stdout'tan eş zamanlı ve artımlı olarak
+    okunur. Böylece event loop bloklanmaz ve dosyanın tamamı ile çıktının
+    tamamı aynı anda WAV olarak bellekte tutulmaz.
+
+    Aynı anda çalışan ffmpeg süreci sayısı `max_concurrency` ile sınırlıdır.
+    Zaman aşımında veya çağıran görev iptal edildiğinde süreç öldürülür.
+    """
+
+    READ_CHUNK_BYTES = 64 * 1024
+
+    def __init__(self, max_concurrency: int, timeout_seconds: float, target_sample_rate: int):
+        self.timeout_seconds = timeout_seconds
+        self.target_sample_rate = target_sample_rate
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    def _command(self):
+        return [
             'ffmpeg',
-            '-i', 'pipe:0',                  # Giriş stdin'den
-            '-ar', str(target_sample_rate),  # Hedef örnekleme oranı
-            '-ac', '1',                      # Mono kanal
-            '-acodec', 'pcm_s16le',          # YENİ: Temiz 16-bit PCM formatına zorla
-            '-f', 'wav',                     # Çıkış formatı WAV
-            'pipe:1'                         # Çıkış stdout'a
+            '-hide_banner',
+            '-loglevel', 'error',
+            '-i', 'pipe:0',                          # Giriş stdin'den
+            '-ar', str(self.target_sample_rate),     # Hedef örnekleme oranı
+            '-ac', '1',                              # Mono kanal
+            '-f', 's16le',                           # Başlıksız ham 16-bit PCM
+            'pipe:1'                                 # Çıkış stdout'a
         ]
-        
-        process = subprocess.Popen(
-            command,
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
+
+    async def transcode(self, source: Union[bytes, AsyncIterator[bytes]], spool: PcmSpool) -> np.ndarray:
+        """Sesi ffmpeg ile çözer, çıkışı `spool`'a yazar ve hedef örnekleme hızındaki int16 PCM'i döndürür."""
+        async with self._semaphore:
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *self._command(),
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+            except FileNotFoundError:
+                log.error("ffmpeg command not found. Make sure ffmpeg is installed and in your PATH.")
+                raise FfmpegTranscodeError("ffmpeg is not available.")
+
+            try:
+                await asyncio.wait_for(self._communicate(process, source, spool), timeout=self.timeout_seconds)
+                return spool.finish()
+            except asyncio.TimeoutError:
+                log.error("FFmpeg transcoding timed out", timeout_seconds=self.timeout_seconds)
+                raise FfmpegTimeoutError(f"ffmpeg did not finish within {self.timeout_seconds} seconds.")
+            finally:
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+
+    async def _communicate(self, process: asyncio.subprocess.Process, source, spool: PcmSpool) -> None:
+        async def feed_stdin():
+            try:
+                if isinstance(source, (bytes, bytearray, memoryview)):
+                    process.stdin.write(source)
+                    await process.stdin.drain()
+                else:
+                    async for chunk in source:
+                        process.stdin.write(chunk)
+                        await process.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                # ffmpeg girişi okumayı bıraktı; hata stderr ve çıkış koduyla raporlanır
+                pass
+            finally:
+                if not process.stdin.is_closing():
+                    process.stdin.close()
+
+        async def read_stdout():
+            while True:
+                block = await process.stdout.read(self.READ_CHUNK_BYTES)
+                if not block:
+                    return
+                spool.write_bytes(block)
+
+        async def read_stderr():
+            return await process.stderr.read()
+
+        _, _, stderr_data = await asyncio.gather(feed_stdin(), read_stdout(), read_stderr())
+        return_code = await process.wait()
+
+        if return_code != 0:
+            error_message = stderr_data.decode('utf-8', errors='ignore').strip()[-2000:]
+            log.error("FFmpeg processing failed", return_code=return_code, ffmpeg_error=error_message)
+            raise FfmpegTranscodeError("ffmpeg could not decode the audio.")
+
+
+_ffmpeg_transcoder: Optional[AsyncFfmpegTranscoder] = None
+
+def get_ffmpeg_transcoder() -> AsyncFfmpegTranscoder:
+    global _ffmpeg_transcoder
+    if _ffmpeg_transcoder is None:
+        _ffmpeg_transcoder = AsyncFfmpegTranscoder(
+            max_concurrency=settings.STT_SERVICE_FFMPEG_MAX_CONCURRENCY,
+            timeout_seconds=settings.STT_SERVICE_FFMPEG_TIMEOUT_SECONDS,
+            target_sample_rate=settings.STT_SERVICE_TARGET_SAMPLE_RATE
         )
-        
-        stdout_data, stderr_data = process.communicate(input=audio_bytes)
-        
-        if process.returncode != 0:
-            error_message = stderr_data.decode('utf-8', errors='ignore').strip()
-            log.error(
-                "FFmpeg processing failed",
-                return_code=process.returncode,
-                ffmpeg_error=error_message
-            )
-            return audio_bytes
-            
-        log.info("Audio processed successfully", original_size_kb=round(len(audio_bytes)/1024, 2), new_size_kb=round(len(stdout_data)/1024, 2))
-        return stdout_data
-
-    except FileNotFoundError:
-        log.error("ffmpeg command not found. Make sure ffmpeg is installed and in your PATH. Skipping processing.")
-        return audio_bytes
-    except Exception as e:
-        log.error("An unexpected error occurred during audio processing", error=str(e), exc_info=True)
-        return audio_bytes
\ No newline at end of file
+    return _ffmpeg_transcoder
+
+
+async def _iter_file_chunks(file: BinaryIO) -> AsyncIterator[bytes]:
+    loop = asyncio.get_running_loop()
+    file.seek(0)
+    while True:
+        chunk = await loop.run_in_executor(None, file.read, UPLOAD_READ_CHUNK_BYTES)
+        if not chunk:
+            return
+        yield chunk
+
+
+async def load_audio_file(source: Union[bytes, BinaryIO]) -> np.ndarray:
+    """
+    Yüklenen dosyayı event loop'u bloklamadan hedef örnekleme hızında int16
+    PCM'e çözer: önce işlem içi kod çözücüler bir iş parçacığında denenir,
+    olmazsa dosya parça parça asenkron ffmpeg havuzuna aktarılır. Dönen dizi
+    uzun kayıtlar için memory-mapped olabilir.
+
+    Dosya çözülemezse ValueError, ses izin verilenden uzunsa AudioTooLongError,
+    ffmpeg zaman aşımına uğrarsa FfmpegTimeoutError fırlatır.
+    """
+    loop = asyncio.get_running_loop()
+    pcm = await loop.run_in_executor(None, decode_audio_in_process, source)
+    if pcm is not None:
+        return pcm
+
+    log.info("In-process decoders could not handle the file, falling back to async ffmpeg.")
+    ffmpeg_source = source if isinstance(source, (bytes, bytearray, memoryview)) else _iter_file_chunks(source)
+    started = time.perf_counter()
+    pcm = await get_ffmpeg_transcoder().transcode(ffmpeg_source, _new_spool())
+    AUDIO_DECODE_SECONDS.labels(decoder="ffmpeg").observe(time.perf_counter() - started)
+    return pcm
@@ -0,0 +1,264 @@
+# sentiric-stt-service/app/utils/audio_buffers.py
+import tempfile
+from typing import Iterator, Optional
+
+import numpy as np
+
+# int16 PCM örneklerini [-1, 1] aralığındaki float32'ye çeviren ölçek
+INT16_TO_FLOAT32_SCALE = np.float32(1.0 / 32767.0)
+
+
+class AudioTooLongError(ValueError):
+    """Çözülen ses izin verilen maksimum süreyi aştığında fırlatılır."""
+
+
+class FrameAssembler:
+    """
+    Gelen byte parçalarını (chunk) sabit boyutlu frame'lere böler.
+
+    Tam frame'ler kopyalanmadan, gelen parçanın üzerindeki memoryview dilimleri
+    olarak döner. Sadece iki parça arasında bölünen frame, önceden ayrılmış tek
+    bir taşıma (carry) tamponunda birleştirilir. Dönen view'lar bir sonraki
+    `push` çağrısına kadar geçerlidir; kalıcı olarak saklanacaksa kopyalanmalıdır.
+    """
+
+    def __init__(self, frame_size_bytes: int):
+        self.frame_size_bytes = frame_size_bytes
+        self._carry = bytearray(frame_size_bytes)
+        self._carry_view = memoryview(self._carry)
+        self._carry_len = 0
+
+    def push(self, chunk: bytes) -> Iterator[memoryview]:
+        view = memoryview(chunk)
+        size = self.frame_size_bytes
+        offset = 0
+
+        if self._carry_len:
+            take = min(size - self._carry_len, len(view))
+            self._carry_view[self._carry_len:self._carry_len + take] = view[:take]
+            self._carry_len += take
+            offset = take
+            if self._carry_len < size:
+                return
+            self._carry_len = 0
+            yield self._carry_view
+
+        end = len(view) - size
+        while offset <= end:
+            yield view[offset:offset + size]
+            offset += size
+
+        remaining = len(view) - offset
+        if remaining:
+            self._carry_view[:remaining] = view[offset:]
+            self._carry_len = remaining
+
+    def push_array(self, chunk: bytes) -> np.ndarray:
+        """
+        `push` ile aynı şekilde böler, ancak tam frame'leri tek bir
+        `(n, frame_samples)` int16 matris olarak döner; böylece VAD bir parçadaki
+        tüm frame'leri tek çağrıda sınıflandırabilir. Önceki parçadan taşınan
+        bir frame yoksa matris gelen parçanın kopyasız görünümüdür.
+        """
+        view = memoryview(chunk)
+        size = self.frame_size_bytes
+        offset = 0
+        carried = None
+
+        if self._carry_len:
+            take = min(size - self._carry_len, len(view))
+            self._carry_view[self._carry_len:self._carry_len + take] = view[:take]
+            self._carry_len += take
+            offset = take
+            if self._carry_len < size:
+                return np.empty((0, size // 2), dtype=np.int16)
+            self._carry_len = 0
+            carried = np.frombuffer(self._carry, dtype=np.int16)
+
+        count = (len(view) - offset) // size
+        frames = np.frombuffer(view, dtype=np.int16, count=count * size // 2, offset=offset).reshape(count, size // 2)
+        if carried is not None:
+            # Taşıma tamponu aşağıda yeniden doldurulacağı için frame'ler birleştirilerek kopyalanır
+            frames = np.concatenate((carried[np.newaxis], frames))
+
+        offset += count * size
+        remaining = len(view) - offset
+        if remaining:
+            self._carry_view[:remaining] = view[offset:]
+            self._carry_len = remaining
+        return frames
+
+
+class FrameRingBuffer:
+    """
+    Konuşma başlamadan önceki son N frame'i, önceden ayrılmış bir int16 matriste
+    tutar. Konuşma (voiced) olarak işaretlenen frame sayısı her eklemede O(1)
+    olarak güncellenir, böylece tetikleme kararı için tüm tampon taranmaz.
+    """
+
+    def __init__(self, max_frames: int, frame_samples: int):
+        self.maxlen = max(1, max_frames)
+        self._frames = np.zeros((self.maxlen, frame_samples), dtype=np.int16)
+        self._voiced = np.zeros(self.maxlen, dtype=bool)
+        self._head = 0
+        self._count = 0
+        self.num_voiced = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, frame: memoryview, is_speech: bool) -> None:
+        if self._count == self.maxlen:
+            # En eski frame'in üzerine yazılacak; sayacından düş
+            self.num_voiced -= int(self._voiced[self._head])
+        else:
+            self._count += 1
+
+        self._frames[self._head] = np.frombuffer(frame, dtype=np.int16)
+        self._voiced[self._head] = is_speech
+        self.num_voiced += int(is_speech)
+        self._head = (self._head + 1) % self.maxlen
+
+    def drain_into(self, speech_buffer: "SpeechBuffer") -> None:
+        """Tampondaki frame'leri kronolojik sırayla konuşma tamponuna aktarır ve tamponu boşaltır."""
+        start = (self._head - self._count) % self.maxlen
+        first_part = min(self._count, self.maxlen - start)
+        speech_buffer.extend(self._frames[start:start + first_part].reshape(-1))
+        if first_part < self._count:
+            speech_buffer.extend(self._frames[:self._count - first_part].reshape(-1))
+        self.clear()
+
+    def clear(self) -> None:
+        self._head = 0
+        self._count = 0
+        self.num_voiced = 0
+
+
+class SpeechBuffer:
+    """
+    Bir cümlenin (utterance) int16 örneklerini, gerektiğinde iki katına büyüyen
+    tek bir arena'da biriktirir ve modele verilecek float32 diziyi oturum
+    boyunca yeniden kullanılan ikinci bir tampona yerinde (in-place) dönüştürür.
+    """
+
+    def __init__(self, sample_rate: int, initial_seconds: float = 10.0):
+        self.sample_rate = sample_rate
+        capacity = max(1, int(sample_rate * initial_seconds))
+        self._samples = np.empty(capacity, dtype=np.int16)
+        self._float_buffer = np.empty(capacity, dtype=np.float32)
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def duration_ms(self) -> int:
+        return self._length * 1000 // self.sample_rate
+
+    def _ensure_capacity(self, required: int) -> None:
+        capacity = len(self._samples)
+        if required <= capacity:
+            return
+        while capacity < required:
+            capacity *= 2
+        grown = np.empty(capacity, dtype=np.int16)
+        grown[:self._length] = self._samples[:self._length]
+        self._samples = grown
+        self._float_buffer = np.empty(capacity, dtype=np.float32)
+
+    def extend(self, samples: np.ndarray) -> None:
+        end = self._length + len(samples)
+        self._ensure_capacity(end)
+        self._samples[self._length:end] = samples
+        self._length = end
+
+    def append_frame(self, frame: memoryview) -> None:
+        self.extend(np.frombuffer(frame, dtype=np.int16))
+
+    def pcm(self) -> np.ndarray:
+        """Biriken int16 örneklerin (kopyasız) görünümü."""
+        return self._samples[:self._length]
+
+    def as_float32(self, length: Optional[int] = None) -> np.ndarray:
+        """
+        Biriken sesi (ya da ilk `length` örneğini) float32'ye dönüştürür. Dönen
+        dizi oturumun ortak tamponunun bir görünümüdür ve bir sonraki
+        `as_float32` çağrısında üzerine yazılır (bkz. `detach_float_buffer`).
+        """
+        length = self._length if length is None else min(length, self._length)
+        out = self._float_buffer[:length]
+        np.multiply(self._samples[:length], INT16_TO_FLOAT32_SCALE, out=out)
+        return out
+
+    def detach_float_buffer(self) -> None:
+        """
+        Ortak float32 tamponunu bırakıp yenisini ayırır. Daha önce dönen görünüm
+        hâlâ kullanılıyorsa (ör. zaman aşımından sonra çalışmaya devam eden bir
+        çıkarım iş parçacığı) sonraki `as_float32` çağrıları onu bozmaz.
+        """
+        self._float_buffer = np.empty(len(self._samples), dtype=np.float32)
+
+    def discard_head(self, count: int) -> None:
+        """İlk `count` örneği atar; kalan örnekler arena'nın başına taşınır."""
+        count = min(count, self._length)
+        remaining = self._length - count
+        self._samples[:remaining] = self._samples[count:self._length]
+        self._length = remaining
+
+    def clear(self) -> None:
+        self._length = 0
+
+
+class PcmSpool:
+    """
+    Çözülen int16 PCM'i belirli bir boyuta kadar bellekte, bu boyut aşıldığında
+    diskteki anonim bir geçici dosyada biriktirir. `finish` ile alınan dizi
+    bellekteyse kopyasız bir görünüm, diskteyse memory-mapped (np.memmap)
+    bir dizidir; böylece uzun kayıtların tamamı hiçbir zaman RAM'e alınmaz.
+    """
+
+    def __init__(self, max_memory_bytes: int, max_samples: Optional[int] = None):
+        self.max_memory_bytes = max_memory_bytes
+        self.max_samples = max_samples
+        self._memory = bytearray()
+        self._file = None
+        self._odd_byte = b""
+        self.num_samples = 0
+
+    def write(self, samples: np.ndarray) -> None:
+        samples = np.ascontiguousarray(samples, dtype=np.int16)
+        self._reserve(len(samples))
+        self._write_raw(memoryview(samples).cast("B"))
+
+    def write_bytes(self, block: bytes) -> None:
+        """Sınırları örnek boyutuna hizalı olmayabilen ham s16le byte'ları yazar (ör. ffmpeg stdout)."""
+        if self._odd_byte:
+            block = self._odd_byte + block
+        usable = len(block) - (len(block) % 2)
+        self._odd_byte = block[usable:]
+        self._reserve(usable // 2)
+        self._write_raw(memoryview(block)[:usable])
+
+    def _reserve(self, count: int) -> None:
+        if self.max_samples is not None and self.num_samples + count > self.max_samples:
+            raise AudioTooLongError("Audio exceeds the maximum allowed duration.")
+        self.num_samples += count
+
+    def _write_raw(self, data) -> None:
+        if self._file is None and len(self._memory) + len(data) > self.max_memory_bytes:
+            self._file = tempfile.TemporaryFile(prefix="stt-pcm-")
+            self._file.write(self._memory)
+            self._memory = bytearray()
+        if self._file is not None:
+            self._file.write(data)
+        else:
+            self._memory.extend(data)
+
+    def finish(self) -> np.ndarray:
+        if self._file is None:
+            return np.frombuffer(self._memory, dtype=np.int16)
+        self._file.flush()
+        # Dosya kapatılsa da eşleme (mapping) geçerli kalır
+        pcm = np.memmap(self._file, dtype=np.int16, mode="r", shape=(self.num_samples,))
+        self._file.close()
+        return pcm
@@ -0,0 +1,109 @@
+# sentiric-stt-service/app/utils/result_protocol.py
+"""
+`/transcribe-stream` sonuçları için kompakt binary kodlama (`encoding=binary`).
+
+Her sonuç tek bir binary WebSocket mesajıdır; tüm sayılar little-endian'dır:
+
+    Başlık (24 byte, RESULT_HEADER):
+        uint8   version          (RESULT_PROTOCOL_VERSION)
+        uint8   type             (1 = final, 2 = partial)
+        uint16  word_count
+        uint32  start_ms         (akışın başına göre; bilinmiyorsa 0)
+        uint32  end_ms
+        float32 confidence       (bilinmiyorsa NaN)
+        uint32  text_len         (UTF-8 byte)
+        uint32  stable_text_len  (UTF-8 byte; sadece partial'da dolu)
+    text, stable_text (UTF-8)
+    word_count kez:
+        WORD_HEADER (14 byte): uint32 start_ms, uint32 end_ms, float32 probability, uint16 word_len
+        word (UTF-8)
+
+Hata ve aşırı yük bildirimleri her iki kodlamada da JSON metin mesajı olarak kalır.
+"""
+import math
+import struct
+
+RESULT_PROTOCOL_VERSION = 1
+RESULT_HEADER = struct.Struct("<BBHIIfII")
+WORD_HEADER = struct.Struct("<IIfH")
+
+RESULT_TYPE_FINAL = 1
+RESULT_TYPE_PARTIAL = 2
+_RESULT_TYPES = {"final": RESULT_TYPE_FINAL, "partial": RESULT_TYPE_PARTIAL}
+_RESULT_TYPE_NAMES = {code: name for name, code in _RESULT_TYPES.items()}
+
+ENCODING_JSON = "json"
+ENCODING_BINARY = "binary"
+SUPPORTED_ENCODINGS = (ENCODING_JSON, ENCODING_BINARY)
+
+
+def is_binary_result(result: dict) -> bool:
+    """Sonucun binary kodlanabilen bir transkripsiyon sonucu olup olmadığını döner."""
+    return result.get("type") in _RESULT_TYPES
+
+
+def _to_ms(seconds) -> int:
+    return max(0, int(round((seconds or 0.0) * 1000)))
+
+
+def encode_result(result: dict) -> bytes:
+    """Bir final/partial sonuç sözlüğünü binary mesaja dönüştürür."""
+    text = result.get("text", "").encode("utf-8")
+    stable_text = result.get("stable_text", "").encode("utf-8")
+    words = result.get("words", [])
+    confidence = result.get("confidence")
+
+    parts = [
+        RESULT_HEADER.pack(
+            RESULT_PROTOCOL_VERSION,
+            _RESULT_TYPES[result["type"]],
+            len(words),
+            _to_ms(result.get("start")),
+            _to_ms(result.get("end")),
+            math.nan if confidence is None else confidence,
+            len(text),
+            len(stable_text)
+        ),
+        text,
+        stable_text,
+    ]
+    for word in words:
+        encoded_word = word["word"].encode("utf-8")
+        parts.append(WORD_HEADER.pack(_to_ms(word["start"]), _to_ms(word["end"]), word["probability"], len(encoded_word)))
+        parts.append(encoded_word)
+    return b"".join(parts)
+
+
+def decode_result(data: bytes) -> dict:
+    """`encode_result` ile üretilen mesajı sözlüğe geri çevirir (istemciler ve testler için)."""
+    version, result_type, word_count, start_ms, end_ms, confidence, text_len, stable_len = RESULT_HEADER.unpack_from(data)
+    if version != RESULT_PROTOCOL_VERSION:
+        raise ValueError(f"Unsupported result protocol version: {version}")
+
+    offset = RESULT_HEADER.size
+    text = bytes(data[offset:offset + text_len]).decode("utf-8")
+    offset += text_len
+    stable_text = bytes(data[offset:offset + stable_len]).decode("utf-8")
+    offset += stable_len
+
+    words = []
+    for _ in range(word_count):
+        word_start, word_end, probability, word_len = WORD_HEADER.unpack_from(data, offset)
+        offset += WORD_HEADER.size
+        words.append({
+            "start": word_start / 1000,
+            "end": word_end / 1000,
+            "word": bytes(data[offset:offset + word_len]).decode("utf-8"),
+            "probability": probability
+        })
+        offset += word_len
+
+    return {
+        "type": _RESULT_TYPE_NAMES[result_type],
+        "text": text,
+        "stable_text": stable_text,
+        "start": start_ms / 1000,
+        "end": end_ms / 1000,
+        "confidence": None if math.isnan(confidence) else confidence,
+        "words": words
+    }
@@ -0,0 +1,201 @@
+# sentiric-stt-service/benchmarks/common.py
+# Benchmark betiklerinin ortak yardımcıları: ses fikstürleri, sahte adaptör,
+# istatistikler ve JSON rapor biçimi. Betikler depo kök dizininden
+# `python -m benchmarks.<betik>` şeklinde çalıştırılır.
+import glob
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+import soundfile as sf
+
+from app.services.adapters.base import BaseSTTAdapter
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SPEAKERS_DIR = os.path.join(REPO_ROOT, "docs", "audio", "speakers")
+SAMPLE_RATE = 16000
+# Sentetik fikstürlerin varsayılan uzunlukları (saniye)
+DEFAULT_SYNTHETIC_SECONDS = (5, 30, 120)
+# Raporlarda karşılaştırılan, küçük olması iyi olan metrik adları
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms", "rtf", "peak_rss_mb")
+
+
+@dataclass
+class Fixture:
+    name: str
+    # Hedef örnekleme hızında mono int16 PCM
+    pcm: np.ndarray
+    # Diskteki/sentetik dosyanın kodlanmış hali (kod çözme benchmark'ları için)
+    encoded: bytes
+
+    @property
+    def duration_seconds(self) -> float:
+        return len(self.pcm) / SAMPLE_RATE
+
+
+class FakeAdapter(BaseSTTAdapter):
+    """
+    Model yüklemeden hattın geri kalanını ölçmek için deterministik adaptör.
+    Her çağrı, ses süresinin `rtf` katı kadar bekler (CTranslate2 gibi GIL'i
+    bırakan bir modeli taklit eder) ve ses uzunluğuna bağlı sabit bir metin döndürür.
+    """
+
+    def __init__(self, rtf: float = 0.05):
+        self.rtf = rtf
+
+    def transcribe(self, audio_input, language=None, **kwargs) -> str:
+        duration = len(audio_input) / SAMPLE_RATE
+        time.sleep(duration * self.rtf)
+        return " ".join(["kelime"] * max(1, int(duration * 2)))
+
+
+def synthetic_speech(seconds: float, seed: int = 0) -> np.ndarray:
+    """
+    Konuşmayı kaba şekilde taklit eden int16 PCM üretir: 1-4 saniyelik genlik
+    modülasyonlu ton patlamaları arasında 0.3-1.2 saniyelik düşük gürültülü
+    duraklamalar. Aynı tohum her zaman aynı sesi üretir.
+    """
+    rng = np.random.default_rng(seed)
+    total = int(seconds * SAMPLE_RATE)
+    parts = []
+    produced = 0
+    while produced < total:
+        burst = int(rng.uniform(1.0, 4.0) * SAMPLE_RATE)
+        t = np.arange(burst) / SAMPLE_RATE
+        pitch = rng.uniform(110, 220)
+        envelope = 0.5 + 0.5 * np.sin(2 * np.pi * rng.uniform(3, 6) * t)
+        voiced = np.sin(2 * np.pi * pitch * t) + 0.5 * np.sin(4 * np.pi * pitch * t)
+        parts.append(voiced * envelope * 6000 + rng.normal(0, 300, burst))
+        pause = int(rng.uniform(0.3, 1.2) * SAMPLE_RATE)
+        parts.append(rng.normal(0, 60, pause))
+        produced += burst + pause
+    return np.clip(np.concatenate(parts)[:total], -32768, 32767).astype(np.int16)
+
+
+def _encode_wav(pcm: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    sf.write(buffer, pcm, SAMPLE_RATE, subtype="PCM_16", format="WAV")
+    return buffer.getvalue()
+
+
+async def load_fixtures(include_samples: bool = True, synthetic_seconds: Iterable[float] = DEFAULT_SYNTHETIC_SECONDS) -> List[Fixture]:
+    """`docs/audio/speakers` altındaki örnek kayıtları ve sentetik sesleri yükler."""
+    from app.utils.audio import load_audio_file
+
+    fixtures = []
+    if include_samples:
+        for path in sorted(glob.glob(os.path.join(SPEAKERS_DIR, "*", "*.wav"))):
+            with open(path, "rb") as f:
+                encoded = f.read()
+            name = os.path.relpath(path, SPEAKERS_DIR).replace(os.sep, "/")
+            fixtures.append(Fixture(name=name, pcm=np.asarray(await load_audio_file(encoded)), encoded=encoded))
+    for index, seconds in enumerate(synthetic_seconds):
+        pcm = synthetic_speech(seconds, seed=index)
+        fixtures.append(Fixture(name=f"synthetic/{seconds:g}s", pcm=pcm, encoded=_encode_wav(pcm)))
+    return fixtures
+
+
+def latency_stats(latencies_seconds: List[float]) -> Dict[str, float]:
+    if not latencies_seconds:
+        return {"count": 0}
+    values = np.asarray(latencies_seconds) * 1000
+    return {
+        "count": len(values),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "max_ms": round(float(values.max()), 3),
+    }
+
+
+def throughput_stats(audio_seconds: float, wall_seconds: float) -> Dict[str, float]:
+    """Gerçek zaman oranı (RTF) ve saniyede işlenen ses süresi."""
+    return {
+        "audio_seconds": round(audio_seconds, 3),
+        "wall_seconds": round(wall_seconds, 4),
+        "rtf": round(wall_seconds / audio_seconds, 5) if audio_seconds else None,
+        "audio_seconds_per_second": round(audio_seconds / wall_seconds, 2) if wall_seconds else None,
+    }
+
+
+def peak_rss_mb() -> float:
+    """Sürecin o ana kadarki en yüksek yerleşik bellek kullanımı (MB)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux'ta KB, macOS'ta byte cinsindendir
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def parse_int_list(spec: str) -> List[int]:
+    return [int(part) for part in spec.split(",") if part.strip()]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report_metadata(benchmark: str, options: dict) -> dict:
+    return {
+        "benchmark": benchmark,
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "options": options,
+    }
+
+
+def write_report(report: dict, path: Optional[str]) -> None:
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+def _flatten(value, prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    if isinstance(value, dict):
+        for key, item in value.items():
+            flat.update(_flatten(item, f"{prefix}.{key}" if prefix else str(key)))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            label = item.get("name", index) if isinstance(item, dict) else index
+            flat.update(_flatten(item, f"{prefix}[{label}]"))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        flat[prefix] = value
+    return flat
+
+
+def compare_reports(current: dict, baseline_path: str, threshold: float = 0.1) -> List[str]:
+    """
+    İki raporun `results` bölümlerini karşılaştırır ve küçük olması iyi olan
+    metriklerde (`LOWER_IS_BETTER`) `threshold` oranından fazla kötüleşenleri
+    döndürür.
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    current_values = _flatten(current["results"])
+    regressions = []
+    for key, old in _flatten(baseline["results"]).items():
+        new = current_values.get(key)
+        if new is None or not old or not key.endswith(LOWER_IS_BETTER):
+            continue
+        change = (new - old) / old
+        if change > threshold:
+            regressions.append(f"{key}: {old} -> {new} (+{change:.0%})")
+    return regressions
@@ -0,0 +1,300 @@
+# sentiric-stt-service/benchmarks/pipeline_benchmark.py
+"""
+Transkripsiyon hattının çevrimdışı benchmark'ı.
+
+Üç aşamayı `docs/audio/speakers` altındaki örnekler ve sentetik sesler
+üzerinde ölçer:
+
+* decode: Yüklenen dosyanın kod çözme yolu: `load_audio_file` (işlem içi, gerekirse
+          ffmpeg) ve `AsyncFfmpegTranscoder` ile `PcmSpool`'a çözme (ffmpeg kuruluysa).
+* stream: `AudioProcessor.transcribe_stream`; farklı sayıda eşzamanlı oturumla.
+* model:  `adapter.transcribe`; çıkarım havuzu üzerinden farklı eşzamanlılık seviyeleriyle.
+
+Varsayılan olarak deterministik sahte adaptör kullanılır; böylece hattın
+kendi maliyeti modelden bağımsız ölçülür. Gerçek model için `--adapter faster_whisper`.
+Her suite kendi alt sürecinde çalışır; böylece `peak_rss_mb` önceki suite'lerin
+bellek kullanımını içermez.
+
+Kullanım (depo kök dizininden):
+    python -m benchmarks.pipeline_benchmark --output bench.json
+    python -m benchmarks.pipeline_benchmark --suites model --adapter faster_whisper --model-size small
+    python -m benchmarks.pipeline_benchmark --compare bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import BinaryIO, List
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.logging import setup_logging
+from app.services.adapters.base import BaseSTTAdapter
+from app.services.batching_service import BatchScheduler
+from app.services.streaming_service import AudioProcessor
+from app.services.stt_service import InferenceExecutor
+from app.utils.audio import UPLOAD_READ_CHUNK_BYTES, AsyncFfmpegTranscoder, load_audio_file
+from app.utils.audio_buffers import INT16_TO_FLOAT32_SCALE, PcmSpool
+from benchmarks.common import (
+    REPO_ROOT, FakeAdapter, Fixture, compare_reports, latency_stats, load_fixtures, parse_int_list,
+    peak_rss_mb, report_metadata, throughput_stats, write_report
+)
+
+SUITES = ("decode", "stream", "model")
+# Akış benchmark'ında bir WebSocket mesajının taşıdığı ses süresi (ms)
+STREAM_CHUNK_MS = 100
+SAMPLE_RATE_PER_MS = settings.STT_SERVICE_TARGET_SAMPLE_RATE // 1000
+# Starlette'in UploadFile için kullandığı bellek sınırı; daha büyük yüklemeler diske taşar
+UPLOAD_SPOOL_BYTES = 1024 * 1024
+
+
+def _upload_file(fixture: Fixture) -> BinaryIO:
+    """Fikstürü, HTTP yüklemelerinin çözüldüğü nesneyle aynı türde (SpooledTemporaryFile) döndürür."""
+    upload = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES)
+    upload.write(fixture.encoded)
+    upload.seek(0)
+    return upload
+
+
+async def _time_decoder(fixtures: List[Fixture], repeat: int, decode) -> dict:
+    latencies = []
+    audio_seconds = 0.0
+    for fixture in fixtures:
+        for _ in range(repeat):
+            with _upload_file(fixture) as upload:
+                started = time.perf_counter()
+                await decode(upload)
+                latencies.append(time.perf_counter() - started)
+            audio_seconds += fixture.duration_seconds
+    return {
+        "latency": latency_stats(latencies),
+        **throughput_stats(audio_seconds, sum(latencies)),
+    }
+
+
+async def bench_decode(fixtures: List[Fixture], repeat: int) -> dict:
+    results = {"load_audio_file": await _time_decoder(fixtures, repeat, load_audio_file)}
+
+    if shutil.which("ffmpeg"):
+        transcoder = AsyncFfmpegTranscoder(
+            max_concurrency=1,
+            timeout_seconds=settings.STT_SERVICE_FFMPEG_TIMEOUT_SECONDS,
+            target_sample_rate=settings.STT_SERVICE_TARGET_SAMPLE_RATE
+        )
+
+        async def transcode(upload: BinaryIO):
+            # İşlem içi kod çözücüleri atlayıp ffmpeg yolunu (stdin'e parça parça yazma + PcmSpool) ölçer
+            spool = PcmSpool(max_memory_bytes=settings.STT_SERVICE_UPLOAD_SPOOL_MB * 1024 * 1024)
+            return await transcoder.transcode(_iter_upload_chunks(upload), spool)
+
+        results["ffmpeg_transcoder"] = await _time_decoder(fixtures, repeat, transcode)
+    else:
+        results["ffmpeg_transcoder"] = {"skipped": "ffmpeg not found"}
+    results["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+
+async def _iter_upload_chunks(upload: BinaryIO):
+    while True:
+        chunk = upload.read(UPLOAD_READ_CHUNK_BYTES)
+        if not chunk:
+            return
+        yield chunk
+
+
+async def _stream_session(adapter: BaseSTTAdapter, executor: InferenceExecutor, scheduler, fixture: Fixture):
+    """Bir oturumu mümkün olan en hızlı şekilde akıtır; sonuç başına gecikmeyi ölçer."""
+    processor = AudioProcessor(adapter=adapter, executor=executor, scheduler=scheduler, partial_results=False)
+    chunk_samples = SAMPLE_RATE_PER_MS * STREAM_CHUNK_MS
+    last_chunk_at = [time.perf_counter()]
+
+    async def chunks():
+        for start in range(0, len(fixture.pcm), chunk_samples):
+            last_chunk_at[0] = time.perf_counter()
+            yield fixture.pcm[start:start + chunk_samples].tobytes()
+            # Gerçek bir soketteki gibi diğer oturumlara sıra ver
+            await asyncio.sleep(0)
+
+    result_latencies = []
+    started = time.perf_counter()
+    async for _ in processor.transcribe_stream(chunks()):
+        # Cümlenin bittiği parçanın alınmasından sonucun üretilmesine kadar geçen süre
+        result_latencies.append(time.perf_counter() - last_chunk_at[0])
+    return time.perf_counter() - started, result_latencies
+
+
+async def bench_stream(fixtures: List[Fixture], adapter: BaseSTTAdapter, concurrency_levels: List[int], batching: bool) -> dict:
+    results = {}
+    for concurrency in concurrency_levels:
+        executor = InferenceExecutor(
+            max_workers=settings.STT_SERVICE_INFERENCE_WORKERS,
+            max_queue_size=max(settings.STT_SERVICE_INFERENCE_QUEUE_SIZE, concurrency),
+            timeout_seconds=settings.STT_SERVICE_INFERENCE_TIMEOUT_SECONDS
+        )
+        scheduler = BatchScheduler(
+            executor, settings.STT_SERVICE_BATCH_WINDOW_MS, settings.STT_SERVICE_BATCH_MAX_SIZE
+        ) if batching else None
+        sessions = [fixtures[index % len(fixtures)] for index in range(concurrency)]
+        try:
+            started = time.perf_counter()
+            outcomes = await asyncio.gather(*(
+                _stream_session(adapter, executor, scheduler, fixture) for fixture in sessions
+            ))
+            wall_seconds = time.perf_counter() - started
+        finally:
+            executor.shutdown()
+
+        results[f"concurrency_{concurrency}"] = {
+            "sessions": concurrency,
+            "session_latency": latency_stats([session_seconds for session_seconds, _ in outcomes]),
+            "result_latency": latency_stats([latency for _, latencies in outcomes for latency in latencies]),
+            **throughput_stats(sum(fixture.duration_seconds for fixture in sessions), wall_seconds),
+        }
+    results["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+
+async def bench_model(fixtures: List[Fixture], adapter: BaseSTTAdapter, concurrency_levels: List[int], repeat: int) -> dict:
+    audios = [np.multiply(fixture.pcm, INT16_TO_FLOAT32_SCALE, dtype=np.float32) for fixture in fixtures]
+    results = {}
+    for concurrency in concurrency_levels:
+        executor = InferenceExecutor(max_workers=concurrency, max_queue_size=len(audios) * repeat, timeout_seconds=3600)
+        latencies = []
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(audio: np.ndarray) -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                await executor.run(adapter.transcribe, audio)
+                latencies.append(time.perf_counter() - started)
+
+        try:
+            started = time.perf_counter()
+            await asyncio.gather(*(run(audio) for _ in range(repeat) for audio in audios))
+            wall_seconds = time.perf_counter() - started
+        finally:
+            executor.shutdown()
+
+        audio_seconds = repeat * sum(fixture.duration_seconds for fixture in fixtures)
+        results[f"concurrency_{concurrency}"] = {
+            "latency": latency_stats(latencies),
+            **throughput_stats(audio_seconds, wall_seconds),
+        }
+    results["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+
+def create_adapter(args) -> BaseSTTAdapter:
+    if args.adapter == "fake":
+        return FakeAdapter(rtf=args.fake_rtf)
+    from app.services.adapters.faster_whisper_adapter import FasterWhisperAdapter
+    return FasterWhisperAdapter(model_size=args.model_size, compute_type=args.compute_type)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Transkripsiyon hattı benchmark'ı")
+    parser.add_argument("--suites", default=",".join(SUITES), help=f"Virgülle ayrılmış: {', '.join(SUITES)}")
+    parser.add_argument("--adapter", choices=("fake", "faster_whisper"), default="fake")
+    parser.add_argument("--fake-rtf", type=float, default=0.05, help="Sahte adaptörün gerçek zaman oranı")
+    parser.add_argument("--model-size", default=settings.STT_SERVICE_MODEL_SIZE)
+    parser.add_argument("--compute-type", default=settings.STT_SERVICE_COMPUTE_TYPE)
+    parser.add_argument("--concurrency", default="1,2,4,8", help="Denenecek eşzamanlılık seviyeleri")
+    parser.add_argument("--repeat", type=int, default=3, help="Kod çözme ve model ölçümlerinin tekrar sayısı")
+    parser.add_argument("--synthetic-seconds", default="5,30,120", help="Sentetik fikstür uzunlukları (saniye)")
+    parser.add_argument("--no-samples", action="store_true", help="docs/audio/speakers örneklerini kullanma")
+    parser.add_argument("--batching", action="store_true", help="Akış oturumlarını BatchScheduler üzerinden işle")
+    parser.add_argument("--output", help="JSON raporun yazılacağı dosya")
+    parser.add_argument("--compare", help="Karşılaştırılacak önceki JSON rapor")
+    parser.add_argument("--regression-threshold", type=float, default=0.1, help="Gerileme sayılacak kötüleşme oranı")
+    return parser.parse_args(argv)
+
+
+async def run_suites(args, suites: List[str]) -> dict:
+    concurrency_levels = parse_int_list(args.concurrency)
+    fixtures = await load_fixtures(
+        include_samples=not args.no_samples,
+        synthetic_seconds=[float(part) for part in args.synthetic_seconds.split(",") if part.strip()]
+    )
+    adapter = create_adapter(args) if {"stream", "model"} & set(suites) else None
+
+    results = {
+        "fixtures": [{"name": fixture.name, "duration_seconds": round(fixture.duration_seconds, 2)} for fixture in fixtures],
+    }
+    if "decode" in suites:
+        results["decode"] = await bench_decode(fixtures, args.repeat)
+    if "stream" in suites:
+        results["stream"] = await bench_stream(fixtures, adapter, concurrency_levels, args.batching)
+    if "model" in suites:
+        results["model"] = await bench_model(fixtures, adapter, concurrency_levels, args.repeat)
+    return results
+
+
+def _suite_argv(args, suite: str, output: str) -> List[str]:
+    argv = [
+        "--suites", suite,
+        "--adapter", args.adapter,
+        "--fake-rtf", str(args.fake_rtf),
+        "--model-size", args.model_size,
+        "--compute-type", args.compute_type,
+        "--concurrency", args.concurrency,
+        "--repeat", str(args.repeat),
+        "--synthetic-seconds", args.synthetic_seconds,
+        "--output", output,
+    ]
+    if args.no_samples:
+        argv.append("--no-samples")
+    if args.batching:
+        argv.append("--batching")
+    return argv
+
+
+def run_suite_in_subprocess(args, suite: str) -> dict:
+    """Suite'i yeni bir Python sürecinde çalıştırır; `peak_rss_mb` sadece o suite'i yansıtır."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output = os.path.join(tmp_dir, f"{suite}.json")
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.pipeline_benchmark", *_suite_argv(args, suite, output)],
+            cwd=REPO_ROOT, stdout=subprocess.DEVNULL, check=True
+        )
+        with open(output, encoding="utf-8") as f:
+            return json.load(f)["results"]
+
+
+async def main(argv=None) -> int:
+    args = parse_args(argv)
+    setup_logging(log_level="WARNING", env="production")
+    suites = [suite.strip() for suite in args.suites.split(",") if suite.strip()]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        print(f"Unknown suites: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+
+    if len(suites) == 1:
+        # Bu süreç zaten sadece bu suite'i çalıştırıyor
+        results = await run_suites(args, suites)
+    else:
+        results = {}
+        for suite in suites:
+            suite_results = run_suite_in_subprocess(args, suite)
+            results.setdefault("fixtures", suite_results["fixtures"])
+            results[suite] = suite_results[suite]
+
+    report = {"meta": report_metadata("pipeline", vars(args)), "results": results}
+    write_report(report, args.output)
+
+    if args.compare:
+        regressions = compare_reports(report, args.compare, args.regression_threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,140 @@
+# sentiric-stt-service/benchmarks/vad_benchmark.py
+"""
+VAD motorlarının (`STT_SERVICE_VAD_ENGINE`) karşılaştırmalı benchmark'ı.
+
+Her motor ve WebSocket parça boyutu için iki ölçüm yapılır:
+
+* classify: Sadece frame bölme + sınıflandırma (`FrameAssembler.push_array` ve `classify`).
+* stream:   Modelsiz tam alma yolu (`AudioProcessor.transcribe_stream`, gecikmesiz sahte adaptör).
+
+Maliyet, işlenen ses süresi başına harcanan CPU süresi (`rtf`) olarak raporlanır;
+`audio_seconds_per_second`, tek bir çekirdeğin bu yolu kaç gerçek zamanlı
+oturum için çalıştırabileceğinin üst sınırıdır. Ayrıca her motorun konuşma
+olarak işaretlediği frame oranı ve referans motorla (webrtc) frame bazında
+uyumu raporlanır.
+
+Kullanım (depo kök dizininden):
+    python -m benchmarks.vad_benchmark --output vad.json
+    python -m benchmarks.vad_benchmark --chunk-ms 20,100,500 --compare vad.json
+"""
+import argparse
+import asyncio
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from app.core.logging import setup_logging
+from app.services.streaming_service import AudioProcessor
+from app.services.stt_service import InferenceExecutor
+from app.services.vad_service import VAD_ENGINE_ENERGY, VAD_ENGINE_WEBRTC, VAD_FRAME_DURATION_MS, create_vad
+from app.utils.audio_buffers import FrameAssembler
+from benchmarks.common import (
+    SAMPLE_RATE, FakeAdapter, Fixture, compare_reports, load_fixtures, parse_int_list,
+    report_metadata, throughput_stats, write_report
+)
+
+ENGINES = (VAD_ENGINE_WEBRTC, VAD_ENGINE_ENERGY)
+FRAME_SIZE_BYTES = SAMPLE_RATE * VAD_FRAME_DURATION_MS // 1000 * 2
+
+
+def _chunks(fixture: Fixture, chunk_ms: int) -> List[bytes]:
+    chunk_samples = SAMPLE_RATE * chunk_ms // 1000
+    return [fixture.pcm[start:start + chunk_samples].tobytes() for start in range(0, len(fixture.pcm), chunk_samples)]
+
+
+def classify_fixture(engine: str, chunks: List[bytes]) -> tuple:
+    """Parçaları tek bir oturum gibi sınıflandırır; (frame kararları, CPU süresi) döner."""
+    vad = create_vad(engine)
+    assembler = FrameAssembler(FRAME_SIZE_BYTES)
+    decisions = []
+    started = time.process_time()
+    for chunk in chunks:
+        decisions.append(vad.classify(assembler.push_array(chunk), SAMPLE_RATE))
+    return np.concatenate(decisions), time.process_time() - started
+
+
+async def stream_fixture(engine: str, chunks: List[bytes], executor: InferenceExecutor) -> float:
+    """Parçaları modelsiz alma yolundan geçirir; CPU süresini döner."""
+    processor = AudioProcessor(adapter=FakeAdapter(rtf=0), executor=executor, partial_results=False)
+    processor.vad = create_vad(engine)
+
+    async def source():
+        for chunk in chunks:
+            yield chunk
+
+    started = time.process_time()
+    async for _ in processor.transcribe_stream(source()):
+        pass
+    return time.process_time() - started
+
+
+async def bench_chunk_size(fixtures: List[Fixture], chunk_ms: int, repeat: int) -> Dict[str, dict]:
+    executor = InferenceExecutor(max_workers=1, max_queue_size=4, timeout_seconds=60)
+    results = {}
+    decisions = {}
+    try:
+        for engine in ENGINES:
+            audio_seconds = classify_seconds = stream_seconds = 0.0
+            for fixture in fixtures:
+                chunks = _chunks(fixture, chunk_ms)
+                for _ in range(repeat):
+                    voiced, cpu_seconds = classify_fixture(engine, chunks)
+                    classify_seconds += cpu_seconds
+                    stream_seconds += await stream_fixture(engine, chunks, executor)
+                    audio_seconds += fixture.duration_seconds
+                decisions.setdefault(engine, []).append(voiced)
+            results[engine] = {
+                "classify": throughput_stats(audio_seconds, classify_seconds),
+                "stream": throughput_stats(audio_seconds, stream_seconds),
+                "voiced_ratio": round(float(np.concatenate(decisions[engine]).mean()), 4),
+            }
+    finally:
+        executor.shutdown()
+
+    reference = np.concatenate(decisions[VAD_ENGINE_WEBRTC])
+    for engine in ENGINES:
+        results[engine]["agreement_with_webrtc"] = round(float(np.mean(np.concatenate(decisions[engine]) == reference)), 4)
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="VAD motorlarının karşılaştırmalı benchmark'ı")
+    parser.add_argument("--chunk-ms", default="20,100,500", help="Denenecek WebSocket parça süreleri (ms)")
+    parser.add_argument("--repeat", type=int, default=3, help="Her fikstürün kaç kez işleneceği")
+    parser.add_argument("--synthetic-seconds", default="5,30,120", help="Sentetik fikstür uzunlukları (saniye)")
+    parser.add_argument("--no-samples", action="store_true", help="docs/audio/speakers örneklerini kullanma")
+    parser.add_argument("--output", help="JSON raporun yazılacağı dosya")
+    parser.add_argument("--compare", help="Karşılaştırılacak önceki JSON rapor")
+    parser.add_argument("--regression-threshold", type=float, default=0.1, help="Gerileme sayılacak kötüleşme oranı")
+    return parser.parse_args(argv)
+
+
+async def main(argv=None) -> int:
+    args = parse_args(argv)
+    setup_logging(log_level="WARNING", env="production")
+    fixtures = await load_fixtures(
+        include_samples=not args.no_samples,
+        synthetic_seconds=[float(part) for part in args.synthetic_seconds.split(",") if part.strip()]
+    )
+
+    results = {
+        "fixtures": [{"name": fixture.name, "duration_seconds": round(fixture.duration_seconds, 2)} for fixture in fixtures],
+    }
+    for chunk_ms in parse_int_list(args.chunk_ms):
+        results[f"chunk_{chunk_ms}ms"] = await bench_chunk_size(fixtures, chunk_ms, args.repeat)
+
+    report = {"meta": report_metadata("vad", vars(args)), "results": results}
+    write_report(report, args.output)
+
+    if args.compare:
+        regressions = compare_reports(report, args.compare, args.regression_threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,283 @@
+# sentiric-stt-service/benchmarks/ws_load.py
+"""
+`/transcribe-stream` için gerçek zamanlı, eşzamanlı çağrı simülasyonu.
+
+WAV dosyalarını N eşzamanlı WebSocket oturumuna gerçek zaman hızında
+(ayarlanabilir parça boyutu ve zamanlama sapmasıyla) oynatır ve her cümle
+için konuşmanın bittiği andan final sonucun gelişine kadar geçen süreyi ölçer.
+
+Beklenen cümle sonları, sunucuyla aynı VAD ayarları (STT_SERVICE_VAD_*)
+kullanılarak `AudioProcessor` ile çevrimdışı hesaplanır: her cümlenin,
+sunucunun onu bitmiş sayacağı ses konumu bilinir. Final sonuç, bu konumu
+içeren parçanın gönderilmesinden itibaren ölçülür. Gelmeyen finaller
+`missing` (model bazı cümleleri gürültü sayıp boş döndürebilir), SLA'yı
+aşanlar `late` olarak sayılır. Sunucunun `/metrics` adresindeki
+`process_cpu_seconds_total` farkından oturum başına CPU kullanımı hesaplanır.
+
+Kullanım (depo kök dizininden):
+    python -m benchmarks.ws_load --url ws://localhost:15010/api/v1/transcribe-stream --sessions 5,10,20,40 --sla-ms 1500
+    python -m benchmarks.ws_load --sessions 50 --ramp-seconds 10 --jitter-ms 20 --output load.json
+"""
+import argparse
+import asyncio
+import glob
+import os
+import random
+import sys
+import time
+import urllib.parse
+import urllib.request
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import numpy as np
+import websockets
+
+from app.core.config import settings
+from app.core.logging import setup_logging
+from app.services.streaming_service import AudioProcessor
+from app.services.stt_service import InferenceExecutor
+from app.utils.audio import load_audio_file
+from benchmarks.common import (
+    SPEAKERS_DIR, FakeAdapter, latency_stats, parse_int_list, report_metadata, write_report
+)
+
+SAMPLE_RATE = settings.STT_SERVICE_TARGET_SAMPLE_RATE
+
+
+@dataclass
+class Recording:
+    name: str
+    pcm: np.ndarray
+    # Sunucunun final sonuç üreteceği ses konumları (saniye)
+    final_offsets: List[float]
+
+    @property
+    def duration_seconds(self) -> float:
+        return len(self.pcm) / SAMPLE_RATE
+
+
+@dataclass
+class SessionOutcome:
+    latencies: List[float] = field(default_factory=list)
+    expected: int = 0
+    received: int = 0
+    error: Optional[str] = None
+
+
+async def expected_final_offsets(pcm: np.ndarray, chunk_samples: int) -> List[float]:
+    """Kaydı sunucunun VAD'ından geçirerek her final sonucun üretileceği ses konumunu bulur."""
+    executor = InferenceExecutor(max_workers=1, max_queue_size=4, timeout_seconds=60)
+    processor = AudioProcessor(adapter=FakeAdapter(rtf=0), executor=executor, partial_results=False)
+    fed = [0]
+
+    async def chunks():
+        for start in range(0, len(pcm), chunk_samples):
+            fed[0] = min(start + chunk_samples, len(pcm))
+            yield pcm[start:start + chunk_samples].tobytes()
+
+    offsets = []
+    try:
+        async for result in processor.transcribe_stream(chunks()):
+            if result.get("type") == "final" and fed[0] < len(pcm):
+                offsets.append(fed[0] / SAMPLE_RATE)
+    finally:
+        executor.shutdown()
+    return offsets
+
+
+async def load_recordings(paths: List[str], chunk_samples: int) -> List[Recording]:
+    # Son cümlenin de akış kapanmadan sessizlikle bitirilmesi için kuyruğa sessizlik eklenir
+    tail = np.zeros(int((settings.STT_SERVICE_VAD_END_OF_SPEECH_MS + 500) / 1000 * SAMPLE_RATE), dtype=np.int16)
+    recordings = []
+    for path in paths:
+        with open(path, "rb") as f:
+            pcm = np.concatenate([np.asarray(await load_audio_file(f.read())), tail])
+        recordings.append(Recording(os.path.relpath(path), pcm, await expected_final_offsets(pcm, chunk_samples)))
+    return recordings
+
+
+async def run_session(url: str, recording: Recording, args, start_delay: float) -> SessionOutcome:
+    await asyncio.sleep(start_delay)
+    outcome = SessionOutcome(expected=len(recording.final_offsets))
+    chunk_samples = SAMPLE_RATE * args.chunk_ms // 1000
+    # Gönderilen her parçanın bittiği ses konumu ve gönderilme zamanı
+    sent: List[tuple] = []
+    finals: List[float] = []
+    all_sent = asyncio.Event()
+
+    try:
+        async with websockets.connect(url, max_size=None) as websocket:
+            async def receive():
+                async for message in websocket:
+                    if isinstance(message, str) and '"final"' in message:
+                        finals.append(time.perf_counter())
+                        if all_sent.is_set() and len(finals) >= outcome.expected:
+                            return
+
+            receiver = asyncio.create_task(receive())
+            started = time.perf_counter()
+            chunk_seconds = args.chunk_ms / 1000
+            for index, start in enumerate(range(0, len(recording.pcm), chunk_samples)):
+                # Mutlak zamana göre planlanır; sapmalar birikmez
+                target = started + index * chunk_seconds + random.uniform(-args.jitter_ms, args.jitter_ms) / 1000
+                delay = target - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await websocket.send(recording.pcm[start:start + chunk_samples].tobytes())
+                sent.append((min(start + chunk_samples, len(recording.pcm)) / SAMPLE_RATE, time.perf_counter()))
+                if receiver.done():
+                    break
+            all_sent.set()
+
+            try:
+                await asyncio.wait_for(receiver, timeout=args.drain_seconds)
+            except asyncio.TimeoutError:
+                pass
+    except websockets.exceptions.ConnectionClosed as e:
+        close = getattr(e, "rcvd", None)
+        outcome.error = f"closed: {close.code if close else 'no close frame'}"
+    except OSError as e:
+        outcome.error = f"connect: {e}"
+
+    # Her final, konumu gönderilmiş ve henüz eşleşmemiş en eski cümleyle eşleştirilir
+    expected_index = 0
+    for received_at in finals:
+        if expected_index >= len(recording.final_offsets):
+            break
+        offset = recording.final_offsets[expected_index]
+        sent_at = next((at for end, at in sent if end >= offset), None)
+        if sent_at is None or sent_at > received_at:
+            continue
+        outcome.latencies.append(received_at - sent_at)
+        expected_index += 1
+    outcome.received = len(finals)
+    return outcome
+
+
+def _server_cpu_seconds(metrics_url: Optional[str]) -> Optional[float]:
+    if not metrics_url:
+        return None
+    try:
+        with urllib.request.urlopen(metrics_url, timeout=5) as response:
+            for line in response.read().decode("utf-8").splitlines():
+                if line.startswith("process_cpu_seconds_total "):
+                    return float(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+async def run_step(url: str, recordings: List[Recording], sessions: int, args) -> dict:
+    cpu_before = _server_cpu_seconds(args.metrics_url)
+    started = time.perf_counter()
+    assigned = [recordings[index % len(recordings)] for index in range(sessions)]
+    outcomes = await asyncio.gather(*(
+        run_session(url, recording, args, args.ramp_seconds * index / max(1, sessions))
+        for index, recording in enumerate(assigned)
+    ))
+    wall_seconds = time.perf_counter() - started
+    cpu_after = _server_cpu_seconds(args.metrics_url)
+
+    latencies = [latency for outcome in outcomes for latency in outcome.latencies]
+    expected = sum(outcome.expected for outcome in outcomes)
+    stats = latency_stats(latencies)
+    audio_seconds = sum(recording.duration_seconds for recording in assigned)
+    step = {
+        "sessions": sessions,
+        "failed_sessions": sum(1 for outcome in outcomes if outcome.error),
+        "errors": sorted({outcome.error for outcome in outcomes if outcome.error}),
+        "expected_finals": expected,
+        "matched_finals": len(latencies),
+        "missing_finals": max(0, expected - len(latencies)),
+        "late_finals": sum(1 for latency in latencies if latency * 1000 > args.sla_ms),
+        "latency": stats,
+        "wall_seconds": round(wall_seconds, 2),
+    }
+    if cpu_before is not None and cpu_after is not None:
+        cpu_seconds = cpu_after - cpu_before
+        step["server_cpu_seconds"] = round(cpu_seconds, 2)
+        # Bir oturumun gerçek zamanlı ses için kullandığı ortalama çekirdek
+        step["server_cores_per_session"] = round(cpu_seconds / audio_seconds, 4) if audio_seconds else None
+    step["within_sla"] = (
+        step["failed_sessions"] == 0
+        and stats.get("count", 0) > 0
+        and stats["p95_ms"] <= args.sla_ms
+    )
+    return step
+
+
+def default_metrics_url(url: str) -> str:
+    parsed = urllib.parse.urlparse(url)
+    scheme = "https" if parsed.scheme == "wss" else "http"
+    return f"{scheme}://{parsed.netloc}/metrics"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="WebSocket akışı için gerçek zamanlı yük üreteci")
+    parser.add_argument("--url", default="ws://localhost:15010/api/v1/transcribe-stream")
+    parser.add_argument("--language", default=None)
+    parser.add_argument("--audio", nargs="*", help="Oynatılacak WAV dosyaları (varsayılan: docs/audio/speakers)")
+    parser.add_argument("--sessions", default="1,5,10", help="Sırayla denenecek eşzamanlı oturum sayıları")
+    parser.add_argument("--chunk-ms", type=int, default=100, help="Bir mesajın taşıdığı ses süresi (ms)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Gönderim zamanına eklenen rastgele sapma (± ms)")
+    parser.add_argument("--ramp-seconds", type=float, default=2.0, help="Oturum başlangıçlarının yayıldığı süre")
+    parser.add_argument("--drain-seconds", type=float, default=10.0, help="Ses bittikten sonra sonuçların bekleneceği süre")
+    parser.add_argument("--sla-ms", type=float, default=1500.0, help="Cümle sonu -> final gecikmesi için SLA (p95)")
+    parser.add_argument("--stop-on-breach", action="store_true", help="SLA aşıldığında sonraki adımları çalıştırma")
+    parser.add_argument("--metrics-url", default=None, help="Sunucu CPU'su için /metrics adresi (varsayılan: URL'den türetilir)")
+    parser.add_argument("--no-server-metrics", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON raporun yazılacağı dosya")
+    args = parser.parse_args(argv)
+    if args.no_server_metrics:
+        args.metrics_url = None
+    elif args.metrics_url is None:
+        args.metrics_url = default_metrics_url(args.url)
+    return args
+
+
+async def main(argv=None) -> int:
+    args = parse_args(argv)
+    setup_logging(log_level="WARNING", env="production")
+    random.seed(args.seed)
+
+    paths = args.audio or sorted(glob.glob(os.path.join(SPEAKERS_DIR, "*", "*.wav")))
+    if not paths:
+        print("No audio files to replay.", file=sys.stderr)
+        return 2
+    recordings = await load_recordings(paths, SAMPLE_RATE * args.chunk_ms // 1000)
+
+    query = {"language": args.language} if args.language else {}
+    url = f"{args.url}?{urllib.parse.urlencode(query)}" if query else args.url
+
+    steps = []
+    for sessions in parse_int_list(args.sessions):
+        step = await run_step(url, recordings, sessions, args)
+        steps.append(step)
+        print(
+            f"sessions={sessions} p95={step['latency'].get('p95_ms')}ms late={step['late_finals']} "
+            f"missing={step['missing_finals']} failed={step['failed_sessions']} within_sla={step['within_sla']}",
+            file=sys.stderr
+        )
+        if args.stop_on_breach and not step["within_sla"]:
+            break
+
+    sustained = [step["sessions"] for step in steps if step["within_sla"]]
+    report = {
+        "meta": report_metadata("ws_load", vars(args)),
+        "results": {
+            "recordings": [
+                {"name": recording.name, "duration_seconds": round(recording.duration_seconds, 2), "utterances": len(recording.final_offsets)}
+                for recording in recordings
+            ],
+            "steps": steps,
+            "max_sessions_within_sla": max(sustained) if sustained else 0,
+        },
+    }
+    write_report(report, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -15,20 +15,21 @@ logger = logging.getLogger("G711_Simulator")
 # --- Yapılandırma ---
 STT_HOST = "localhost:15010"
 INPUT_RATE = 8000
-TARGET_RATE = 16000
 CHUNK_SIZE = 800  # 100ms @ 8kHz (8000 * 0.100)
 
 async def test_g711_simulation(language: str, logprob: Optional[float], nospeech: Optional[float]):
     """
-    Mikrofondan 8kHz (telefon kalitesi) ses alır, 16kHz'e dönüştürür ve
-    STT servisine anlık olarak gönderir.
+    Mikrofondan 8kHz (telefon kalitesi) ses alır, G.711 μ-law olarak kodlar ve
+    STT servisine anlık olarak gönderir. Çözme ve 16kHz'e dönüştürme sunucuda yapılır.
     """
     
     # WebSocket URL'ini komut satırı argümanlarına göre dinamik olarak oluştur
     params = {
         'language': language,
         'logprob_threshold': logprob,
-        'no_speech_threshold': nospeech
+        'no_speech_threshold': nospeech,
+        'codec': 'pcm_mulaw',
+        'sample_rate': INPUT_RATE
     }
     # Sadece değeri olan parametreleri URL'e ekle
     query_string = "&".join(f"{k}={v}" for k, v in params.items() if v is not None)
@@ -50,7 +51,7 @@ async def test_g711_simulation(language: str, logprob: Optional[float], nospeech
             )
             
             logger.info("🎤 Telefon kalitesinde (8kHz) konuşmaya başlayın (Durdurmak için CTRL+C)...")
-            logger.info("📞 Script, sesi 16kHz'e dönüştürüp STT servisine anlık olarak gönderiyor.")
+            logger.info("📞 Script, sesi G.711 μ-law (8kHz) olarak STT servisine anlık olarak gönderiyor.")
             
             # Sunucudan gelen mesajları dinlemek için ayrı bir görev (task) başlat
             listen_task = asyncio.create_task(listen_for_transcripts(websocket))
@@ -60,11 +61,11 @@ async def test_g711_simulation(language: str, logprob: Optional[float], nospeech
                     # 8000 Hz, 16-bit PCM ses verisini mikrofondan oku
                     data_8khz = stream.read(CHUNK_SIZE, exception_on_overflow=False)
                     
-                    # Sesi 16000 Hz'e yeniden örnekle (resample)
-                    data_16khz, _ = audioop.ratecv(data_8khz, 2, 1, INPUT_RATE, TARGET_RATE, None)
+                    # Sesi, RTP'deki gibi G.711 μ-law olarak kodla (örnek başına 1 byte)
+                    data_ulaw = audioop.lin2ulaw(data_8khz, 2)
                     
-                    # Standartlaştırılmış sesi WebSocket üzerinden sunucuya gönder
-                    await websocket.send(data_16khz)
+                    # Ham telefon sesini WebSocket üzerinden sunucuya gönder
+                    await websocket.send(data_ulaw)
                         
             except KeyboardInterrupt:
                 logger.info("\n⏹️ Kullanıcı tarafından durduruldu.")
@@ -0,0 +1,45 @@
+import io
+import numpy as np
+import soundfile as sf
+
+from app.services.adapters.base import BaseSTTAdapter
+from app.services.vad_service import VadEngine
+
+SAMPLE_RATE = 16000
+
+
+class EnergyVad(VadEngine):
+    """Testlerde webrtcvad yerine kullanılan, genliğe bakan basit VAD."""
+
+    def is_speech(self, frame, sample_rate):
+        return np.abs(np.frombuffer(frame, dtype=np.int16)).mean() > 1000
+
+
+class LengthAdapter(BaseSTTAdapter):
+    """Her parça için parçanın süresini metin olarak döndüren sahte adaptör."""
+
+    def transcribe(self, audio_input, language=None, **kwargs) -> str:
+        return f"{len(audio_input) / SAMPLE_RATE:.1f}"
+
+
+def make_speech(pattern):
+    """(konuşma mu, saniye) çiftlerinden int16 PCM üretir."""
+    parts = []
+    for is_speech, seconds in pattern:
+        samples = int(seconds * SAMPLE_RATE)
+        if is_speech:
+            parts.append((np.sin(np.arange(samples) * 0.1) * 8000).astype(np.int16))
+        else:
+            parts.append(np.zeros(samples, dtype=np.int16))
+    return np.concatenate(parts)
+
+
+def make_audio(speech_seconds: float, silence_seconds: float = 1.0) -> bytes:
+    """Önünde ve arkasında sessizlik olan tek bir konuşmayı ham PCM olarak üretir."""
+    return make_speech([(False, silence_seconds), (True, speech_seconds), (False, silence_seconds)]).tobytes()
+
+
+def make_wav(seconds) -> bytes:
+    buffer = io.BytesIO()
+    sf.write(buffer, make_speech([(True, seconds)]), SAMPLE_RATE, subtype="PCM_16", format="WAV")
+    return buffer.getvalue()
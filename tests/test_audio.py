@@ -0,0 +1,152 @@
+import io
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from app.utils.audio import (
+    ALAW_TO_PCM16, ULAW_TO_PCM16, CODEC_PCM_MULAW, CODEC_PCM_S16LE,
+    StreamDecoder, StreamingResampler, AsyncFfmpegTranscoder, FfmpegTimeoutError, decode_audio_in_process
+)
+from app.utils.audio_buffers import AudioTooLongError, PcmSpool
+
+
+def test_g711_tables_match_reference_values():
+    """
+    G.711 tablolarının standarttaki bilinen değerleri ürettiğini test eder.
+    """
+    # μ-law: 0xFF ve 0x7F sıfır, 0x00 en büyük negatif, 0x80 en büyük pozitif değer
+    assert ULAW_TO_PCM16[0xFF] == 0
+    assert ULAW_TO_PCM16[0x00] == -32124
+    assert ULAW_TO_PCM16[0x80] == 32124
+    # A-law: 0xD5 en küçük pozitif, 0x55 en küçük negatif değer
+    assert ALAW_TO_PCM16[0xD5] == 8
+    assert ALAW_TO_PCM16[0x55] == -8
+    assert ALAW_TO_PCM16[0xAA] == 32256
+
+
+def test_streaming_resampler_is_chunk_size_independent():
+    """
+    Sesi parça parça yeniden örneklemenin, tek seferde işlemekle aynı sonucu verdiğini test eder.
+    """
+    signal = (np.sin(2 * np.pi * 440 * np.arange(8000) / 8000) * 10000).astype(np.int16)
+
+    whole = StreamingResampler(8000, 16000).process(signal)
+    resampler = StreamingResampler(8000, 16000)
+    chunked = np.concatenate([resampler.process(signal[i:i + 173]) for i in range(0, len(signal), 173)])
+
+    assert len(whole) == 16000
+    np.testing.assert_array_equal(whole, chunked)
+
+
+@pytest.mark.parametrize("input_rate", [8000, 44100, 48000])
+def test_streaming_resampler_preserves_dc_level(input_rate):
+    """
+    Sabit bir sinyalin, geçiş süresinden sonra aynı seviyede kaldığını test eder.
+    """
+    resampler = StreamingResampler(input_rate, 16000)
+    output = resampler.process(np.full(input_rate, 1000, dtype=np.int16))
+    assert abs(len(output) - 16000) <= 1
+    assert np.all(np.abs(output[-1000:] - 1000) <= 2)
+
+
+def test_stream_decoder_handles_odd_pcm_chunks_and_g711():
+    """
+    PCM akışında tek byte'lık bölünmelerin ve μ-law çözümünün doğru işlendiğini test eder.
+    """
+    pcm = np.arange(100, dtype=np.int16).tobytes()
+    decoder = StreamDecoder(CODEC_PCM_S16LE, 16000, 16000)
+    assert decoder.is_passthrough
+    assert decoder.decode(pcm[:51]) + decoder.decode(pcm[51:]) == pcm
+
+    ulaw = StreamDecoder(CODEC_PCM_MULAW, 8000, 16000)
+    assert len(ulaw.decode(bytes([0xFF]) * 800)) == 1600 * 2
+
+    with pytest.raises(ValueError):
+        StreamDecoder("opus", 8000, 16000)
+
+
+def test_decode_audio_in_process_fast_path_and_resampling():
+    """
+    Uygun formattaki WAV'ın doğrudan, farklı örnekleme hızındaki stereo dosyanın ise
+    16kHz mono int16'ya çözüldüğünü test eder.
+    """
+    conformant = io.BytesIO()
+    sf.write(conformant, np.full(16000, 0.25, dtype=np.float32), 16000, subtype="PCM_16", format="WAV")
+    audio = decode_audio_in_process(conformant.getvalue())
+    assert audio.dtype == np.int16
+    assert len(audio) == 16000
+    np.testing.assert_allclose(audio, 8192, atol=2)
+
+    stereo = io.BytesIO()
+    sf.write(stereo, np.zeros((44100, 2), dtype=np.float32), 44100, format="WAV")
+    audio = decode_audio_in_process(stereo.getvalue())
+    assert audio.dtype == np.int16
+    assert abs(len(audio) - 16000) <= 1
+
+
+def test_pcm_spool_spills_to_disk_and_enforces_duration():
+    """
+    PcmSpool'un bellek sınırı aşıldığında diske taştığını, hizasız byte bloklarını
+    doğru birleştirdiğini ve süre sınırını uyguladığını test eder.
+    """
+    samples = np.arange(-500, 500, dtype=np.int16)
+
+    in_memory = PcmSpool(max_memory_bytes=1 << 20)
+    in_memory.write(samples)
+    np.testing.assert_array_equal(in_memory.finish(), samples)
+
+    spilled = PcmSpool(max_memory_bytes=100)
+    raw = samples.tobytes()
+    spilled.write_bytes(raw[:301])
+    spilled.write_bytes(raw[301:])
+    pcm = spilled.finish()
+    assert isinstance(pcm, np.memmap)
+    np.testing.assert_array_equal(pcm, samples)
+
+    limited = PcmSpool(max_memory_bytes=1 << 20, max_samples=999)
+    with pytest.raises(AudioTooLongError):
+        limited.write(samples)
+
+
+def test_truncated_wav_fmt_chunk_falls_back_instead_of_crashing():
+    """
+    fmt bloğu kesik bir WAV başlığının struct hatası yerine çözülemeyen dosya
+    olarak (None) ele alındığını test eder.
+    """
+    truncated = b"RIFF" + (20).to_bytes(4, "little") + b"WAVE" + b"fmt " + (16).to_bytes(4, "little") + b"\x01\x00\x01\x00"
+
+    assert decode_audio_in_process(truncated) is None
+
+
+def test_soundfile_read_error_falls_back_to_next_decoder(monkeypatch):
+    """
+    libsndfile'ın açabildiği ama okurken hata verdiği dosyanın 500'e yol
+    açmadan sıradaki kod çözücüyle (PyAV) çözüldüğünü test eder.
+    """
+    def failing_blocks(self, *args, **kwargs):
+        raise RuntimeError("Internal psf_fseek() failed.")
+        yield
+
+    monkeypatch.setattr(sf.SoundFile, "blocks", failing_blocks)
+    stereo = io.BytesIO()
+    sf.write(stereo, np.zeros((44100, 2), dtype=np.float32), 44100, format="WAV")
+
+    audio = decode_audio_in_process(stereo.getvalue())
+
+    assert audio is not None
+    assert abs(len(audio) - 16000) <= 1
+
+
+@pytest.mark.asyncio
+async def test_ffmpeg_timeout_is_distinct_from_decode_error():
+    """
+    ffmpeg zaman aşımının bozuk dosya hatasından (ValueError) ayrı bir
+    FfmpegTimeoutError olarak fırlatıldığını ve sürecin öldürüldüğünü test eder.
+    """
+    transcoder = AsyncFfmpegTranscoder(max_concurrency=1, timeout_seconds=0.2, target_sample_rate=16000)
+    transcoder._command = lambda: ["sleep", "5"]
+
+    with pytest.raises(FfmpegTimeoutError) as exc_info:
+        await transcoder.transcode(b"", PcmSpool(max_memory_bytes=1024))
+    assert not isinstance(exc_info.value, ValueError)
@@ -0,0 +1,61 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.services.adapters.base import BaseSTTAdapter, TranscriptionRequest
+from app.services.batching_service import BatchScheduler
+from app.services.stt_service import InferenceExecutor
+
+
+class RecordingAdapter(BaseSTTAdapter):
+    """Toplu çağrıları kaydeden, model gerektirmeyen sahte adaptör."""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def transcribe(self, audio_input, language=None, **kwargs) -> str:
+        return f"{len(audio_input)}:{language}"
+
+    def transcribe_batch(self, requests):
+        self.batch_sizes.append(len(requests))
+        return super().transcribe_batch(requests)
+
+
+@pytest.mark.asyncio
+async def test_batch_scheduler_groups_concurrent_requests():
+    """
+    Aynı pencere içinde gelen isteklerin tek bir toplu çağrıda işlendiğini ve
+    sonuçların doğru isteğe döndüğünü test eder.
+    """
+    executor = InferenceExecutor(max_workers=1, max_queue_size=4, timeout_seconds=5)
+    scheduler = BatchScheduler(executor, window_ms=20, max_batch_size=8)
+    adapter = RecordingAdapter()
+
+    results = await asyncio.gather(*[
+        scheduler.transcribe(adapter, TranscriptionRequest(audio=np.zeros(n, dtype=np.float32), language="tr"))
+        for n in (100, 200, 300)
+    ])
+
+    assert results == ["100:tr", "200:tr", "300:tr"]
+    assert adapter.batch_sizes == [3]
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_batch_scheduler_flushes_at_max_batch_size():
+    """
+    Parti maksimum boyuta ulaştığında pencere beklenmeden gönderildiğini test eder.
+    """
+    executor = InferenceExecutor(max_workers=1, max_queue_size=4, timeout_seconds=5)
+    scheduler = BatchScheduler(executor, window_ms=10_000, max_batch_size=2)
+    adapter = RecordingAdapter()
+
+    results = await asyncio.wait_for(asyncio.gather(*[
+        scheduler.transcribe(adapter, TranscriptionRequest(audio=np.zeros(10, dtype=np.float32)))
+        for _ in range(2)
+    ]), timeout=1)
+
+    assert results == ["10:None", "10:None"]
+    assert adapter.batch_sizes == [2]
+    executor.shutdown()
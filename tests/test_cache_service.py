@@ -0,0 +1,66 @@
+import io
+
+import numpy as np
+import pytest
+
+from app.services.adapters.base import TranscriptionResult, TranscriptionSegment
+from app.services.cache_service import TranscriptionCache, pcm_cache_key, upload_cache_key
+
+
+def make_result(text: str) -> TranscriptionResult:
+    return TranscriptionResult(text=text, segments=[TranscriptionSegment(start=0.0, end=1.5, text=text)])
+
+
+def test_cache_keys_depend_on_audio_and_parameters():
+    """
+    Anahtarın ses içeriğine ve parametrelere bağlı olduğunu, varsayılan eşiğin
+    açıkça gönderilmesinin anahtarı değiştirmediğini test eder.
+    """
+    from app.core.config import settings
+
+    pcm = np.arange(1000, dtype=np.int16)
+    key = pcm_cache_key(pcm, model="medium:int8", language="tr", logprob_threshold=None, no_speech_threshold=None)
+
+    assert key == pcm_cache_key(pcm.copy(), model="medium:int8", language="tr", logprob_threshold=None, no_speech_threshold=None)
+    assert key != pcm_cache_key(pcm, model="small:int8", language="tr", logprob_threshold=None, no_speech_threshold=None)
+    assert key == pcm_cache_key(
+        pcm, model="medium:int8", language="tr", logprob_threshold=settings.STT_SERVICE_LOGPROB_THRESHOLD, no_speech_threshold=None
+    )
+    assert key != pcm_cache_key(pcm, model="medium:int8", language="en", logprob_threshold=None, no_speech_threshold=None)
+    assert key != pcm_cache_key(pcm[1:], model="medium:int8", language="tr", logprob_threshold=None, no_speech_threshold=None)
+
+    upload = io.BytesIO(b"RIFF" + b"\x00" * 5000)
+    upload_key = upload_cache_key(upload, model="medium:int8", language=None, logprob_threshold=None, no_speech_threshold=None)
+    assert upload.tell() == 0
+    assert upload_key != key
+
+
+@pytest.mark.asyncio
+async def test_memory_lru_is_bounded_by_bytes():
+    """
+    Bellek katmanının boyut sınırını aştığında en uzun süredir kullanılmayan sonucu sildiğini test eder.
+    """
+    entry_size = len(b'{"text": "aaaa", "segments": [{"start": 0.0, "end": 1.5, "text": "aaaa"}]}')
+    cache = TranscriptionCache(max_memory_bytes=entry_size * 2)
+
+    await cache.put("a", make_result("aaaa"))
+    await cache.put("b", make_result("bbbb"))
+    assert (await cache.get("a")).text == "aaaa"  # "a" en son kullanılan olur
+    await cache.put("c", make_result("cccc"))
+
+    assert await cache.get("b") is None
+    assert (await cache.get("a")).text == "aaaa"
+    assert (await cache.get("c")).segments[0].end == 1.5
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_survives_new_instance(tmp_path):
+    """
+    Disk katmanına yazılan sonucun yeni bir önbellek örneği tarafından okunabildiğini test eder.
+    """
+    await TranscriptionCache(max_memory_bytes=1024, disk_dir=str(tmp_path)).put("k" * 64, make_result("merhaba dünya"))
+
+    restarted = TranscriptionCache(max_memory_bytes=1024, disk_dir=str(tmp_path))
+    result = await restarted.get("k" * 64)
+    assert result.text == "merhaba dünya"
+    assert len(restarted) == 1
@@ -0,0 +1,105 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.core.metrics import DECODING_FALLBACKS
+from app.services.adapters.base import DECODING_TIER_FILE, DECODING_TIER_STREAMING
+from app.services.adapters.faster_whisper_adapter import FALLBACK_TEMPERATURES, FasterWhisperAdapter
+
+
+class FakeWhisperModel:
+    """Işın genişliğine göre önceden belirlenmiş segmentleri döndüren sahte model."""
+
+    feature_extractor = SimpleNamespace(sampling_rate=16000)
+
+    def __init__(self, avg_logprob_by_beam):
+        self.avg_logprob_by_beam = avg_logprob_by_beam
+        self.calls = []
+        self.log_prob_thresholds = []
+
+    def transcribe(self, audio, beam_size, temperature, **kwargs):
+        self.calls.append((beam_size, temperature))
+        self.log_prob_thresholds.append(kwargs.get("log_prob_threshold", -1.0))
+        segment = SimpleNamespace(
+            start=0.0, end=1.0, text=f" beam {beam_size}", words=None,
+            avg_logprob=self.avg_logprob_by_beam[beam_size], no_speech_prob=0.01, compression_ratio=1.2
+        )
+        return iter([segment]), SimpleNamespace(duration=1.0, language="tr", language_probability=0.99)
+
+
+def make_adapter(model) -> FasterWhisperAdapter:
+    adapter = FasterWhisperAdapter.__new__(FasterWhisperAdapter)
+    adapter.model = model
+    adapter.model_loaded = True
+    adapter.model_size = "fake"
+    return adapter
+
+
+def test_confident_greedy_result_is_not_decoded_again():
+    """
+    Greedy sonucu yeterince güvenliyse sesin tek geçişte, ışın aramasız çözüldüğünü test eder.
+    """
+    model = FakeWhisperModel({1: -0.2, 5: -0.1})
+
+    text = make_adapter(model).transcribe(np.zeros(16000, dtype=np.float32), tier=DECODING_TIER_STREAMING)
+
+    assert text == "beam 1"
+    assert model.calls == [(1, 0.0)]
+
+
+def test_low_confidence_greedy_result_falls_back_to_wider_beam():
+    """
+    Greedy sonucun log olasılığı katman eşiğinin altındaysa sesin geniş ışınla
+    yeniden çözüldüğünü ve yedeğin metrikte sayıldığını test eder.
+    """
+    model = FakeWhisperModel({1: -0.7, 5: -0.3})
+    fallbacks = DECODING_FALLBACKS.labels(model="fake", tier=DECODING_TIER_FILE, reason="low_logprob")
+    before = fallbacks._value.get()
+
+    # -0.7, akış eşiğini (-0.8) geçer ama daha sıkı olan dosya eşiğini (-0.5) geçemez
+    assert make_adapter(model).transcribe(np.zeros(16000, dtype=np.float32), tier=DECODING_TIER_STREAMING) == "beam 1"
+    text = make_adapter(model).transcribe(np.zeros(16000, dtype=np.float32), tier=DECODING_TIER_FILE)
+
+    assert text == "beam 5"
+    assert [beam for beam, _ in model.calls] == [1, 1, 5]
+    assert fallbacks._value.get() == before + 1
+    # Katman eşiği yalnızca yedeği tetikler; sıcaklık yedeği faster-whisper'ın kendi eşiğiyle çalışır
+    assert model.log_prob_thresholds == [-1.0, -1.0, -1.0]
+
+
+class MixedConfidenceModel(FakeWhisperModel):
+    """İlk geçişte ortadaki segmenti güvensiz döndüren, her çağrının ses uzunluğunu ve dilini kaydeden sahte model."""
+
+    def __init__(self):
+        super().__init__({})
+        self.inputs = []
+
+    def transcribe(self, audio, beam_size, temperature, language=None, **kwargs):
+        self.calls.append((beam_size, temperature))
+        self.inputs.append((len(audio), language))
+        if beam_size == 1:
+            segments = [
+                SimpleNamespace(start=start, end=start + 1.0, text=f" greedy {index}", words=None,
+                                avg_logprob=avg_logprob, no_speech_prob=0.01, compression_ratio=1.2)
+                for index, (start, avg_logprob) in enumerate([(0.0, -0.2), (1.0, -0.9), (2.0, -0.2)])
+            ]
+        else:
+            segments = [SimpleNamespace(start=0.1, end=0.9, text=" beam", words=None,
+                                        avg_logprob=-0.3, no_speech_prob=0.01, compression_ratio=1.2)]
+        return iter(segments), SimpleNamespace(duration=len(audio) / 16000, language=language or "tr", language_probability=0.99)
+
+
+def test_one_unreliable_segment_only_redecodes_its_own_window():
+    """
+    Tek bir güvensiz segmentin tüm sesi değil sadece kendi penceresini, ilk
+    geçişte tespit edilen dille yeniden çözdürdüğünü ve segment zamanlarının
+    pencerenin konumuna göre düzeltildiğini test eder.
+    """
+    model = MixedConfidenceModel()
+
+    result = make_adapter(model).transcribe_detailed(np.zeros(3 * 16000, dtype=np.float32), tier=DECODING_TIER_FILE)
+
+    assert model.calls == [(1, 0.0), (5, FALLBACK_TEMPERATURES)]
+    assert model.inputs == [(3 * 16000, None), (16000, "tr")]
+    assert result.text == "greedy 0 beam greedy 2"
+    assert [(segment.start, segment.end) for segment in result.segments] == [(0.0, 1.0), (1.1, 1.9), (2.0, 3.0)]
@@ -0,0 +1,239 @@
+import asyncio
+import io
+import zipfile
+import pytest
+
+from app.services.file_transcription_service import (
+    BatchBudget, BatchTooLargeError, find_silence_chunks, read_audio_archive, transcribe_files_batch, transcribe_pcm
+)
+from app.services.stt_service import InferenceExecutor, InferenceQueueFullError
+from conftest import SAMPLE_RATE, EnergyVad, LengthAdapter, make_speech, make_wav
+
+
+def test_find_silence_chunks_cuts_inside_pauses():
+    """
+    Parçaların maksimum uzunluğu aşmadan sessizliklerin içinden kesildiğini ve
+    tamamen sessiz bölümlerin atlandığını test eder.
+    """
+    pcm = make_speech([(True, 8), (False, 1), (True, 8), (False, 1), (True, 4), (False, 12)])
+    chunks = find_silence_chunks(pcm, SAMPLE_RATE, max_chunk_seconds=10, min_silence_ms=300, vad=EnergyVad())
+
+    assert len(chunks) == 3
+    assert chunks[0][0] == 0
+    for start, end in chunks:
+        assert end - start <= 10 * SAMPLE_RATE
+    # İlk kesim noktası 8-9. saniyeler arasındaki sessizliğin içinde olmalı
+    assert 8 * SAMPLE_RATE < chunks[0][1] < 9 * SAMPLE_RATE
+    assert chunks[1][0] == chunks[0][1]
+
+
+@pytest.mark.asyncio
+async def test_transcribe_pcm_stitches_chunks_in_order(monkeypatch):
+    """
+    Uzun kaydın parçalar halinde işlendiğini ve segment zamanlarının parçanın
+    dosyadaki konumuna göre düzeltilerek sırayla birleştirildiğini test eder.
+    """
+    from app.services import file_transcription_service
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "STT_SERVICE_LONG_FILE_MIN_SECONDS", 10.0)
+    monkeypatch.setattr(settings, "STT_SERVICE_LONG_FILE_CHUNK_SECONDS", 10.0)
+    monkeypatch.setattr(file_transcription_service, "create_vad", EnergyVad)
+
+    pcm = make_speech([(True, 8), (False, 1), (True, 8), (False, 1), (True, 4)])
+    executor = InferenceExecutor(max_workers=2, max_queue_size=4, timeout_seconds=5)
+    try:
+        result = await transcribe_pcm(LengthAdapter(), executor, pcm)
+    finally:
+        executor.shutdown()
+
+    assert len(result.segments) == 3
+    starts = [segment.start for segment in result.segments]
+    assert starts == sorted(starts)
+    assert starts[0] == 0.0
+    assert 8 < starts[1] < 9
+    assert result.segments[-1].end == pytest.approx(len(pcm) / SAMPLE_RATE)
+    assert result.text == " ".join(segment.text for segment in result.segments)
+
+
+@pytest.mark.asyncio
+async def test_transcribe_pcm_retries_only_the_chunk_rejected_by_a_full_queue(monkeypatch):
+    """
+    Çıkarım kuyruğu dolduğunda sadece reddedilen parçanın tekrar denendiğini,
+    biten parçaların yeniden işlenmediğini ve eşzamanlılık sınırına uyulduğunu test eder.
+    """
+    from app.services import file_transcription_service
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "STT_SERVICE_LONG_FILE_MIN_SECONDS", 10.0)
+    monkeypatch.setattr(settings, "STT_SERVICE_LONG_FILE_CHUNK_SECONDS", 10.0)
+    monkeypatch.setattr(file_transcription_service, "create_vad", EnergyVad)
+
+    class FlakyExecutor:
+        max_workers = 4
+
+        def __init__(self):
+            self.calls = []
+            self.running = 0
+            self.max_running = 0
+            self.rejected = False
+
+        async def run(self, func, audio, *args, **kwargs):
+            self.calls.append(len(audio))
+            if len(self.calls) == 2 and not self.rejected:
+                self.rejected = True
+                raise InferenceQueueFullError("full")
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            await asyncio.sleep(0.01)
+            self.running -= 1
+            return func(audio, *args, **kwargs)
+
+    pcm = make_speech([(True, 8), (False, 1), (True, 8), (False, 1), (True, 4)])
+    executor = FlakyExecutor()
+    progress = []
+    result = await transcribe_pcm(
+        LengthAdapter(), executor, pcm, on_progress=progress.append, concurrency=1, queue_full_retry_seconds=0.01
+    )
+
+    assert len(result.segments) == 3
+    assert len(executor.calls) == 4
+    assert executor.calls[1] == executor.calls[2]
+    assert executor.max_running == 1
+    assert progress[-1] == pytest.approx(1.0)
+
+
+@pytest.mark.asyncio
+async def test_transcribe_files_batch_groups_items_and_isolates_errors(monkeypatch):
+    """
+    Dosyaların BATCH_MAX_SIZE'lık gruplar halinde modele verildiğini,
+    sonuçların gönderim sırasını koruduğunu ve çözülemeyen bir dosyanın
+    sadece kendi öğesini etkilediğini test eder.
+    """
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "STT_SERVICE_BATCH_MAX_SIZE", 3)
+
+    class RecordingAdapter(LengthAdapter):
+        def __init__(self):
+            self.batch_sizes = []
+
+        def transcribe_batch(self, requests):
+            self.batch_sizes.append(len(requests))
+            return super().transcribe_batch(requests)
+
+    files = [(f"{index}.wav", make_wav(1 + index)) for index in range(5)]
+    files.insert(2, ("broken.wav", b"not audio"))
+    adapter = RecordingAdapter()
+    executor = InferenceExecutor(max_workers=1, max_queue_size=4, timeout_seconds=5)
+    try:
+        results = await transcribe_files_batch(adapter, executor, files)
+    finally:
+        executor.shutdown()
+
+    assert [result.filename for result in results] == [name for name, _ in files]
+    assert results[2].text is None and results[2].error
+    assert [result.text for result in results if not result.error] == ["1.0", "2.0", "3.0", "4.0", "5.0"]
+    assert sorted(adapter.batch_sizes) == [2, 3]
+    assert results[0].to_dict() == {"filename": "0.wav", "text": "1.0", "error": None}
+
+
+@pytest.mark.asyncio
+async def test_unexpected_decoder_error_only_fails_its_own_item(monkeypatch):
+    """
+    Kesik bir klip kod çözücüde beklenmeyen bir hata (ValueError olmayan)
+    fırlatsa bile isteğin 500'e dönmediğini, hatanın sadece o öğeye
+    yazıldığını test eder.
+    """
+    import struct
+    from app.services import file_transcription_service
+
+    load_audio_file = file_transcription_service.load_audio_file
+    truncated = make_wav(1)[:60]
+
+    async def fragile_load(source):
+        data = source.read()
+        source.seek(0)
+        if data == truncated:
+            raise struct.error("unpack requires a buffer of 16 bytes")
+        return await load_audio_file(source)
+
+    monkeypatch.setattr(file_transcription_service, "load_audio_file", fragile_load)
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("one.wav", make_wav(1))
+        zf.writestr("cut.wav", truncated)
+        zf.writestr("two.wav", make_wav(2))
+    archive.seek(0)
+    files = read_audio_archive(archive, BatchBudget(max_files=10, max_total_bytes=1 << 20))
+    executor = InferenceExecutor(max_workers=1, max_queue_size=4, timeout_seconds=5)
+    try:
+        results = await transcribe_files_batch(LengthAdapter(), executor, files)
+    finally:
+        executor.shutdown()
+
+    assert [(result.filename, result.text, result.error) for result in results] == [
+        ("one.wav", "1.0", None),
+        ("cut.wav", None, "Audio file could not be decoded."),
+        ("two.wav", "2.0", None),
+    ]
+
+
+def test_read_audio_archive_skips_metadata_and_enforces_size():
+    """Arşivden sistem dosyalarının atlandığını ve açılmış boyut sınırının uygulandığını test eder."""
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("calls/a.wav", b"a" * 100)
+        zf.writestr("__MACOSX/calls/._a.wav", b"meta")
+        zf.writestr("calls/.DS_Store", b"meta")
+        zf.writestr("b.wav", b"b" * 100)
+
+    members = read_audio_archive(archive, BatchBudget(max_files=10, max_total_bytes=1000))
+    assert [name for name, _ in members] == ["calls/a.wav", "b.wav"]
+    with members[1][1].extract() as extracted:
+        assert extracted.read() == b"b" * 100
+    with pytest.raises(BatchTooLargeError):
+        read_audio_archive(archive, BatchBudget(max_files=10, max_total_bytes=150))
+    with pytest.raises(ValueError):
+        read_audio_archive(io.BytesIO(b"not a zip"), BatchBudget(max_files=10, max_total_bytes=1000))
+
+
+def test_batch_budget_spans_every_archive_in_the_request():
+    """
+    Dosya sayısı ve boyut sınırının arşiv başına değil isteğin tamamına
+    uygulandığını ve aşan arşivin hiçbir dosyası okunmadan reddedildiğini test eder.
+    """
+    archives = []
+    for prefix in ("a", "b"):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            for index in range(3):
+                zf.writestr(f"{prefix}{index}.wav", b"x" * 100)
+        archives.append(archive)
+
+    budget = BatchBudget(max_files=5, max_total_bytes=10_000)
+    assert len(read_audio_archive(archives[0], budget)) == 3
+    with pytest.raises(BatchTooLargeError):
+        read_audio_archive(archives[1], budget)
+
+    budget = BatchBudget(max_files=10, max_total_bytes=500)
+    read_audio_archive(archives[0], budget)
+    with pytest.raises(BatchTooLargeError):
+        read_audio_archive(archives[1], budget)
+
+
+@pytest.mark.asyncio
+async def test_transcribe_files_batch_extracts_archive_members_lazily():
+    """Arşiv üyelerinin çözüleceği sırada açılıp normal dosyalar gibi transkribe edildiğini test eder."""
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("one.wav", make_wav(1))
+        zf.writestr("two.wav", make_wav(2))
+    files = read_audio_archive(archive, BatchBudget(max_files=10, max_total_bytes=1 << 20))
+
+    executor = InferenceExecutor(max_workers=1, max_queue_size=4, timeout_seconds=5)
+    try:
+        results = await transcribe_files_batch(LengthAdapter(), executor, files)
+    finally:
+        executor.shutdown()
+
+    assert [(result.filename, result.text) for result in results] == [("one.wav", "1.0"), ("two.wav", "2.0")]
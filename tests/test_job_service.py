@@ -0,0 +1,158 @@
+import asyncio
+import io
+import os
+import time
+from types import SimpleNamespace
+import pytest
+
+from app.services.job_service import (
+    JOB_COMPLETED, JOB_QUEUED, JOB_RUNNING, Job, JobManager, JobQueueFullError, JobStore
+)
+from app.services.stt_service import InferenceExecutor
+from conftest import LengthAdapter, make_wav
+
+
+def make_manager(tmp_path, **kwargs):
+    options = dict(workers=1, max_queued=10, retention_seconds=3600)
+    options.update(kwargs)
+    return JobManager(JobStore(str(tmp_path / "jobs.sqlite3")), jobs_dir=str(tmp_path), **options)
+
+
+@pytest.mark.asyncio
+async def test_job_waits_for_model_then_completes_and_calls_back(tmp_path):
+    """
+    İşin model hazır olana kadar kuyrukta beklediğini, sonra tamamlanıp
+    sonucunun saklandığını, ses dosyasının silindiğini ve geri çağrının
+    yapıldığını test eder.
+    """
+    manager = make_manager(tmp_path, callback_url="http://localhost/callback")
+    delivered = []
+    manager._post_callback = delivered.append
+    executor = InferenceExecutor(max_workers=1, max_queue_size=4, timeout_seconds=5)
+    state = SimpleNamespace(model_ready=False, stt_adapter=None, model_registry=None, inference_executor=executor)
+    manager.start(state)
+    try:
+        job = await manager.submit(io.BytesIO(make_wav(2)), "call.wav", {"language": "tr"})
+        await asyncio.sleep(0.2)
+        assert (await manager.get(job.id)).status == JOB_QUEUED
+
+        state.stt_adapter = LengthAdapter()
+        state.model_ready = True
+        for _ in range(50):
+            finished = await manager.get(job.id)
+            # Geri çağrı iş bittikten sonra yapılır; yönetici ondan önce durdurulmaz
+            if finished.finished and delivered:
+                break
+            await asyncio.sleep(0.1)
+    finally:
+        await manager.stop()
+        executor.shutdown()
+
+    assert finished.status == JOB_COMPLETED
+    assert finished.progress == 1.0
+    assert finished.result.text == "2.0"
+    assert not os.path.exists(tmp_path / f"{job.id}.audio")
+    assert [delivered_job.id for delivered_job in delivered] == [job.id]
+
+
+@pytest.mark.asyncio
+async def test_job_queue_limit_recovery_and_expiry(tmp_path):
+    """
+    Kuyruk sınırının uygulandığını, yarıda kalmış işlerin yeniden başlatmada
+    kuyruğa geri alındığını ve süresi dolan işlerin silindiğini test eder.
+    """
+    manager = make_manager(tmp_path, max_queued=1, retention_seconds=60)
+    first = await manager.submit(io.BytesIO(make_wav(1)), "a.wav", {})
+    with pytest.raises(JobQueueFullError):
+        await manager.submit(io.BytesIO(make_wav(1)), "b.wav", {})
+
+    # Süreç iş işlenirken kapanmış gibi
+    assert manager.store.claim_next().id == first.id
+    assert manager.store.get(first.id).status == JOB_RUNNING
+    assert manager.store.requeue() == 1
+    assert manager.store.get(first.id).status == JOB_QUEUED
+
+    old = Job(id="old", status=JOB_QUEUED, filename=None, created_at=time.time() - 120, updated_at=time.time() - 120)
+    manager.store.add(old)
+    manager.store.finish("old", error="Transcription error")
+    manager.store._conn.execute("UPDATE jobs SET updated_at = ? WHERE id = 'old'", (time.time() - 120,))
+    assert manager.cleanup_expired() == 1
+    assert manager.store.get("old") is None
+    assert manager.store.get(first.id) is not None
+    manager.store.close()
+
+
+@pytest.mark.asyncio
+async def test_job_leaves_an_inference_worker_free_and_flushes_progress_before_stop(tmp_path):
+    """
+    İşlerin inference havuzunun en az bir iş parçacığını boş bıraktığını ve
+    durdurmada süren ilerleme yazmalarının veritabanı kapanmadan beklendiğini test eder.
+    """
+    manager = make_manager(tmp_path, workers=2)
+    manager.start(SimpleNamespace(model_ready=False, inference_executor=SimpleNamespace(max_workers=4)))
+    # İki iş parçacığı, toplamda havuzun son iş parçacığını boş bırakan tek bir yuva havuzunu paylaşır
+    assert manager._job_slots == 3
+
+    loop = asyncio.get_running_loop()
+    written = []
+
+    def slow_update(job_id, progress):
+        time.sleep(0.2)
+        written.append(progress)
+
+    manager.store.update_progress = slow_update
+    future = loop.run_in_executor(None, manager.store.update_progress, "job", 0.5)
+    manager._progress_writes.add(future)
+    future.add_done_callback(manager._progress_writes.discard)
+    await manager.stop()
+
+    assert written == [0.5]
+    assert not manager._progress_writes
+
+
+@pytest.mark.asyncio
+async def test_single_inference_worker_admits_interactive_requests_while_a_job_runs(tmp_path):
+    """
+    Tek çıkarım iş parçacığı ve tek iş parçacığıyla, çalışan bir iş varken
+    gelen etkileşimli isteklerin reddedilmediğini ve işin, etkileşimli çağrılar
+    bitene kadar parça göndermeden beklediğini test eder.
+    """
+    calls = []
+
+    class RecordingAdapter(LengthAdapter):
+        def transcribe(self, audio_input, language=None, **kwargs) -> str:
+            calls.append("job")
+            return super().transcribe(audio_input, language, **kwargs)
+
+    def interactive(name, seconds):
+        calls.append(name)
+        time.sleep(seconds)
+        return name
+
+    manager = make_manager(tmp_path)
+    executor = InferenceExecutor(max_workers=1, max_queue_size=1, timeout_seconds=5)
+    state = SimpleNamespace(model_ready=True, stt_adapter=RecordingAdapter(), model_registry=None, inference_executor=executor)
+    manager.start(state)
+    try:
+        first = asyncio.ensure_future(executor.run(interactive, "first", 0.5))
+        job = await manager.submit(io.BytesIO(make_wav(2)), "call.wav", {})
+        for _ in range(50):
+            if (await manager.get(job.id)).status == JOB_RUNNING:
+                break
+            await asyncio.sleep(0.02)
+        # İş çalışırken gelen ikinci etkileşimli istek kuyruğa kabul edilir
+        await asyncio.sleep(0.2)
+        assert await executor.run(interactive, "second", 0.1) == "second"
+        assert await first == "first"
+
+        for _ in range(50):
+            finished = await manager.get(job.id)
+            if finished.finished:
+                break
+            await asyncio.sleep(0.05)
+    finally:
+        await manager.stop()
+        executor.shutdown()
+
+    assert finished.status == JOB_COMPLETED
+    assert calls == ["first", "second", "job"]
@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from app.services.adapters.base import BaseSTTAdapter
+from app.services.model_registry import ModelRegistry, ModelVariant, UnknownModelError, parse_model_variants
+
+
+class NamedAdapter(BaseSTTAdapter):
+    def __init__(self, variant: ModelVariant):
+        self.variant = variant
+
+    def transcribe(self, audio_input, language=None, **kwargs) -> str:
+        return self.variant.name
+
+
+def make_registry(memory_budget_mb: int, loads: list) -> ModelRegistry:
+    def factory(variant):
+        loads.append(variant.name)
+        return NamedAdapter(variant)
+
+    variants = [
+        ModelVariant("default", "small", "int8", 700),
+        ModelVariant("archive", "medium", "int8", 1800),
+        ModelVariant("large", "large-v3", "int8", 3500),
+    ]
+    return ModelRegistry(variants, default_model="default", memory_budget_mb=memory_budget_mb, adapter_factory=factory)
+
+
+def test_parse_model_variants():
+    """
+    Varyant tanımlarının çözüldüğünü ve bellek tahmininin hesaplama tipine göre yapıldığını test eder.
+    """
+    live, archive = parse_model_variants("live=small:int8, archive=large-v3:float16:9000")
+    assert (live.name, live.model_size, live.compute_type, live.memory_mb) == ("live", "small", "int8", 700)
+    assert archive.memory_mb == 9000
+    assert parse_model_variants("x=medium:float16")[0].memory_mb == 3600
+
+    with pytest.raises(ValueError):
+        parse_model_variants("broken=small")
+
+
+@pytest.mark.asyncio
+async def test_variants_load_lazily_once():
+    """
+    Varyantların ilk kullanımda ve eşzamanlı isteklerde yalnızca bir kez yüklendiğini test eder.
+    """
+    loads = []
+    registry = make_registry(memory_budget_mb=0, loads=loads)
+    assert registry.loaded_models == []
+
+    adapters = await asyncio.gather(*(registry.get("archive") for _ in range(3)))
+    assert loads == ["archive"]
+    assert all(adapter is adapters[0] for adapter in adapters)
+    assert (await registry.get()).variant.name == "default"
+
+    with pytest.raises(UnknownModelError):
+        await registry.get("missing")
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_variant_is_evicted_but_default_is_pinned():
+    """
+    Bellek bütçesi aşılacağında varsayılan dışındaki en eski kullanılan varyantın boşaltıldığını test eder.
+    """
+    loads = []
+    registry = make_registry(memory_budget_mb=4300, loads=loads)
+
+    await registry.get()
+    await registry.get("archive")
+    assert registry.loaded_models == ["default", "archive"]
+
+    # default(700) + archive(1800) + large(3500) bütçeyi aşar: archive boşaltılır, default kalır
+    await registry.get("large")
+    assert registry.loaded_models == ["default", "large"]
+
+    await registry.get("archive")
+    assert loads == ["default", "archive", "large", "archive"]
+    assert "default" in registry.loaded_models
+
+
+@pytest.mark.asyncio
+async def test_local_models_are_warmed_up_before_use(monkeypatch):
+    """
+    Yerel modellerin yüklendikten sonra, kullanıma verilmeden önce ayarlanan
+    uzunluklarda ısınma çıkarımlarından geçirildiğini test eder.
+    """
+    from app.core.config import settings
+    from app.core.metrics import STARTUP_PHASE_SECONDS
+    from app.services.model_registry import create_model_registry
+
+    monkeypatch.setattr(settings, "STT_SERVICE_WARMUP_DURATIONS", "1, 2.5")
+    monkeypatch.setattr(settings, "STT_SERVICE_BATCHING_ENABLED", False)
+    monkeypatch.setattr(settings, "STT_SERVICE_MODEL_PATH", "/models/whisper-medium-ct2")
+
+    class RecordingAdapter(BaseSTTAdapter):
+        instances = []
+
+        def __init__(self, model_size=None, compute_type=None, model_path=None):
+            self.model_path = model_path
+            self.calls = []
+            RecordingAdapter.instances.append(self)
+
+        def transcribe(self, audio_input, language=None, **kwargs) -> str:
+            self.calls.append(len(audio_input))
+            return ""
+
+    registry = create_model_registry("faster_whisper", RecordingAdapter)
+    adapter = await registry.get()
+
+    assert adapter.model_path == "/models/whisper-medium-ct2"
+    assert adapter.calls == [settings.STT_SERVICE_TARGET_SAMPLE_RATE, int(2.5 * settings.STT_SERVICE_TARGET_SAMPLE_RATE)]
+    assert STARTUP_PHASE_SECONDS.labels(phase="warmup", model=registry.default_model)._value.get() >= 0
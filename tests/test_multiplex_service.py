@@ -0,0 +1,165 @@
+import asyncio
+import json
+import pytest
+
+from app.services.adapters.base import BaseSTTAdapter
+from app.services.multiplex_service import MUX_HEADER, MultiplexedSession
+from app.services.streaming_service import AudioProcessor
+from app.services.stt_service import InferenceExecutor
+from conftest import SAMPLE_RATE, EnergyVad, make_audio
+
+
+class LanguageAdapter(BaseSTTAdapter):
+    """Akışın dilini metin olarak döndüren sahte adaptör; sonuçların hangi akışa ait olduğunu gösterir."""
+
+    def transcribe(self, audio_input, language=None, **kwargs) -> str:
+        return f"{language} {len(audio_input) // SAMPLE_RATE}"
+
+
+@pytest.mark.asyncio
+async def test_multiplexed_streams_are_isolated_and_tagged():
+    """
+    Aynı bağlantıda iç içe gönderilen iki akışın ayrı durumla işlendiğini,
+    sonuçların doğru `stream_id` ile etiketlendiğini ve kontrol hatalarının
+    bildirildiğini test eder.
+    """
+    executor = InferenceExecutor(max_workers=1, max_queue_size=8, timeout_seconds=5)
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+        return True
+
+    async def create_processor(options):
+        processor = AudioProcessor(
+            adapter=LanguageAdapter(), executor=executor, language=options.get("language"), partial_results=False
+        )
+        processor.vad = EnergyVad()
+        return processor
+
+    session = MultiplexedSession(send, create_processor, max_streams=2)
+    try:
+        await session.handle_control(json.dumps({"type": "open", "stream_id": 1, "language": "tr"}))
+        await session.handle_control(json.dumps({"type": "open", "stream_id": 2, "language": "en"}))
+        await session.handle_control(json.dumps({"type": "open", "stream_id": 3}))
+        await session.handle_control(json.dumps({"type": "open", "stream_id": 1}))
+
+        first, second = make_audio(2.0), make_audio(1.0)
+        for start in range(0, max(len(first), len(second)), 3200):
+            for stream_id, audio in ((1, first), (2, second)):
+                if start < len(audio):
+                    await session.feed(MUX_HEADER.pack(stream_id) + audio[start:start + 3200])
+        await session.feed(MUX_HEADER.pack(9) + b"\x00\x00")
+
+        await session.handle_control(json.dumps({"type": "close", "stream_id": 1}))
+        await session.handle_control(json.dumps({"type": "close", "stream_id": 2}))
+        await session.close()
+    finally:
+        executor.shutdown()
+
+    finals = {message["stream_id"]: message["text"] for message in sent if message["type"] == "final"}
+    assert finals == {1: "tr 2", 2: "en 1"}
+    assert [message["stream_id"] for message in sent if message["type"] == "opened"] == [1, 2]
+    assert sorted(message["stream_id"] for message in sent if message["type"] == "closed") == [1, 2]
+    errors = {message["stream_id"]: message["message"] for message in sent if message["type"] == "error"}
+    assert set(errors) == {1, 3, 9}
+    assert "Too many open streams" in errors[3]
+    assert not session.streams
+
+
+@pytest.mark.asyncio
+async def test_slow_stream_open_does_not_block_other_streams():
+    """
+    Bir akışın işlemcisi (ör. model yüklemesi) oluşturulurken bağlantının
+    okunmaya devam ettiğini, diğer akışların işlendiğini, açılış sırasında
+    gelen sesin kaybolmadığını ve bilinmeyen akış hatasının akış başına bir kez
+    gönderildiğini test eder.
+    """
+    executor = InferenceExecutor(max_workers=1, max_queue_size=8, timeout_seconds=5)
+    sent = []
+    model_loaded = asyncio.Event()
+
+    async def send(message):
+        sent.append(message)
+        return True
+
+    async def create_processor(options):
+        if options.get("model") == "slow":
+            await model_loaded.wait()
+        processor = AudioProcessor(
+            adapter=LanguageAdapter(), executor=executor, language=options.get("language"), partial_results=False
+        )
+        processor.vad = EnergyVad()
+        return processor
+
+    session = MultiplexedSession(send, create_processor, max_streams=2)
+    try:
+        await asyncio.wait_for(
+            session.handle_control(json.dumps({"type": "open", "stream_id": 1, "language": "tr", "model": "slow"})), timeout=1
+        )
+        await session.handle_control(json.dumps({"type": "open", "stream_id": 2, "language": "en"}))
+
+        first, second = make_audio(2.0), make_audio(1.0)
+        for start in range(0, len(first), 3200):
+            await asyncio.wait_for(session.feed(MUX_HEADER.pack(1) + first[start:start + 3200]), timeout=1)
+            if start < len(second):
+                await session.feed(MUX_HEADER.pack(2) + second[start:start + 3200])
+        for _ in range(3):
+            await session.feed(MUX_HEADER.pack(9) + b"\x00\x00")
+        await session.handle_control(json.dumps({"type": "close", "stream_id": 2}))
+        for _ in range(100):
+            if any(message["type"] == "closed" for message in sent):
+                break
+            await asyncio.sleep(0.02)
+
+        # Akış 2 bittiğinde akış 1 hâlâ açılıyordur
+        assert [message["stream_id"] for message in sent if message["type"] == "opened"] == [2]
+        model_loaded.set()
+        await session.handle_control(json.dumps({"type": "close", "stream_id": 1}))
+        await session.close()
+    finally:
+        executor.shutdown()
+
+    finals = {message["stream_id"]: message["text"] for message in sent if message["type"] == "final"}
+    assert finals == {1: "tr 2", 2: "en 1"}
+    errors = [message for message in sent if message["type"] == "error"]
+    assert errors == [{"type": "error", "message": "Unknown stream.", "stream_id": 9}]
+    assert not session.streams
+
+
+@pytest.mark.asyncio
+async def test_audio_overflowing_while_opening_is_dropped_in_whole_frames():
+    """
+    Açılış sırasında bekletme sınırını aşan en eski sesin atıldığını, atılan
+    sesin frame katına tamamlandığını ve akış zaman çizgisine eklendiğini test eder.
+    """
+    executor = InferenceExecutor(max_workers=1, max_queue_size=8, timeout_seconds=5)
+    model_loaded = asyncio.Event()
+    processors = []
+
+    async def send(message):
+        return True
+
+    async def create_processor(options):
+        await model_loaded.wait()
+        processor = AudioProcessor(adapter=LanguageAdapter(), executor=executor, language="tr", partial_results=False)
+        processor.vad = EnergyVad()
+        processors.append(processor)
+        return processor
+
+    session = MultiplexedSession(send, create_processor, max_streams=1)
+    session.max_pending_bytes = SAMPLE_RATE * 2
+    audio = make_audio(1.0)
+    try:
+        await session.handle_control(json.dumps({"type": "open", "stream_id": 1}))
+        for start in range(0, len(audio), 333):
+            await session.feed(MUX_HEADER.pack(1) + audio[start:start + 333])
+        model_loaded.set()
+        await session.handle_control(json.dumps({"type": "close", "stream_id": 1}))
+        await session.close()
+    finally:
+        executor.shutdown()
+
+    processor = processors[0]
+    # Atılan ses ve kalan ses birlikte, gönderilen sesin tamamını kapsar
+    assert processor.frames_processed == len(audio) // processor.input_frame_bytes
@@ -0,0 +1,47 @@
+from app.utils.result_protocol import RESULT_HEADER, WORD_HEADER, decode_result, encode_result, is_binary_result
+
+
+def test_binary_result_round_trip_keeps_words_and_timing():
+    """
+    Final sonucun zamanları, güven skoru ve kelimeleriyle binary kodlamadan geri çözülebildiğini test eder.
+    """
+    result = {
+        "type": "final",
+        "text": "günaydın dünya",
+        "start": 1.25,
+        "end": 2.5,
+        "confidence": 0.75,
+        "words": [
+            {"start": 1.3, "end": 1.9, "word": "günaydın", "probability": 0.5},
+            {"start": 2.0, "end": 2.4, "word": "dünya", "probability": 0.25},
+        ],
+    }
+
+    decoded = decode_result(encode_result(result))
+
+    assert decoded["type"] == "final"
+    assert decoded["text"] == "günaydın dünya"
+    assert (decoded["start"], decoded["end"], decoded["confidence"]) == (1.25, 2.5, 0.75)
+    assert decoded["words"] == result["words"]
+
+
+def test_binary_partial_without_timing_uses_defaults():
+    """
+    Zaman ve güven bilgisi olmayan partial sonucun sıfır zaman ve None güvenle kodlandığını test eder.
+    """
+    partial = {"type": "partial", "text": "merhaba ben", "stable_text": "merhaba"}
+
+    decoded = decode_result(encode_result(partial))
+
+    assert decoded["stable_text"] == "merhaba"
+    assert decoded["confidence"] is None
+    assert decoded["start"] == 0.0 and decoded["words"] == []
+    assert not is_binary_result({"type": "error", "message": "x"})
+
+
+def test_header_sizes_match_documented_layout():
+    """
+    Başlık boyutlarının modül docstring'inde ve README'de belgelenen düzenle aynı olduğunu test eder.
+    """
+    assert RESULT_HEADER.size == 24
+    assert WORD_HEADER.size == 14
@@ -0,0 +1,77 @@
+import pytest
+
+from app.services.adapters.base import BaseSTTAdapter
+from app.services.session_service import SessionLimitError, SessionManager
+from app.services.streaming_service import AudioIngestQueue, AudioProcessor
+from app.services.stt_service import InferenceExecutor
+
+
+class SilentAdapter(BaseSTTAdapter):
+    def transcribe(self, audio_input, language=None, **kwargs) -> str:
+        return ""
+
+
+def make_session(manager: SessionManager, client: str = "127.0.0.1:5000"):
+    executor = InferenceExecutor(max_workers=1, max_queue_size=1, timeout_seconds=5)
+    processor = AudioProcessor(adapter=SilentAdapter(), executor=executor)
+    queue = AudioIngestQueue(processor.input_bytes_per_second, max_seconds=5)
+    return manager.register(processor, queue, client)
+
+
+def test_session_limit_rejects_new_sessions_until_one_leaves():
+    """
+    Oturum sınırına ulaşıldığında yeni oturumun reddedildiğini, biri kapandığında
+    tekrar kabul edildiğini test eder.
+    """
+    manager = SessionManager(max_sessions=2, idle_timeout_seconds=0, no_speech_timeout_seconds=0, sweep_interval_seconds=1)
+    first = make_session(manager)
+    make_session(manager)
+
+    with pytest.raises(SessionLimitError):
+        make_session(manager)
+
+    manager.unregister(first)
+    make_session(manager)
+    assert len(manager) == 2
+
+
+@pytest.mark.asyncio
+async def test_sweep_closes_idle_and_silent_sessions():
+    """
+    Ses almayan oturumun "idle", ses alıp konuşma içermeyen oturumun "no_speech"
+    nedeniyle kapatıldığını ve aktif oturuma dokunulmadığını test eder.
+    """
+    manager = SessionManager(max_sessions=0, idle_timeout_seconds=30, no_speech_timeout_seconds=300, sweep_interval_seconds=1)
+    idle = make_session(manager)
+    silent = make_session(manager)
+    active = make_session(manager)
+    now = active.queue.last_activity
+
+    idle.queue.last_activity = now - 31
+    silent.processor.last_speech_activity = now - 301
+    await active.queue.put(b"\x00" * 320)
+
+    assert manager.sweep(now=now) == 2
+    assert (idle.reclaimed, silent.reclaimed, active.reclaimed) == ("idle", "no_speech", None)
+    assert idle.queue.closed and silent.queue.closed and not active.queue.closed
+    # Kapatılan oturumlar, işleme görevi bitip kayıttan çıkana kadar sayılmaya devam eder
+    assert len(manager) == 3
+
+
+def test_reserved_session_counts_toward_limit_before_it_is_attached():
+    """
+    Bağlantı kabul edilir edilmez ayrılan (işlemcisi henüz kurulmamış) oturumun
+    sınıra sayıldığını ve taramanın bu oturumu atladığını test eder.
+    """
+    manager = SessionManager(max_sessions=1, idle_timeout_seconds=1, no_speech_timeout_seconds=1, sweep_interval_seconds=1)
+    reserved = manager.reserve("127.0.0.1:5000")
+
+    with pytest.raises(SessionLimitError):
+        manager.reserve("127.0.0.1:5001")
+    assert manager.sweep(now=reserved.opened_at + 60) == 0
+    assert reserved.reclaimed is None
+
+    manager.unregister(reserved)
+    assert len(manager) == 0
+    make_session(manager)
+    assert len(manager) == 1
@@ -0,0 +1,480 @@
+import asyncio
+import time
+import numpy as np
+import pytest
+
+from app.services.adapters.base import BaseSTTAdapter, TranscriptionResult, TranscriptionSegment, TranscriptionWord
+from app.services.streaming_service import (
+    AudioGap, AudioIngestQueue, AudioProcessor, PartialHypothesisStabilizer, repeated_prefix_length
+)
+from app.services.stt_service import InferenceExecutor
+from app.utils.audio_buffers import FrameAssembler, FrameRingBuffer, SpeechBuffer
+from conftest import SAMPLE_RATE, EnergyVad, make_audio
+
+
+class FakeAdapter(BaseSTTAdapter):
+    """Ses uzunluğunu kelime olarak döndüren, model gerektirmeyen sahte adaptör."""
+
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio_input, language=None, **kwargs) -> str:
+        self.calls.append(len(audio_input))
+        return "merhaba bu bir test"
+
+
+async def chunked(data: bytes, chunk_size: int = 3200):
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
+
+def make_processor(adapter, **kwargs) -> AudioProcessor:
+    executor = InferenceExecutor(max_workers=1, max_queue_size=4, timeout_seconds=5)
+    processor = AudioProcessor(adapter=adapter, executor=executor, **kwargs)
+    processor.vad = EnergyVad()
+    return processor
+
+
+def test_partial_stabilizer_never_rewrites_committed_words():
+    """
+    İki hipotezde aynı kalan öneklerin kesinleştiğini ve sonradan değişmediğini test eder.
+    """
+    stabilizer = PartialHypothesisStabilizer()
+    assert stabilizer.update("merhaba ben") == ("", "merhaba ben")
+    assert stabilizer.update("merhaba benim adım") == ("merhaba", "merhaba benim adım")
+    assert stabilizer.update("merhaba benim adım ali") == ("merhaba benim adım", "merhaba benim adım ali")
+    # Model önceki kelimeyi değiştirse bile kesinleşmiş kısım aynı kalır
+    assert stabilizer.update("merhaba benim adını") == ("merhaba benim adım", "merhaba benim adım")
+
+
+@pytest.mark.asyncio
+async def test_transcribe_stream_emits_final_after_silence():
+    """
+    Konuşma + sessizlik içeren bir akışta tek bir final sonucu üretildiğini test eder.
+    """
+    adapter = FakeAdapter()
+    processor = make_processor(adapter, partial_results=False)
+
+    results = [r async for r in processor.transcribe_stream(chunked(make_audio(2.0, 1.0)))]
+
+    assert results == [{"type": "final", "text": "merhaba bu bir test"}]
+    assert len(adapter.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_transcribe_stream_emits_partials_during_speech():
+    """
+    Ara sonuç modu açıkken konuşma sürerken partial mesajlarının final'den önce geldiğini test eder.
+    """
+    adapter = FakeAdapter()
+    processor = make_processor(adapter, partial_results=True)
+
+    results = [r async for r in processor.transcribe_stream(chunked(make_audio(3.0, 1.0)))]
+
+    types = [r["type"] for r in results]
+    assert "partial" in types
+    assert types[-1] == "final"
+    assert types.index("final") > types.index("partial")
+
+
+@pytest.mark.asyncio
+async def test_transcribe_stream_word_timestamps_are_relative_to_stream_start():
+    """
+    Kelime zamanlarının cümleye göre değil, akışın başına göre kaydırıldığını test eder.
+    """
+    class WordAdapter(FakeAdapter):
+        def transcribe_detailed(self, audio, language=None, word_timestamps=False, **kwargs):
+            assert word_timestamps
+            words = [TranscriptionWord(0.1, 0.4, "merhaba", 0.9), TranscriptionWord(0.5, 0.8, "dünya", 0.7)]
+            segment = TranscriptionSegment(0.0, 0.8, "merhaba dünya", confidence=0.8, words=words)
+            return TranscriptionResult(text="merhaba dünya", segments=[segment])
+
+    processor = make_processor(WordAdapter(), partial_results=False, word_timestamps=True)
+
+    results = [r async for r in processor.transcribe_stream(chunked(make_audio(2.0, 1.0)))]
+
+    assert len(results) == 1
+    result = results[0]
+    # Konuşma 1. saniyede başlar; cümle, önündeki ring buffer dolgusunu da içerir
+    assert 0.5 <= result["start"] <= 1.0
+    assert result["end"] > 3.0
+    assert result["confidence"] == 0.8
+    assert [word["word"] for word in result["words"]] == ["merhaba", "dünya"]
+    assert result["words"][0]["start"] == pytest.approx(result["start"] + 0.1)
+    assert result["words"][1]["end"] == pytest.approx(result["start"] + 0.8)
+
+
+@pytest.mark.asyncio
+async def test_language_is_pinned_after_confident_detection():
+    """
+    Dil verilmeyen oturumda, ilk uzun cümlede güvenle tespit edilen dilin sonraki
+    cümlelere verildiğini ve dil tespitinin tekrarlanmadığını test eder.
+    """
+    class DetectingAdapter(FakeAdapter):
+        def __init__(self):
+            super().__init__()
+            self.languages = []
+
+        def transcribe(self, audio_input, language=None, **kwargs) -> str:
+            self.languages.append(language)
+            return super().transcribe(audio_input, language)
+
+        def transcribe_detailed(self, audio, language=None, **kwargs):
+            self.languages.append(language)
+            return TranscriptionResult(text="merhaba", language="tr", language_probability=0.97)
+
+    adapter = DetectingAdapter()
+    processor = make_processor(adapter, partial_results=False)
+    audio = make_audio(2.5, 1.0) * 3
+
+    results = [r async for r in processor.transcribe_stream(chunked(audio))]
+
+    assert len(results) == 3
+    assert adapter.languages == [None, "tr", "tr"]
+    assert processor.pinned_language == "tr"
+
+
+@pytest.mark.asyncio
+async def test_language_redetection_keeps_decoding_with_pinned_language(monkeypatch):
+    """
+    Yeniden tespit süresi dolduğunda cümlenin sabit dille çözülmeye devam
+    ettiğini, dilin ayrı bir tespit çağrısıyla yenilendiğini ve (kelime
+    zamanları açıkken bile) tespitin yalnızca süre dolunca yapıldığını test eder.
+    """
+    class RedetectingAdapter(FakeAdapter):
+        def __init__(self):
+            super().__init__()
+            self.languages = []
+            self.detections = 0
+
+        def transcribe_detailed(self, audio, language=None, **kwargs):
+            self.languages.append(language)
+            # Gerçek adaptör gibi: dil verildiyse tespit edilen dil bildirilmez
+            if language:
+                return TranscriptionResult(text="merhaba")
+            return TranscriptionResult(text="merhaba", language="tr", language_probability=0.97)
+
+        def detect_language(self, audio):
+            self.detections += 1
+            return "en", 0.99
+
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "STT_SERVICE_LANGUAGE_REDETECT_SECONDS", 6.0)
+    adapter = RedetectingAdapter()
+    processor = make_processor(adapter, partial_results=False, word_timestamps=True)
+    audio = make_audio(2.5, 1.0) * 4
+
+    results = [r async for r in processor.transcribe_stream(chunked(audio))]
+
+    assert len(results) == 4
+    # Üçüncü cümle yeniden tespit edilirken de "tr" ile çözülür; sonraki cümle yeni dille çözülür
+    assert adapter.languages == [None, "tr", "tr", "en"]
+    assert adapter.detections == 1
+    assert processor.pinned_language == "en"
+
+
+@pytest.mark.asyncio
+async def test_long_utterance_is_split_at_quietest_frame_with_overlap(monkeypatch):
+    """
+    Sessizlik gelmeyen uzun konuşmanın, sınırdan önceki en sessiz noktadan
+    bölünüp hemen işlendiğini ve örtüşmede tekrar eden kelimelerin atıldığını test eder.
+    """
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "STT_SERVICE_VAD_MAX_UTTERANCE_SECONDS", 3.0)
+    monkeypatch.setattr(settings, "STT_SERVICE_VAD_SPLIT_SEARCH_MS", 1500)
+    monkeypatch.setattr(settings, "STT_SERVICE_VAD_SPLIT_OVERLAP_MS", 300)
+
+    class CountingAdapter(FakeAdapter):
+        def transcribe(self, audio_input, language=None, **kwargs) -> str:
+            self.calls.append(len(audio_input))
+            return ["bir iki üç", "üç dört beş"][len(self.calls) - 1]
+
+    speech = (np.sin(np.arange(4 * SAMPLE_RATE) * 0.1) * 8000).astype(np.int16)
+    # VAD'ı tetikte tutan, ama enerjisi belirgin şekilde düşük bir çukur (2.0 - 2.06 sn)
+    speech[2 * SAMPLE_RATE:int(2.06 * SAMPLE_RATE)] //= 6
+    silence = np.zeros(SAMPLE_RATE, dtype=np.int16)
+    adapter = CountingAdapter()
+    processor = make_processor(adapter, partial_results=False, language="tr")
+
+    audio = np.concatenate([silence, speech, silence]).tobytes()
+    results = [r async for r in processor.transcribe_stream(chunked(audio))]
+
+    assert [r["text"] for r in results] == ["bir iki üç", "dört beş"]
+    # İlk parça, 3 saniyelik sınırı beklemeden çukurun ortasında biter (konuşma öncesi dolgu ~30 ms)
+    assert abs(adapter.calls[0] - 2.06 * SAMPLE_RATE) < 0.1 * SAMPLE_RATE
+    # Örtüşmede iki parçada da çözülen "üç" ikinci sonuçtan atılmıştır
+    assert len(adapter.calls) == 2
+    assert repeated_prefix_length("Merhaba, nasılsın", "nasılsın? iyiyim") == 1
+
+
+@pytest.mark.asyncio
+async def test_long_utterance_split_always_moves_past_the_overlap(monkeypatch):
+    """
+    En sessiz frame örtüşme aralığının içinde (cümlenin başında) olsa bile
+    bölmenin örtüşmeden sonra yapıldığını ve tamponun her bölmede ilerlediğini
+    test eder; ayarların bu durumu baştan reddettiğini de doğrular.
+    """
+    from pydantic import ValidationError
+    from app.core.config import Settings, settings
+
+    with pytest.raises(ValidationError):
+        Settings(STT_SERVICE_VAD_MAX_UTTERANCE_SECONDS=1.0, STT_SERVICE_VAD_SPLIT_SEARCH_MS=600, STT_SERVICE_VAD_SPLIT_OVERLAP_MS=600)
+
+    # Doğrulamayı atlayarak en kötü durumu kur: arama aralığı örtüşmeyle çakışır
+    monkeypatch.setattr(settings, "STT_SERVICE_VAD_MAX_UTTERANCE_SECONDS", 1.0)
+    monkeypatch.setattr(settings, "STT_SERVICE_VAD_SPLIT_SEARCH_MS", 600)
+    monkeypatch.setattr(settings, "STT_SERVICE_VAD_SPLIT_OVERLAP_MS", 600)
+
+    speech = (np.sin(np.arange(3 * SAMPLE_RATE) * 0.1) * 8000).astype(np.int16)
+    # Örtüşme aralığına düşen, VAD'ı tetikte tutan kısa ve çok sessiz bir çukur
+    speech[int(0.35 * SAMPLE_RATE):int(0.45 * SAMPLE_RATE)] //= 100
+    silence = np.zeros(SAMPLE_RATE, dtype=np.int16)
+    adapter = FakeAdapter()
+    processor = make_processor(adapter, partial_results=False, language="tr")
+
+    audio = np.concatenate([silence, speech, silence]).tobytes()
+    results = await asyncio.wait_for(_collect(processor.transcribe_stream(chunked(audio))), timeout=10)
+
+    assert results
+    # Bölme noktası hep örtüşmeden sonradır; aynı baş tekrar tekrar çözülmez
+    assert all(call > 0.6 * SAMPLE_RATE for call in adapter.calls[:-1])
+    assert len(adapter.calls) < 20
+
+
+async def _collect(generator):
+    return [item async for item in generator]
+
+
+def test_frame_assembler_handles_frames_split_across_chunks():
+    """
+    Parçalar arasında bölünen frame'lerin doğru birleştirildiğini ve sıranın korunduğunu test eder.
+    """
+    data = bytes(range(256)) * 10
+    assembler = FrameAssembler(frame_size_bytes=96)
+
+    frames = []
+    for chunk in (data[:7], data[7:150], data[150:151], data[151:]):
+        frames.extend(bytes(frame) for frame in assembler.push(chunk))
+
+    assert b"".join(frames) == data[:len(frames) * 96]
+    assert len(frames) == len(data) // 96
+
+
+def test_frame_assembler_push_array_matches_push():
+    """
+    Frame'leri matris olarak dönen `push_array`'in, tek bir örneği bile
+    bölünen parçalarda `push` ile aynı frame'leri ürettiğini test eder.
+    """
+    data = bytes(range(256)) * 10
+    chunks = (data[:7], data[7:150], data[150:151], data[151:])
+    reference = FrameAssembler(frame_size_bytes=96)
+    expected = [bytes(frame) for chunk in chunks for frame in reference.push(chunk)]
+
+    assembler = FrameAssembler(frame_size_bytes=96)
+    matrices = [assembler.push_array(chunk) for chunk in chunks]
+
+    assert all(matrix.shape[1:] == (48,) for matrix in matrices)
+    assert [row.tobytes() for matrix in matrices for row in matrix] == expected
+
+
+def test_frame_ring_buffer_keeps_order_and_voiced_count():
+    """
+    Ring buffer'ın taşma sonrası kronolojik sırayı ve konuşma sayacını doğru tuttuğunu test eder.
+    """
+    ring = FrameRingBuffer(max_frames=3, frame_samples=2)
+    for value, voiced in [(1, True), (2, False), (3, True), (4, True)]:
+        ring.append(memoryview(np.full(2, value, dtype=np.int16).tobytes()), voiced)
+
+    assert ring.num_voiced == 2
+    speech = SpeechBuffer(sample_rate=16000, initial_seconds=0.0001)
+    ring.drain_into(speech)
+    assert speech.pcm().tolist() == [2, 2, 3, 3, 4, 4]
+    assert len(ring) == 0
+    np.testing.assert_allclose(speech.as_float32(), np.array([2, 2, 3, 3, 4, 4]) / 32767.0, rtol=1e-6)
+
+
+@pytest.mark.asyncio
+async def test_timed_out_inference_keeps_reading_its_own_audio():
+    """
+    Zaman aşımına uğrayan çıkarım iş parçacığında sürerken sonraki cümlenin
+    ortak float32 tamponunun üzerine yazmadığını, geç biten çağrının kendi
+    sesini bozulmadan okuduğunu test eder.
+    """
+    class SlowFirstAdapter(FakeAdapter):
+        def __init__(self):
+            super().__init__()
+            self.intact = []
+
+        def transcribe(self, audio_input, language=None, **kwargs) -> str:
+            snapshot = audio_input.copy()
+            self.calls.append(len(audio_input))
+            if len(self.calls) == 1:
+                time.sleep(1.5)
+            self.intact.append(np.array_equal(snapshot, audio_input))
+            return "merhaba"
+
+    adapter = SlowFirstAdapter()
+    executor = InferenceExecutor(max_workers=2, max_queue_size=4, timeout_seconds=0.2)
+    processor = AudioProcessor(adapter=adapter, executor=executor, partial_results=False)
+    processor.vad = EnergyVad()
+    quieter = (np.frombuffer(make_audio(2.0), dtype=np.int16) // 2).tobytes()
+
+    try:
+        results = [r async for r in processor.transcribe_stream(chunked(make_audio(2.0) + quieter))]
+        for _ in range(100):
+            if len(adapter.intact) == 2:
+                break
+            await asyncio.sleep(0.05)
+    finally:
+        executor.shutdown()
+
+    assert [r["type"] for r in results] == ["error", "final"]
+    assert adapter.intact == [True, True]
+
+
+@pytest.mark.asyncio
+async def test_buffered_speech_metric_is_released_when_stream_stops():
+    """
+    Konuşma ortasında kesilen bir akışın biriken konuşma süresini metrikten
+    düştüğünü ve VAD süresinin ölçüldüğünü test eder.
+    """
+    from prometheus_client import REGISTRY
+
+    baseline = REGISTRY.get_sample_value("stt_buffered_speech_seconds")
+    vad_before = REGISTRY.get_sample_value("stt_vad_processing_seconds_count")
+    processor = make_processor(FakeAdapter(), partial_results=False)
+    # Sessizlik gelmeden (konuşmanın ortasında) biten akış
+    audio = make_audio(3.0, 0.5)[:int(2.5 * SAMPLE_RATE) * 2]
+    buffered_mid_stream = []
+
+    async def watched_chunks():
+        async for chunk in chunked(audio):
+            buffered_mid_stream.append(REGISTRY.get_sample_value("stt_buffered_speech_seconds"))
+            yield chunk
+
+    results = [r async for r in processor.transcribe_stream(watched_chunks())]
+
+    assert results[-1]["type"] == "final"
+    assert max(buffered_mid_stream) > baseline + 1.0
+    assert REGISTRY.get_sample_value("stt_buffered_speech_seconds") == pytest.approx(baseline)
+    assert REGISTRY.get_sample_value("stt_vad_processing_seconds_count") > vad_before
+
+
+@pytest.mark.asyncio
+async def test_ingest_queue_drops_oldest_audio_and_signals_overload_once():
+    """
+    Tampon dolduğunda en eski sesin atıldığını, alımın beklemediğini ve aşırı
+    yük mesajının dönem başına bir kez gönderildiğini test eder.
+    """
+    notices = []
+
+    async def on_overload(message):
+        notices.append(message)
+
+    queue = AudioIngestQueue(bytes_per_second=100, max_seconds=3, on_overload=on_overload)
+    for index in range(6):
+        await queue.put(bytes([index]) * 100)
+    queue.close()
+
+    received = [chunk if isinstance(chunk, AudioGap) else chunk[0] async for chunk in queue.chunks()]
+    assert received == [AudioGap(300), 3, 4, 5]
+    assert queue.dropped_bytes == 300
+    assert notices == [{"type": "overload", "policy": "drop_oldest", "buffered_ms": 3000}]
+
+
+@pytest.mark.asyncio
+async def test_ingest_queue_drops_whole_frames_from_odd_sized_chunks():
+    """
+    Tek sayıda byte içeren parçalar gelse bile `drop_oldest`'ın sesi yalnızca
+    frame katları halinde attığını, böylece pcm_s16le örnek hizasının
+    korunduğunu test eder.
+    """
+    queue = AudioIngestQueue(bytes_per_second=1000, max_seconds=1, frame_bytes=20)
+    data = bytes(range(256)) * 8
+    for start in range(0, len(data), 333):
+        await queue.put(data[start:start + 333])
+    queue.close()
+
+    items = [chunk async for chunk in queue.chunks()]
+    gap_bytes = sum(item.input_bytes for item in items if isinstance(item, AudioGap))
+    kept = b"".join(item for item in items if not isinstance(item, AudioGap))
+
+    assert gap_bytes % 20 == 0
+    assert gap_bytes == queue.dropped_bytes
+    assert len(kept) <= 1000
+    assert kept == data[gap_bytes:]
+
+
+@pytest.mark.asyncio
+async def test_transcribe_stream_ends_utterance_at_dropped_audio():
+    """
+    Atılan sesin iki yanındaki konuşmanın tek bir cümlede birleştirilmediğini:
+    boşluğa gelindiğinde o ana kadarki konuşmanın final olarak işlendiğini test eder.
+    """
+    adapter = FakeAdapter()
+    processor = make_processor(adapter, partial_results=False)
+    speech = make_audio(1.0, 0.0)
+
+    async def with_gap():
+        async for chunk in chunked(speech):
+            yield chunk
+        yield AudioGap(len(speech))
+        async for chunk in chunked(speech + bytes(SAMPLE_RATE * 2)):
+            yield chunk
+
+    results = [r async for r in processor.transcribe_stream(with_gap())]
+
+    assert [r["type"] for r in results] == ["final", "final"]
+    assert len(adapter.calls) == 2
+    # İlk cümle yalnızca boşluktan önceki konuşmayı içerir
+    assert adapter.calls[0] <= SAMPLE_RATE * 1.1
+
+
+@pytest.mark.asyncio
+async def test_dropped_audio_advances_the_stream_timeline():
+    """
+    Atılan sesin süresinin akış zaman çizgisine eklendiğini, boşluktan sonraki
+    cümlenin zamanının istemcinin gönderdiği sese göre hesaplandığını test eder.
+    """
+    class TimedAdapter(FakeAdapter):
+        def transcribe_detailed(self, audio, language=None, **kwargs):
+            return TranscriptionResult(text="merhaba", segments=[TranscriptionSegment(0.0, 0.5, "merhaba")])
+
+    processor = make_processor(TimedAdapter(), partial_results=False, word_timestamps=True)
+    dropped_seconds = 5
+
+    async def with_gap():
+        yield AudioGap(processor.input_bytes_per_second * dropped_seconds)
+        async for chunk in chunked(make_audio(2.0, 1.0)):
+            yield chunk
+
+    results = [r async for r in processor.transcribe_stream(with_gap())]
+
+    assert len(results) == 1
+    # Konuşma, atılan 5 saniyeden sonra gelen sesin 1. saniyesinde başlar
+    assert dropped_seconds + 0.5 <= results[0]["start"] <= dropped_seconds + 1.0
+
+
+@pytest.mark.asyncio
+async def test_ingest_queue_backpressure_waits_for_consumer():
+    """
+    `backpressure` politikasında tampon doluyken `put`'un tüketici yer açana
+    kadar beklediğini ve hiçbir sesin atılmadığını test eder.
+    """
+    queue = AudioIngestQueue(bytes_per_second=100, max_seconds=2, policy="backpressure")
+    await queue.put(b"a" * 100)
+    await queue.put(b"b" * 100)
+
+    blocked = asyncio.create_task(queue.put(b"c" * 100))
+    await asyncio.sleep(0.05)
+    assert not blocked.done()
+
+    chunks = queue.chunks()
+    assert await chunks.__anext__() == b"a" * 100
+    await asyncio.wait_for(blocked, timeout=1)
+    queue.close()
+
+    assert [chunk async for chunk in chunks] == [b"b" * 100, b"c" * 100]
+    assert queue.dropped_bytes == 0
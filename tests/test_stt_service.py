@@ -0,0 +1,80 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.stt_service import (
+    InferenceExecutor, InferenceQueueFullError, InferenceTimeoutError
+)
+
+
+@pytest.mark.asyncio
+async def test_inference_executor_runs_off_event_loop():
+    """
+    Senkron çağrının event loop iş parçacığından farklı bir iş parçacığında çalıştığını test eder.
+    """
+    executor = InferenceExecutor(max_workers=1, max_queue_size=0, timeout_seconds=5)
+    loop_thread = threading.get_ident()
+    worker_thread = await executor.run(threading.get_ident)
+    assert worker_thread != loop_thread
+    assert executor.pending == 0
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_inference_executor_rejects_when_queue_is_full():
+    """
+    Çalışan + kuyruk kapasitesi dolduğunda yeni isteğin beklemeden reddedildiğini test eder.
+    """
+    executor = InferenceExecutor(max_workers=1, max_queue_size=1, timeout_seconds=5)
+    release = threading.Event()
+
+    running = [asyncio.create_task(executor.run(release.wait)) for _ in range(2)]
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(InferenceQueueFullError):
+        await executor.run(time.sleep, 0)
+
+    release.set()
+    await asyncio.gather(*running)
+    assert executor.pending == 0
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_inference_executor_timeout():
+    """
+    İzin verilen süreyi aşan çağrının InferenceTimeoutError ile sonuçlandığını test eder.
+    """
+    executor = InferenceExecutor(max_workers=1, max_queue_size=0, timeout_seconds=0.05)
+    with pytest.raises(InferenceTimeoutError):
+        await executor.run(time.sleep, 0.3)
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_inference_executor_reports_queue_metrics():
+    """
+    Kuyrukta bekleyen çağrıların derinlik metriğine yansıdığını, bekleme
+    süresinin ölçüldüğünü ve iş bitince derinliğin sıfırlandığını test eder.
+    """
+    from prometheus_client import REGISTRY
+
+    def depth():
+        return REGISTRY.get_sample_value("stt_inference_queue_depth")
+
+    waits_before = REGISTRY.get_sample_value("stt_inference_queue_wait_seconds_count")
+    baseline = depth()
+    executor = InferenceExecutor(max_workers=1, max_queue_size=2, timeout_seconds=5)
+    release = threading.Event()
+
+    running = [asyncio.create_task(executor.run(release.wait)) for _ in range(3)]
+    await asyncio.sleep(0.05)
+    assert depth() == baseline + 2
+
+    release.set()
+    await asyncio.gather(*running)
+    assert depth() == baseline
+    assert REGISTRY.get_sample_value("stt_inference_queue_wait_seconds_count") == waits_before + 3
+    executor.shutdown()
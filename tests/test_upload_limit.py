@@ -0,0 +1,60 @@
+import pytest
+from fastapi import FastAPI, File, UploadFile
+from httpx import ASGITransport, AsyncClient
+from app.core.upload_limit import UploadSizeLimitMiddleware
+
+
+def make_app(max_body_bytes: int):
+    app = FastAPI()
+    app.add_middleware(UploadSizeLimitMiddleware, max_body_bytes=max_body_bytes)
+    reached = []
+
+    @app.post("/upload")
+    async def upload(audio_file: UploadFile = File(...)):
+        reached.append(audio_file.filename)
+        return {"size": len(await audio_file.read())}
+
+    return app, reached
+
+
+@pytest.mark.asyncio
+async def test_upload_over_content_length_limit_is_rejected_before_parsing():
+    """
+    Content-Length sınırı aşan yüklemenin endpoint'e (form ayrıştırmaya) ulaşmadan 413 ile reddedildiğini test eder.
+    """
+    app, reached = make_app(max_body_bytes=1024)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        small = await client.post("/upload", files={"audio_file": ("a.wav", b"x" * 100, "audio/wav")})
+        large = await client.post("/upload", files={"audio_file": ("b.wav", b"x" * 4096, "audio/wav")})
+
+    assert small.status_code == 200
+    assert large.status_code == 413
+    assert large.json() == {"detail": "Request is too large."}
+    assert reached == ["a.wav"]
+
+
+@pytest.mark.asyncio
+async def test_chunked_upload_is_cut_off_when_limit_is_exceeded():
+    """
+    Content-Length başlığı olmayan (chunked) gövdenin okunurken sınırı aştığı anda 413 ile kesildiğini test eder.
+    """
+    app, reached = make_app(max_body_bytes=1024)
+    boundary = "limit-test"
+    head = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"audio_file\"; filename=\"c.wav\"\r\n"
+        "Content-Type: audio/wav\r\n\r\n"
+    ).encode()
+
+    async def body():
+        yield head
+        for _ in range(8):
+            yield b"x" * 512
+        yield f"\r\n--{boundary}--\r\n".encode()
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post(
+            "/upload", content=body(), headers={"content-type": f"multipart/form-data; boundary={boundary}"}
+        )
+
+    assert response.status_code == 413
+    assert reached == []
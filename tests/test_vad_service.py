@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from app.services.vad_service import EnergyVadEngine, VadEngine, WebRtcVadEngine, create_vad
+from app.utils.audio_buffers import FrameAssembler
+
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = 480
+
+
+def make_audio(rng, pattern):
+    """(tür, saniye) listesinden int16 PCM ve frame başına beklenen etiketleri üretir."""
+    parts, labels = [], []
+    for kind, seconds in pattern:
+        count = int(seconds * SAMPLE_RATE)
+        t = np.arange(count) / SAMPLE_RATE
+        if kind == "speech":
+            parts.append(np.sin(2 * np.pi * 150 * t) * 6000 + np.sin(2 * np.pi * 300 * t) * 3000 + rng.normal(0, 100, count))
+        elif kind == "noise":
+            parts.append(rng.normal(0, 2000, count))
+        elif kind == "hum":
+            # Düşük frekanslı sabit gürültü (ör. şebeke uğultusu); spektrumu sesli konuşmaya benzer
+            parts.append(np.sin(2 * np.pi * 100 * t) * 800 + rng.normal(0, 30, count))
+        else:
+            parts.append(rng.normal(0, 30, count))
+        labels.extend([kind == "speech"] * (count // FRAME_SAMPLES))
+    return np.concatenate(parts).astype(np.int16), np.array(labels)
+
+
+def test_energy_vad_detects_speech_and_ignores_stationary_noise():
+    """
+    NumPy motorunun konuşmayı bulduğunu, sessizlikten daha yüksek ama
+    spektrumu konuşmaya benzemeyen beyaz gürültüde tetiklenmediğini test eder.
+    """
+    pcm, labels = make_audio(np.random.default_rng(0), [
+        ("silence", 1.2), ("speech", 1.5), ("silence", 0.9), ("noise", 1.5), ("speech", 0.9), ("silence", 0.6)
+    ])
+    frames = pcm[:len(labels) * FRAME_SAMPLES].reshape(-1, FRAME_SAMPLES)
+
+    voiced = EnergyVadEngine(on_db=15.0, off_db=8.0, min_dbfs=-50.0).classify(frames, SAMPLE_RATE)
+
+    assert np.mean(voiced == labels) > 0.95
+    assert voiced[labels].mean() > 0.95
+
+
+def test_energy_vad_releases_when_steady_noise_follows_speech():
+    """
+    Konuşmanın ardından başlayan sabit gürültünün, gürültü penceresi dolduktan
+    sonra konuşma sayılmadığını ve ardından gelen konuşmanın yine bulunduğunu test eder.
+    """
+    pcm, _ = make_audio(np.random.default_rng(2), [("silence", 1.0), ("speech", 1.0), ("hum", 6.0), ("speech", 1.0)])
+    vad = EnergyVadEngine(on_db=15.0, off_db=8.0, min_dbfs=-50.0, noise_window_seconds=2.0)
+    assembler = FrameAssembler(FRAME_SAMPLES * 2)
+    data = pcm.tobytes()
+    chunk_bytes = 3200
+    voiced = np.concatenate([
+        vad.classify(assembler.push_array(data[start:start + chunk_bytes]), SAMPLE_RATE)
+        for start in range(0, len(data), chunk_bytes)
+    ])
+    frame_times = np.arange(len(voiced)) * FRAME_SAMPLES / SAMPLE_RATE
+
+    assert voiced[(frame_times >= 1.1) & (frame_times < 1.9)].all()
+    # Pencere (2 sn) dolduktan sonra uğultu tabana dahil olur
+    assert not voiced[(frame_times >= 4.5) & (frame_times < 8.0)].any()
+    assert voiced[frame_times >= 8.2].mean() > 0.9
+
+
+def test_vad_engines_are_independent_of_chunk_size():
+    """
+    Her iki motorun da, frame'ler parçalara nasıl bölünerek gelirse gelsin
+    (oturumlar arası durum korunarak) aynı kararları verdiğini test eder.
+    """
+    pcm, _ = make_audio(np.random.default_rng(1), [
+        ("silence", 0.5), ("speech", 1.0), ("silence", 1.0), ("speech", 0.5), ("hum", 4.0), ("speech", 1.0)
+    ])
+    data = pcm.tobytes()
+
+    for engine in ("energy", "webrtc"):
+        results = []
+        for chunk_bytes in (320, 3200, 32000, len(data)):
+            vad = create_vad(engine)
+            assembler = FrameAssembler(FRAME_SAMPLES * 2)
+            results.append(np.concatenate([
+                vad.classify(assembler.push_array(data[start:start + chunk_bytes]), SAMPLE_RATE)
+                for start in range(0, len(data), chunk_bytes)
+            ]))
+        assert isinstance(create_vad(engine), EnergyVadEngine if engine == "energy" else WebRtcVadEngine)
+        for result in results[1:]:
+            assert np.array_equal(result, results[0])
+    # Ortak arayüz soyuttur; is_speech'i uygulamayan bir motor oluşturulamaz
+    with pytest.raises(TypeError):
+        VadEngine()